@@ -0,0 +1,98 @@
+'''
+Benchmark of the micro-batching of the model wrappers (src/utils/micro_batching.py).
+
+Client threads send single row requests to a model, as the threads of the model server do, either
+directly (unbatched, one predict call per request) or through a MicroBatcher. The default model is a
+fake one with the cost profile of an AutoGluon predictor: a fixed CPU-bound overhead per call plus a
+small cost per row. A saved AutoGluon predictor can be benchmarked instead with --autogluon-path.
+
+Usage (from the backend directory):
+    python scripts/benchmark_micro_batching.py [--clients 1 4 16] [--requests N] [--max-batch-size N]
+        [--max-wait-ms MS] [--call-overhead-ms MS] [--row-cost-ms MS] [--autogluon-path PATH]
+'''
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.utils.micro_batching import MicroBatcher
+
+class FakeModel:
+    '''
+    Model whose predict call costs call_overhead_ms plus row_cost_ms per row, holding the GIL like
+    the python overhead of a real predictor does.
+    '''
+    def __init__(self, call_overhead_ms, row_cost_ms):
+        self.call_overhead_ms = call_overhead_ms
+        self.row_cost_ms = row_cost_ms
+
+    def predict(self, model_input):
+        end = time.perf_counter() + (self.call_overhead_ms + self.row_cost_ms * len(model_input)) / 1000
+        while time.perf_counter() < end:
+            pass
+        return pd.Series(np.zeros(len(model_input)), index=model_input.index)
+
+def run_clients(predict, rows, clients, requests_per_client):
+    '''
+    Sends single row requests from concurrent clients and returns the throughput (requests/s) and latencies (ms).
+    '''
+    latencies = []
+    lock = threading.Lock()
+    def client(client_index):
+        client_latencies = []
+        for i in range(requests_per_client):
+            row = rows.iloc[[(client_index * requests_per_client + i) % len(rows)]]
+            start = time.perf_counter()
+            predict(row)
+            client_latencies.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(client_latencies)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching benchmark")
+    parser.add_argument("--clients", type=int, nargs="*", default=[1, 4, 16], help="Concurrent clients (default: 1 4 16)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client (default: 200)")
+    parser.add_argument("--max-batch-size", type=int, default=32, help="Micro-batch size (default: 32)")
+    parser.add_argument("--max-wait-ms", type=float, default=5, help="Micro-batch maximum wait (default: 5)")
+    parser.add_argument("--call-overhead-ms", type=float, default=5, help="Fixed cost of a predict call of the fake model (default: 5)")
+    parser.add_argument("--row-cost-ms", type=float, default=0.05, help="Cost per row of the fake model (default: 0.05)")
+    parser.add_argument("--autogluon-path", help="Path of a saved AutoGluon predictor to benchmark instead of the fake model")
+    parser.add_argument("--data", help="CSV with input rows of the AutoGluon predictor")
+    args = parser.parse_args()
+
+    if args.autogluon_path:
+        from autogluon.tabular import TabularPredictor
+        predict = TabularPredictor.load(args.autogluon_path).predict
+        rows = pd.read_csv(args.data)
+    else:
+        predict = FakeModel(args.call_overhead_ms, args.row_cost_ms).predict
+        rows = pd.DataFrame(np.random.default_rng(0).normal(size=(1000, 10)), columns=[f"x{i}" for i in range(10)])
+
+    batcher = MicroBatcher(predict, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    print(f"{'clients':>8}  {'mode':<10}{'req/s':>10}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+    for clients in args.clients:
+        for mode, mode_predict in (("unbatched", predict), ("batched", batcher.predict)):
+            throughput, latencies = run_clients(mode_predict, rows, clients, args.requests)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{clients:>8}  {mode:<10}{throughput:>10.1f}{p50:>11.2f}{p99:>11.2f}")
+    if batcher.batches:
+        print(f"\nMean micro-batch size: {batcher.batched_rows / batcher.batches:.1f} rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+'''
+Benchmark of the serialization cost of a prediction request for each deployment protocol.
+
+Each payload is encoded as the client sends it and decoded into a NumPy array as the model server
+receives it, for several row widths (number of features) and batch sizes:
+    rest: Seldon protocol, JSON ndarray ({"data": {"ndarray": [[...]]}})
+    grpc: Seldon protocol, SeldonMessage protobuf with a tensor (needs seldon-core installed)
+    v2-json: V2 / Open Inference Protocol, JSON tensor
+    v2-binary: V2 / Open Inference Protocol, binary tensor extension (JSON header + raw bytes)
+
+Usage (from the backend directory):
+    python scripts/benchmark_payload.py [--widths 10 100 1000] [--batch-sizes 1 32 256] [--repeats N]
+'''
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import numpy as np
+
+try:
+    from seldon_core.proto import prediction_pb2
+except ImportError:
+    prediction_pb2 = None
+
+def encode_rest(array):
+    return json.dumps({"data": {"ndarray": array.tolist()}}).encode()
+
+def decode_rest(payload):
+    return np.asarray(json.loads(payload)["data"]["ndarray"], dtype=np.float64)
+
+def encode_grpc(array):
+    message = prediction_pb2.SeldonMessage()
+    message.data.tensor.shape.extend(array.shape)
+    message.data.tensor.values.extend(array.ravel())
+    return message.SerializeToString()
+
+def decode_grpc(payload):
+    message = prediction_pb2.SeldonMessage()
+    message.ParseFromString(payload)
+    tensor = message.data.tensor
+    return np.asarray(tensor.values, dtype=np.float64).reshape(tuple(tensor.shape))
+
+def encode_v2_json(array):
+    return json.dumps({
+        "inputs": [{"name": "input-0", "shape": list(array.shape), "datatype": "FP64", "data": array.ravel().tolist()}]
+    }).encode()
+
+def decode_v2_json(payload):
+    tensor = json.loads(payload)["inputs"][0]
+    return np.asarray(tensor["data"], dtype=np.float64).reshape(tensor["shape"])
+
+def encode_v2_binary(array):
+    data = array.astype(np.float64).tobytes()
+    header = json.dumps({
+        "inputs": [{
+            "name": "input-0", "shape": list(array.shape), "datatype": "FP64",
+            "parameters": {"binary_data_size": len(data)},
+        }]
+    }).encode()
+    # The header length travels in the Inference-Header-Content-Length HTTP header, prepended here
+    return len(header).to_bytes(4, "little") + header + data
+
+def decode_v2_binary(payload):
+    header_length = int.from_bytes(payload[:4], "little")
+    tensor = json.loads(payload[4:4 + header_length])["inputs"][0]
+    return np.frombuffer(payload, dtype=np.float64, offset=4 + header_length).reshape(tensor["shape"])
+
+PROTOCOLS = {
+    "rest": (encode_rest, decode_rest),
+    "grpc": (encode_grpc, decode_grpc),
+    "v2-json": (encode_v2_json, decode_v2_json),
+    "v2-binary": (encode_v2_binary, decode_v2_binary),
+}
+
+def measure(encode, decode, array, repeats):
+    '''
+    Measures the median encode and decode time (ms) of an array and the size of its payload (bytes).
+    '''
+    encode_times, decode_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        payload = encode(array)
+        encoded = time.perf_counter()
+        decoded = decode(payload)
+        end = time.perf_counter()
+        encode_times.append((encoded - start) * 1000)
+        decode_times.append((end - encoded) * 1000)
+    assert np.allclose(decoded, array)
+    return statistics.median(encode_times), statistics.median(decode_times), len(payload)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization benchmark of the deployment protocols")
+    parser.add_argument("--widths", type=int, nargs="*", default=[10, 100, 1000], help="Features per row (default: 10 100 1000)")
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 32, 256], help="Rows per request (default: 1 32 256)")
+    parser.add_argument("--repeats", type=int, default=50, help="Measurements per case (default: 50)")
+    args = parser.parse_args()
+
+    protocols = dict(PROTOCOLS)
+    if prediction_pb2 is None:
+        print("seldon-core is not installed, skipping grpc\n")
+        del protocols["grpc"]
+
+    rng = np.random.default_rng(0)
+    print(f"{'width':>6}{'batch':>7}  {'protocol':<10}{'encode (ms)':>13}{'decode (ms)':>13}{'total (ms)':>12}{'size (KB)':>11}")
+    for width in args.widths:
+        for batch_size in args.batch_sizes:
+            array = rng.normal(size=(batch_size, width))
+            for name, (encode, decode) in protocols.items():
+                encode_time, decode_time, size = measure(encode, decode, array, args.repeats)
+                print(f"{width:>6}{batch_size:>7}  {name:<10}{encode_time:>13.3f}{decode_time:>13.3f}"
+                      f"{encode_time + decode_time:>12.3f}{size / 1024:>11.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+'''
+Benchmark of the cold start time of the trainer entry point for each framework.
+
+Every measurement runs in a fresh Python interpreter, which imports the trainer entry point
+(src/trainer/trainer.py) and resolves the creation type and model strategy of a job, as the
+trainer does before fitting. The framework a job needs (e.g. autogluon for BASIC jobs) is then
+imported, so the total is the time until the job can start training. The heavy frameworks
+present in sys.modules at the end are reported, to check that each job only imports what it uses.
+
+Usage (from the backend directory, with the "trainer" extra installed):
+    python scripts/benchmark_trainer_startup.py [--repeats N] [--framework NAME ...]
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = ["autogluon", "torch", "skorch", "lightgbm"]
+
+# Job needed by each framework: creation type, model strategy and framework module used while training
+FRAMEWORK_JOBS = {
+    "sklearn": ("ADVANCED", "DecisionTreeClassifierSklearnStrategy", "sklearn.tree"),
+    "pytorch": ("ADVANCED", "SimpleNeuralNetworkClassifierTorchStrategy", "skorch"),
+    "autogluon": ("BASIC", None, "autogluon.tabular"),
+}
+
+STARTUP_CODE = '''
+import importlib, json, sys, time
+start = time.perf_counter()
+import src.trainer.trainer
+from src.utils.strategy_registry import get_creation_type, get_model_strategy
+get_creation_type({creation_type!r})
+if {strategy!r} is not None:
+    get_model_strategy({strategy!r})
+resolved = time.perf_counter()
+importlib.import_module({framework_module!r})
+end = time.perf_counter()
+print(json.dumps({{
+    "resolve_seconds": resolved - start,
+    "total_seconds": end - start,
+    "heavy_modules": [name for name in {heavy_modules!r} if name in sys.modules],
+}}))
+'''
+
+def measure_cold_start(creation_type, strategy, framework_module):
+    '''
+    Runs the startup code in a new interpreter and returns the measured times.
+    '''
+    code = STARTUP_CODE.format(
+        creation_type=creation_type,
+        strategy=strategy,
+        framework_module=framework_module,
+        heavy_modules=HEAVY_MODULES,
+    )
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark of the trainer entry point")
+    parser.add_argument("--repeats", type=int, default=5, help="Cold starts measured per framework (default: 5)")
+    parser.add_argument(
+        "--framework", nargs="*", choices=list(FRAMEWORK_JOBS.keys()), default=list(FRAMEWORK_JOBS.keys()),
+        help="Frameworks to benchmark (default: all)",
+    )
+    args = parser.parse_args()
+
+    print(f"{'framework':<12}{'resolve (s)':>14}{'total (s)':>12}  heavy modules imported")
+    for framework in args.framework:
+        creation_type, strategy, framework_module = FRAMEWORK_JOBS[framework]
+        try:
+            runs = [measure_cold_start(creation_type, strategy, framework_module) for _ in range(args.repeats)]
+        except subprocess.CalledProcessError as e:
+            print(f"{framework:<12}failed: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        resolve_time = statistics.median(run["resolve_seconds"] for run in runs)
+        total_time = statistics.median(run["total_seconds"] for run in runs)
+        heavy_modules = ", ".join(runs[-1]["heavy_modules"]) or "-"
+        print(f"{framework:<12}{resolve_time:>14.3f}{total_time:>12.3f}  {heavy_modules}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,14 +5,29 @@ import time
 import boto3
 import mlflow
 import pandas as pd
+import requests
 from flask import Flask, jsonify, request, request
 from flask_restful import Api
 from flask_cors import CORS
-import jinja2
 from kubernetes import client, config
 import yaml
 import json
 
+from src.api.seldon_deployment import (
+    MAIN_PREDICTOR,
+    PROMETHEUS_URL,
+    SHADOW_PREDICTOR,
+    build_autoscaling_spec,
+    build_deployment_data,
+    build_protocol_spec,
+    derive_batch_prediction_resources,
+    derive_resource_requests,
+    get_model_cache_status,
+    get_predictor_url,
+    render_seldon_deployment,
+    validate_model_versions,
+)
+from src.api.shadow_comparison import LIVE_LATENCY_WINDOW_PATTERN, query_live_latency, replay
 
 
 app = Flask(__name__)
@@ -30,6 +45,22 @@ configuration = client.Configuration.get_default_copy()
 api_client = client.ApiClient(configuration)
 batch_v1 = client.BatchV1Api(api_client)
 
+# Secret with the S3 credentials, shared with the MLflow server
+MLFLOW_SECRET_NAME = "laredo-mlflow-secret"
+S3_CREDENTIALS_KEYS = ["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_DEFAULT_REGION"]
+
+# Model version tags written by the benchmark job (src/trainer/benchmark.py)
+BENCHMARK_TAG_PREFIX = "benchmark."
+BENCHMARK_DEFAULT_BATCH_SIZES = [1, 8, 32, 128]
+BENCHMARK_DEFAULT_ITERATIONS = 50
+BENCHMARK_MAX_BATCH_SIZE = 10000
+BENCHMARK_MAX_ITERATIONS = 1000
+# The benchmark pod gets the resources of a default model server replica, so its numbers match a deployment
+BENCHMARK_RESOURCES = derive_resource_requests()
+# Worker processes of a batch prediction job, each one loading a copy of the model
+BATCH_PREDICTION_DEFAULT_WORKERS = 2
+BATCH_PREDICTION_MAX_WORKERS = 16
+
 
 @app.route("/")
 def hello():
@@ -110,31 +141,48 @@ def train_model():
     #     except config.config_exception.ConfigException:
     #         return jsonify({"error": "Failed to load both kube-config file and in-cluster configuration."}), 500
     
+    job_name = launch_trainer_job("trainer-job-" + run_id, {
+        "PARAMS": json.dumps(params),
+        "CREATION_TYPE": type_str,
+        "RUN_ID": run_id,
+    })
+    
+    # return jsonify(run_id), 201
+    return jsonify({
+        "job_id": job_name,
+        "run_id": run_id,
+        "status": "running"
+    }), 201
+
+def launch_trainer_job(job_name, env, command=None, resources=None, secret_env=None):
+    '''
+    Launch a Kubernetes Job with the trainer image
+    Args:
+        job_name: str
+        env: Dict of environment variables of the job (the tracking uri is always added)
+        command: Command overriding the entrypoint of the image (trainer.py), None to train
+        resources: Kubernetes resources (requests and limits) of the container, None for no limits
+        secret_env: Keys of the MLflow secret (S3 credentials) exposed as environment variables of the job
+    Returns:
+        Name of the job
+    '''
+    env = dict(env, TRACKING_URI_IP=os.getenv("TRACKING_URI_IP"), TRACKING_URI_PORT=os.getenv("TRACKING_URI_PORT"))
+    env_vars = [client.V1EnvVar(name=name, value=value) for name, value in env.items()]
+    env_vars += [
+        client.V1EnvVar(
+            name=key,
+            value_from=client.V1EnvVarSource(
+                secret_key_ref=client.V1SecretKeySelector(name=MLFLOW_SECRET_NAME, key=key, optional=True)
+            )
+        )
+        for key in secret_env or []
+    ]
     container = client.V1Container(
         name="trainer",
         image=os.getenv("TRAINER_IMAGE") + ":" + os.getenv("TRAINER_TAG"),
-        env=[
-            client.V1EnvVar(
-                name="PARAMS",
-                value=json.dumps(params)
-            ),
-            client.V1EnvVar(
-                name="CREATION_TYPE",
-                value=type_str
-            ),
-            client.V1EnvVar(
-                name="RUN_ID",
-                value=run_id
-            ),
-            client.V1EnvVar(
-                name="TRACKING_URI_IP",
-                value=os.getenv("TRACKING_URI_IP")
-            ),
-            client.V1EnvVar(
-                name="TRACKING_URI_PORT",
-                value=os.getenv("TRACKING_URI_PORT")
-            )
-        ]
+        command=command,
+        env=env_vars,
+        resources=client.V1ResourceRequirements(**resources) if resources else None
     )
     template = client.V1PodTemplateSpec(
         spec=client.V1PodSpec(
@@ -148,18 +196,12 @@ def train_model():
     job = client.V1Job(
         api_version="batch/v1",
         kind="Job",
-        metadata=client.V1ObjectMeta(name="trainer-job-" + run_id),
+        metadata=client.V1ObjectMeta(name=job_name),
         spec=job_spec
     )
 
-    namespaced_job =batch_v1.create_namespaced_job("laredo", job)
-    
-    # return jsonify(run_id), 201
-    return jsonify({
-        "job_id": job.metadata.name,
-        "run_id": run_id,
-        "status": "running"
-    }), 201
+    batch_v1.create_namespaced_job("laredo", job)
+    return job.metadata.name
 
 @app.route("/job/status", methods=["GET"])
 # def get_job_status(job_id):
@@ -209,33 +251,293 @@ def get_model_status(run_id):
         "run_id": run_id
     }), 200
 
-def render_template(template_name, data):
-    templateLoader = jinja2.FileSystemLoader(searchpath="src/resources/")
-    templateEnv = jinja2.Environment(loader=templateLoader)
-    template = templateEnv.get_template(template_name)
-    outputText = template.render(data)
-    return outputText
+def get_model_size_and_latency(model_name, version):
+    '''
+    Get the size of the model artifact and the single row inference latency of a version of a model,
+    used to size its deployment
+    Args:
+        model_name: str
+        version: str
+    Returns:
+        Tuple (artifact size in bytes, latency in ms), each one None if unknown
+    '''
+    mlflow_client = mlflow.MlflowClient()
+    try:
+        model_version = mlflow_client.get_model_version(model_name, version)
+    except mlflow.exceptions.MlflowException:
+        return None, None
+    run_id = model_version.run_id
+
+    artifact_size = None
+    try:
+        pending_paths = ["model"]
+        artifact_size = 0
+        while pending_paths:
+            for artifact in mlflow_client.list_artifacts(run_id, pending_paths.pop()):
+                if artifact.is_dir:
+                    pending_paths.append(artifact.path)
+                else:
+                    artifact_size += artifact.file_size or 0
+    except Exception as e:
+        print(f"Could not compute the artifact size of model {model_name}: {e}")
+        artifact_size = None
+
+    # Prefer the single row latency measured by the benchmark of the version (POST /models/<name>/benchmark)
+    # over the one measured right after training
+    latency = model_version.tags.get(BENCHMARK_TAG_PREFIX + "latency_p50_ms_batch_1")
+    if latency is not None:
+        latency = float(latency)
+    else:
+        latency = mlflow.get_run(run_id).data.metrics.get("inference_latency_ms")
+    return artifact_size, latency
+
+def validate_benchmark_params(params):
+    '''
+    Validate the body of a benchmark request
+    Args:
+        params: Dict with the optional keys batchSizes (list of int) and iterations (int)
+    Returns:
+        Dict with the params of the benchmark job
+    '''
+    batch_sizes = params.get("batchSizes", BENCHMARK_DEFAULT_BATCH_SIZES)
+    iterations = params.get("iterations", BENCHMARK_DEFAULT_ITERATIONS)
+    if not isinstance(batch_sizes, list) or not batch_sizes or not all(
+        isinstance(size, int) and not isinstance(size, bool) and 0 < size <= BENCHMARK_MAX_BATCH_SIZE for size in batch_sizes
+    ):
+        raise ValidationError(f"batchSizes must be a list of integers between 1 and {BENCHMARK_MAX_BATCH_SIZE}", 400)
+    if not isinstance(iterations, int) or isinstance(iterations, bool) or not 0 < iterations <= BENCHMARK_MAX_ITERATIONS:
+        raise ValidationError(f"iterations must be an integer between 1 and {BENCHMARK_MAX_ITERATIONS}", 400)
+    return {"batchSizes": batch_sizes, "iterations": iterations}
+
+@app.route("/models/<model_name>/benchmark", methods=["POST"])
+def benchmark_model(model_name):
+    '''
+    Benchmark the latency and throughput of a model version before deploying it.
+    The model is loaded in a job with the trainer image, which predicts synthetic rows generated from the
+    schema of the training dataset. The optional request body configures the benchmark:
+        version: str (latest version if not given)
+        batchSizes: list of int (single row latency is always measured)
+        iterations: int (predictions measured per batch size)
+    The results are returned by /job/status once the job succeeds, and stored as tags of the model version
+    ("benchmark.<metric>"), where the deploy sizing reads them.
+    '''
+    data = request.get_json(silent=True) or {}
+    params = validate_benchmark_params(data)
+
+    mlflow_client = mlflow.MlflowClient()
+    try:
+        version = str(data.get("version") or mlflow_client.get_latest_versions(model_name)[0].version)
+        mlflow_client.get_model_version(model_name, version)
+    except (mlflow.exceptions.MlflowException, IndexError):
+        return jsonify({"error": "Model not found"}), 404
+
+    with mlflow.start_run(run_name=f"benchmark-{model_name}-{version}") as run:
+        run_id = run.info.run_id
+
+    job_name = launch_trainer_job(
+        "benchmark-job-" + run_id,
+        {"PARAMS": json.dumps(params), "RUN_ID": run_id, "MODEL_NAME": model_name, "MODEL_VERSION": version},
+        command=["uv", "run", "src/trainer/benchmark.py"],
+        resources=BENCHMARK_RESOURCES
+    )
+    return jsonify({
+        "job_id": job_name,
+        "run_id": run_id,
+        "version": version,
+        "status": "running"
+    }), 201
+
+def validate_batch_prediction_params(params):
+    '''
+    Validate the body of a batch prediction request
+    Args:
+        params: Dict with the key datasetFilename and the optional keys chunkSize, workers, keepColumns and partitionBy
+    Returns:
+        Dict with the optional params of the batch prediction job
+    '''
+    if not params.get("datasetFilename"):
+        raise ValidationError("Missing datasetFilename", 400)
+    job_params = {}
+    for key in ("chunkSize", "workers"):
+        if key in params:
+            value = params[key]
+            if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                raise ValidationError(f"{key} must be an integer greater than 0", 400)
+            job_params[key] = value
+    if job_params.get("workers", 0) > BATCH_PREDICTION_MAX_WORKERS:
+        raise ValidationError(f"workers must be at most {BATCH_PREDICTION_MAX_WORKERS}", 400)
+    job_params.setdefault("workers", BATCH_PREDICTION_DEFAULT_WORKERS)
+    if "keepColumns" in params:
+        if not isinstance(params["keepColumns"], list) or not all(isinstance(column, str) for column in params["keepColumns"]):
+            raise ValidationError("keepColumns must be a list of column names", 400)
+        job_params["keepColumns"] = params["keepColumns"]
+    if "partitionBy" in params:
+        if not isinstance(params["partitionBy"], str):
+            raise ValidationError("partitionBy must be a column name", 400)
+        job_params["partitionBy"] = params["partitionBy"]
+    return job_params
+
+@app.route("/models/<model_name>/predict-batch", methods=["POST"])
+def predict_batch(model_name):
+    '''
+    Score a dataset of the dataset bucket with a model version, in a job with the trainer image.
+    The dataset is read in chunks, scored by a pool of processes and the predictions are written as
+    Parquet part files under predictions/<model_name>/<version>/<run_id>/ of the dataset bucket.
+    Request body:
+        datasetFilename: str (CSV with the model input columns)
+        version: str (latest version if not given)
+        chunkSize: int (rows per chunk), workers: int (scoring processes, BATCH_PREDICTION_DEFAULT_WORKERS if not given)
+        keepColumns: list of str (input columns copied to the predictions, all if not given)
+        partitionBy: str (column the predictions are partitioned by)
+    The progress is returned by GET /models/<model_name>/predict-batch
+    '''
+    data = request.get_json(silent=True) or {}
+    params = validate_batch_prediction_params(data)
+
+    mlflow_client = mlflow.MlflowClient()
+    try:
+        version = str(data.get("version") or mlflow_client.get_latest_versions(model_name)[0].version)
+        mlflow_client.get_model_version(model_name, version)
+    except (mlflow.exceptions.MlflowException, IndexError):
+        return jsonify({"error": "Model not found"}), 404
+
+    with mlflow.start_run(run_name=f"predict-batch-{model_name}-{version}") as run:
+        run_id = run.info.run_id
+
+    bucket_name = os.getenv("DATASET_BUCKET_NAME")
+    params["inputURI"] = f"s3://{bucket_name}/{data['datasetFilename']}"
+    params["outputURI"] = f"s3://{bucket_name}/predictions/{model_name}/{version}/{run_id}"
+    endpoint_url = os.getenv("S3_INTERNAL_ENDPOINT_URL") if os.getenv("S3_INTERNAL_ENDPOINT_URL") else os.getenv("S3_ENDPOINT_URL")
+
+    job_name = launch_trainer_job(
+        "predict-batch-job-" + run_id,
+        {
+            "PARAMS": json.dumps(params), "RUN_ID": run_id, "MODEL_NAME": model_name,
+            "MODEL_VERSION": version, "S3_ENDPOINT_URL": endpoint_url,
+        },
+        command=["uv", "run", "src/trainer/batch_predict.py"],
+        # Sized for a copy of the model per worker
+        resources=derive_batch_prediction_resources(params["workers"], get_model_size_and_latency(model_name, version)[0]),
+        secret_env=S3_CREDENTIALS_KEYS
+    )
+    return jsonify({
+        "job_id": job_name,
+        "run_id": run_id,
+        "version": version,
+        "output_uri": params["outputURI"],
+        "status": "running"
+    }), 201
+
+@app.route("/models/<model_name>/predict-batch", methods=["GET"])
+def get_batch_prediction_progress(model_name):
+    '''
+    Get the progress of a batch prediction job (query params jobId and runId).
+    chunks_total is exact once the job has finished; while it runs, it is the estimate of the job from the size of
+    the dataset (chunks_total_estimated is true), or None before the first chunk is read.
+    '''
+    job_id = request.args.get("jobId")
+    run_id = request.args.get("runId")
+    if not job_id or not run_id:
+        return jsonify({"error": "Missing jobId or runId"}), 400
+    job = batch_v1.read_namespaced_job_status(
+        name=job_id,
+        namespace="laredo"
+    )
+    if job.status.succeeded:
+        status = "succeeded"
+    elif job.status.failed:
+        status = "failed"
+    else:
+        status = "running"
+
+    run = mlflow.get_run(run_id)
+    metrics = run.data.metrics
+    chunks_total = metrics.get("chunks_total", metrics.get("chunks_total_estimate"))
+    return jsonify({
+        "status": status,
+        "rows_scored": int(metrics.get("rows_scored", 0)),
+        "chunks_done": int(metrics.get("chunks_done", 0)),
+        "chunks_total": int(chunks_total) if chunks_total is not None else None,
+        "chunks_total_estimated": "chunks_total" not in metrics,
+        "rows_per_sec": metrics.get("rows_per_sec"),
+        "output_uri": run.data.params.get("output_uri")
+    }), 200
+
+@app.route("/models/<model_name>/benchmark", methods=["GET"])
+def get_model_benchmark(model_name):
+    '''
+    Get the last benchmark of a model version (query param version, latest version if not given)
+    '''
+    mlflow_client = mlflow.MlflowClient()
+    try:
+        version = request.args.get("version") or mlflow_client.get_latest_versions(model_name)[0].version
+        tags = mlflow_client.get_model_version(model_name, version).tags
+    except (mlflow.exceptions.MlflowException, IndexError):
+        return jsonify({"error": "Model not found"}), 404
+
+    if BENCHMARK_TAG_PREFIX + "run_id" not in tags:
+        return jsonify({"error": f"Version {version} of model {model_name} has not been benchmarked"}), 404
+    return jsonify({
+        "version": version,
+        "run_id": tags[BENCHMARK_TAG_PREFIX + "run_id"],
+        "metrics": get_run_metrics(tags[BENCHMARK_TAG_PREFIX + "run_id"])
+    }), 200
 
 @app.route("/models/<model_name>/deploy", methods=["POST"])
 def model_deploy(model_name):
-    # templateLoader = jinja2.FileSystemLoader(searchpath="./")
-    # templateLoader = jinja2.FileSystemLoader(searchpath="src/resources/")
-    # templateEnv = jinja2.Environment(loader=templateLoader)
-    # TEMPLATE_FILE = "languageWrapper_template.jinja"
-    # template = templateEnv.get_template(TEMPLATE_FILE)
-
-    data = {
-        "deployment_name": model_name,
-        "model_name": model_name,
-        "replicas": 1,
-        "tracking_uri_ip": ip,
-        "tracking_uri_port": port,
-        "is_k8s": True
-    }
+    '''
+    Deploy a version of a model as a SeldonDeployment, or update its deployment if it is already deployed.
+    The optional request body selects the versions deployed:
+        version: str (latest version if not given)
+        shadowVersion: str (version deployed as a shadow predictor, which receives a copy of the traffic
+            so it can be compared with the live one, see POST /models/<model_name>/deploy/shadow/compare)
+    configures the autoscaling of the deployment:
+        minReplicas, maxReplicas: int
+        targetCpuUtilization: int (% of the CPU request) or targetRequestsPerSecond: float (per replica)
+    and its protocol:
+        protocol: REST (default), GRPC (Seldon protocol over gRPC) or V2 (Open Inference Protocol, binary tensors,
+            needs MODEL_SERVER_V2_IMAGE)
+    The resources of the replicas of each predictor are derived from the artifact size and latency of its version.
+    Serving a version other than the latest one, or a shadow version, needs a model server that loads the
+    model_uri parameter (MODEL_SERVER_LOADS_MODEL_URI); such replicas load the model from the model cache of
+    their node (GET /models/<model_name>/deploy reports cache hits and misses).
+    '''
+    params = request.get_json(silent=True) or {}
+    try:
+        autoscaling = build_autoscaling_spec(params)
+        protocol = build_protocol_spec(params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    # outputText = template.render(data)
-    outputText = render_template("languageWrapper_template.jinja", data)
-    dep = yaml.safe_load(outputText)
+    model = mlflow.search_registered_models(filter_string=f"name='{model_name}'")
+    if not model:
+        return jsonify({"error": "Model not found"}), 404
+    latest_version = str(model[0].latest_versions[0].version)
+    model_version = str(params.get("version") or latest_version)
+    shadow_version = str(params["shadowVersion"]) if params.get("shadowVersion") else None
+    if shadow_version == model_version:
+        return jsonify({"error": "shadowVersion must be different from the deployed version"}), 400
+    mlflow_client = mlflow.MlflowClient()
+    for version in filter(None, [model_version, shadow_version]):
+        try:
+            mlflow_client.get_model_version(model_name, version)
+        except mlflow.exceptions.MlflowException:
+            return jsonify({"error": f"Version {version} of model {model_name} not found"}), 404
+    try:
+        validate_model_versions(model_version, latest_version, shadow_version)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    resources = derive_resource_requests(*get_model_size_and_latency(model_name, model_version))
+    shadow_resources = derive_resource_requests(*get_model_size_and_latency(model_name, shadow_version)) if shadow_version else None
+    # The trainer image pre-fetches the model version into the model cache of the node of each replica
+    prefetch_image = os.getenv("TRAINER_IMAGE") + ":" + os.getenv("TRAINER_TAG") if os.getenv("TRAINER_IMAGE") else None
+    data = build_deployment_data(
+        model_name, ip, port, autoscaling=autoscaling, resources=resources,
+        model_version=model_version, prefetch_image=prefetch_image, protocol=protocol,
+        shadow_version=shadow_version, shadow_resources=shadow_resources
+    )
+    dep = render_seldon_deployment(data)
 
     # config.load_kube_config()
 
@@ -261,6 +563,17 @@ def model_deploy(model_name):
 
     v1 = client.CustomObjectsApi()
 
+    # Adding or promoting a shadow version updates the live deployment
+    if search_deployment(model_name):
+        resp = v1.patch_namespaced_custom_object(
+            group="machinelearning.seldon.io",
+            version="v1",
+            plural="seldondeployments",
+            name=f"laredo-server-{model_name}",
+            body=dep,
+            namespace="laredo")
+        return jsonify(), 200
+
     resp = v1.create_namespaced_custom_object(
         group="machinelearning.seldon.io",
         version="v1",
@@ -270,6 +583,94 @@ def model_deploy(model_name):
 
     return jsonify(), 201
 
+@app.route("/models/<model_name>/deploy/shadow/compare", methods=["POST"])
+def compare_shadow_deployment(model_name):
+    '''
+    Compare the shadow predictor of a deployment with the main one.
+    Returns the latency quantiles of the live (mirrored) traffic of both predictors from Prometheus and,
+    if the request body has rows, replays them against both predictors and returns their latency
+    distributions and the rate of rows where their predictions disagree (REST deployments only, with the
+    Seldon or the V2 protocol).
+    Request body (optional):
+        rows: list of lists (model input rows), names: list of str (column names of the rows)
+        batchSize: int (rows per request, default 1), tolerance: float (relative, numeric predictions)
+        window: str (Prometheus range of the live latencies, default 15m)
+    '''
+    params = request.get_json(silent=True) or {}
+    rows = params.get("rows", [])
+    batch_size = params.get("batchSize", 1)
+    if not isinstance(rows, list) or not all(isinstance(row, list) for row in rows):
+        return jsonify({"error": "rows must be a list of rows (lists of values)"}), 400
+    if not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1:
+        return jsonify({"error": "batchSize must be an integer greater than 0"}), 400
+    window = params.get("window", "15m")
+    if not isinstance(window, str) or not LIVE_LATENCY_WINDOW_PATTERN.fullmatch(window):
+        return jsonify({"error": "window must be a duration such as 30s, 15m, 1h, 1d or 1w"}), 400
+
+    deployment = next(
+        (deployment for deployment in get_deployments() if deployment["metadata"]["name"] == f"laredo-server-{model_name}"),
+        None
+    )
+    if deployment is None:
+        return jsonify({"error": "Deployment not found"}), 404
+    if not any(predictor.get("shadow") for predictor in deployment["spec"]["predictors"]):
+        return jsonify({"error": f"Deployment of model {model_name} has no shadow predictor"}), 409
+
+    try:
+        urls = {
+            predictor: get_predictor_url(
+                model_name, predictor, deployment["spec"].get("protocol", "seldon"), deployment["spec"].get("transport", "rest")
+            )
+            for predictor in (MAIN_PREDICTOR, SHADOW_PREDICTOR)
+        } if rows else None
+    except ValueError as e:
+        return jsonify({"error": f"Rows can't be replayed: {e}"}), 400
+
+    response_data = {
+        "live": {
+            predictor: query_live_latency(PROMETHEUS_URL, model_name, predictor, window=window)
+            for predictor in (MAIN_PREDICTOR, SHADOW_PREDICTOR)
+        }
+    }
+    if rows:
+        try:
+            response_data["replay"] = replay(
+                rows,
+                urls[MAIN_PREDICTOR],
+                urls[SHADOW_PREDICTOR],
+                names=params.get("names"),
+                protocol=deployment["spec"].get("protocol", "seldon"),
+                batch_size=batch_size,
+                tolerance=params.get("tolerance", 1e-6),
+            )
+        except requests.RequestException as e:
+            return jsonify({"error": f"Failed to replay the rows: {e}"}), 502
+    return jsonify(response_data), 200
+
+@app.route("/models/<model_name>/deploy", methods=["GET"])
+def get_deployment_status(model_name):
+    '''
+    Get the status of the replicas of a deployment, with the model cache status (hit/miss) of each one
+    Args:
+        model_name: str
+    '''
+    try:
+        config.load_kube_config()
+    except config.config_exception.ConfigException:
+        try:
+            config.load_incluster_config()
+        except config.config_exception.ConfigException:
+            return jsonify({"error": "Failed to load both kube-config file and in-cluster configuration."}), 500
+
+    if not search_deployment(model_name):
+        return jsonify({"error": "Deployment not found"}), 404
+
+    pods = client.CoreV1Api().list_namespaced_pod(
+        namespace="laredo",
+        label_selector=f"seldon-deployment-id=laredo-server-{model_name}"
+    ).items
+    return jsonify(get_model_cache_status(pods)), 200
+
 @app.route("/models/<model_name>/deploy", methods=["DELETE"])
 def delete_deployment(model_name):
     '''
@@ -0,0 +1,315 @@
+'''
+Helpers to build and render the SeldonDeployment of a model.
+
+They don't talk to MLflow or Kubernetes, so the rendered specs can be tested without a cluster.
+'''
+import json
+import math
+import os
+
+import jinja2
+import yaml
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resources")
+DEPLOYMENT_TEMPLATE = "languageWrapper_template.jinja"
+
+# Prometheus queried by KEDA to scale on the request rate of a deployment
+PROMETHEUS_URL = os.getenv("PROMETHEUS_URL", "http://seldon-monitoring-prometheus.seldon-system.svc.cluster.local:9090")
+# CPU utilization target used when autoscaling is requested without any target
+DEFAULT_TARGET_CPU_UTILIZATION = 80
+
+# Resources of the model server container when the model artifact size and latency are unknown
+DEFAULT_CPU_MILLICORES = 500
+DEFAULT_MEMORY_MIB = 1024
+# Memory of the model server process without the model (python, mlflow, seldon wrapper)
+SERVER_BASE_MEMORY_MIB = 512
+# Loaded models take more memory than their serialized artifact
+ARTIFACT_MEMORY_FACTOR = 2
+# CPU request of a replica depending on the single row latency of the model (ms, millicores)
+LATENCY_CPU_TIERS = [(10, 250), (50, 500), (200, 1000)]
+MAX_CPU_MILLICORES = 2000
+
+# Directory of the nodes where the model server pods cache the models (see src/trainer/prefetch_model.py)
+MODEL_CACHE_PATH = os.getenv("MODEL_CACHE_PATH", "/var/cache/laredo-models")
+MODEL_PREFETCH_CONTAINER = "model-prefetch"
+
+# Image of the model server, which serves the Seldon protocol (REST and gRPC)
+MODEL_SERVER_IMAGE = os.getenv("MODEL_SERVER_IMAGE", "ghcr.io/dintenr/laredo-mlflow-model:0.0.1")
+# Image of a model server that serves the V2 / Open Inference Protocol, the default image can't
+MODEL_SERVER_V2_IMAGE = os.getenv("MODEL_SERVER_V2_IMAGE")
+# Whether the model server images load the model from their model_uri parameter. The default image ignores it
+# and loads the latest version of the model from MLflow, so without this capability a deployment can't pin a
+# version, deploy a shadow version or load the model from the model cache of its node
+MODEL_SERVER_LOADS_MODEL_URI = os.getenv("MODEL_SERVER_LOADS_MODEL_URI", "false").lower() == "true"
+
+# Protocols a model can be served with: Seldon protocol (REST or gRPC) or V2 / Open Inference Protocol,
+# which supports binary tensors in REST requests (needs MODEL_SERVER_V2_IMAGE)
+PROTOCOLS = {
+    "REST": {"protocol": "seldon", "transport": "rest", "endpoint_type": "REST"},
+    "GRPC": {"protocol": "seldon", "transport": "grpc", "endpoint_type": "GRPC"},
+    "V2": {"protocol": "v2", "transport": "rest", "endpoint_type": "REST"},
+}
+DEFAULT_PROTOCOL = "REST"
+
+# Predictors of a deployment, the shadow one only exists while a new version is compared with the live one
+MAIN_PREDICTOR = "example"
+SHADOW_PREDICTOR = "shadow"
+
+def render_template(template_name, data):
+    templateLoader = jinja2.FileSystemLoader(searchpath=TEMPLATES_PATH)
+    templateEnv = jinja2.Environment(loader=templateLoader)
+    template = templateEnv.get_template(template_name)
+    outputText = template.render(data)
+    return outputText
+
+def build_autoscaling_spec(params):
+    '''
+    Validates the autoscaling parameters of a deploy request.
+    Args:
+        params (dict): Request body. Supported keys:
+            minReplicas (int): Minimum number of replicas (default 1).
+            maxReplicas (int): Maximum number of replicas (default minReplicas).
+            targetCpuUtilization (int): Average CPU utilization (% of the request) to scale on.
+            targetRequestsPerSecond (float): Requests per second per replica to scale on.
+    Returns:
+        dict: The autoscaling spec. When minReplicas equals maxReplicas the deployment has that fixed number
+            of replicas and no scaling target.
+    Raises:
+        ValueError: If the parameters are not valid.
+    '''
+    min_replicas = params.get("minReplicas", 1)
+    max_replicas = params.get("maxReplicas", min_replicas)
+    target_cpu_utilization = params.get("targetCpuUtilization")
+    target_requests_per_second = params.get("targetRequestsPerSecond")
+
+    for name, value in (("minReplicas", min_replicas), ("maxReplicas", max_replicas)):
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"{name} must be an integer greater than 0")
+    if max_replicas < min_replicas:
+        raise ValueError("maxReplicas must be greater than or equal to minReplicas")
+    if target_cpu_utilization is not None and target_requests_per_second is not None:
+        raise ValueError("Only one of targetCpuUtilization and targetRequestsPerSecond can be set")
+    if target_cpu_utilization is not None and not (isinstance(target_cpu_utilization, int) and 0 < target_cpu_utilization <= 100):
+        raise ValueError("targetCpuUtilization must be an integer between 1 and 100")
+    if target_requests_per_second is not None and not (isinstance(target_requests_per_second, (int, float)) and target_requests_per_second > 0):
+        raise ValueError("targetRequestsPerSecond must be a number greater than 0")
+
+    if max_replicas == min_replicas:
+        if target_cpu_utilization is not None or target_requests_per_second is not None:
+            raise ValueError("A scaling target needs maxReplicas greater than minReplicas")
+        return {
+            "min_replicas": min_replicas,
+            "max_replicas": max_replicas,
+            "target_cpu_utilization": None,
+            "target_requests_per_second": None,
+        }
+    if target_requests_per_second is None and target_cpu_utilization is None:
+        target_cpu_utilization = DEFAULT_TARGET_CPU_UTILIZATION
+    return {
+        "min_replicas": min_replicas,
+        "max_replicas": max_replicas,
+        "target_cpu_utilization": target_cpu_utilization,
+        "target_requests_per_second": target_requests_per_second,
+    }
+
+def build_protocol_spec(params):
+    '''
+    Validates the protocol of a deploy request.
+    Args:
+        params (dict): Request body, with the optional key protocol (REST, GRPC or V2, case insensitive).
+    Returns:
+        dict: The protocol, transport and endpoint type of the deployment.
+    Raises:
+        ValueError: If the protocol is not supported.
+    '''
+    protocol = params.get("protocol", DEFAULT_PROTOCOL)
+    if not isinstance(protocol, str) or protocol.upper() not in PROTOCOLS:
+        raise ValueError(f"protocol must be one of: {list(PROTOCOLS.keys())}")
+    if protocol.upper() == "V2" and not MODEL_SERVER_V2_IMAGE:
+        raise ValueError("The V2 protocol needs a model server image that serves it (MODEL_SERVER_V2_IMAGE)")
+    return PROTOCOLS[protocol.upper()]
+
+def validate_model_versions(model_version, latest_version, shadow_version=None):
+    '''
+    Checks that the model server can serve the versions of a deploy request.
+    Without MODEL_SERVER_LOADS_MODEL_URI the server loads the latest version of the model, so only the latest
+    version can be deployed, without a shadow version.
+    Args:
+        model_version (str): Version of the main predictor.
+        latest_version (str): Latest version of the model.
+        shadow_version (str): Version of the shadow predictor, None if there is none.
+    Raises:
+        ValueError: If the server can't serve the versions.
+    '''
+    if MODEL_SERVER_LOADS_MODEL_URI:
+        return
+    if shadow_version is not None:
+        raise ValueError("Shadow versions need a model server that loads the model_uri parameter (MODEL_SERVER_LOADS_MODEL_URI)")
+    if model_version != latest_version:
+        raise ValueError(
+            f"The model server serves the latest version ({latest_version}): deploying another version needs a "
+            "model server that loads the model_uri parameter (MODEL_SERVER_LOADS_MODEL_URI)"
+        )
+
+def estimate_model_memory_mib(artifact_size_bytes=None):
+    '''
+    Estimates the memory of a process serving a model: the server base memory plus the loaded model.
+    Args:
+        artifact_size_bytes (int): Size of the logged model artifact, None if unknown.
+    Returns:
+        int: Memory in MiB, a multiple of 64Mi.
+    '''
+    if artifact_size_bytes is None:
+        return DEFAULT_MEMORY_MIB
+    memory_mib = SERVER_BASE_MEMORY_MIB + ARTIFACT_MEMORY_FACTOR * artifact_size_bytes / 2**20
+    # Round up to multiples of 64Mi
+    return int(math.ceil(memory_mib / 64) * 64)
+
+def derive_resource_requests(artifact_size_bytes=None, latency_ms=None):
+    '''
+    Derives the resources of a model server replica from its model.
+    Memory is the server base memory plus the loaded model, estimated from the artifact size.
+    CPU grows with the single row latency of the model, so slow models get enough CPU to serve
+    requests without throttling (CPU utilization targets are relative to this request).
+    Args:
+        artifact_size_bytes (int): Size of the logged model artifact, None if unknown.
+        latency_ms (float): Single row inference latency of the model, None if unknown.
+    Returns:
+        dict: Kubernetes resources (requests and limits) of the model server container.
+    '''
+    memory_mib = estimate_model_memory_mib(artifact_size_bytes)
+    if latency_ms is None:
+        cpu_millicores = DEFAULT_CPU_MILLICORES
+    else:
+        cpu_millicores = next(
+            (millicores for max_latency, millicores in LATENCY_CPU_TIERS if latency_ms <= max_latency),
+            MAX_CPU_MILLICORES
+        )
+
+    return {
+        "requests": {"cpu": f"{cpu_millicores}m", "memory": f"{memory_mib}Mi"},
+        "limits": {"memory": f"{2 * memory_mib}Mi"},
+    }
+
+def derive_batch_prediction_resources(workers, artifact_size_bytes=None):
+    '''
+    Derives the resources of a batch prediction job. Each worker process loads its own copy of the model,
+    so the job gets the memory of a model server replica and one CPU per worker. The CPU limit is the number
+    of workers, which is also what the job uses by default (see src/trainer/batch_predict.py).
+    Args:
+        workers (int): Number of worker processes of the job.
+        artifact_size_bytes (int): Size of the logged model artifact, None if unknown.
+    Returns:
+        dict: Kubernetes resources (requests and limits) of the job container.
+    '''
+    memory_mib = workers * estimate_model_memory_mib(artifact_size_bytes)
+    return {
+        "requests": {"cpu": str(workers), "memory": f"{memory_mib}Mi"},
+        "limits": {"cpu": str(workers), "memory": f"{2 * memory_mib}Mi"},
+    }
+
+def build_deployment_data(model_name, tracking_uri_ip, tracking_uri_port, autoscaling=None, resources=None,
+                          model_version=None, prefetch_image=None, protocol=None, shadow_version=None,
+                          shadow_resources=None):
+    '''
+    Builds the data rendered into the SeldonDeployment template.
+    When the model server loads the model_uri parameter (MODEL_SERVER_LOADS_MODEL_URI), each predictor gets the
+    uri of its version: with a prefetch image, the replicas get an init container that fetches the version into
+    the model cache of their node and the uri points there, otherwise it is the MLflow registry uri. Without it,
+    the server loads the latest version and model_version is only informative (see validate_model_versions).
+    When a shadow version is given, it is deployed as a shadow predictor, which receives a copy of the
+    traffic of the main predictor but whose responses are discarded, with its own resources (shadow_resources,
+    the resources of the main predictor if not given).
+    '''
+    protocol = protocol or PROTOCOLS[DEFAULT_PROTOCOL]
+    model_cache = None
+    if MODEL_SERVER_LOADS_MODEL_URI and model_version is not None and prefetch_image is not None:
+        model_cache = {"image": prefetch_image, "path": MODEL_CACHE_PATH}
+    predictors = [{"name": MAIN_PREDICTOR, "label": "v1", "model_version": model_version, "shadow": False, "resources": resources}]
+    if shadow_version is not None:
+        predictors.append({
+            "name": SHADOW_PREDICTOR, "label": "shadow", "model_version": shadow_version, "shadow": True,
+            "resources": shadow_resources or resources,
+        })
+    for predictor in predictors:
+        predictor["model_uri"] = None
+        if MODEL_SERVER_LOADS_MODEL_URI and predictor["model_version"] is not None:
+            predictor["model_uri"] = (
+                f"{MODEL_CACHE_PATH}/{model_name}/{predictor['model_version']}" if model_cache
+                else f"models:/{model_name}/{predictor['model_version']}"
+            )
+    return {
+        "deployment_name": model_name,
+        "model_name": model_name,
+        "model_version": model_version,
+        "model_cache": model_cache,
+        "predictors": predictors,
+        "replicas": autoscaling["min_replicas"] if autoscaling else 1,
+        "tracking_uri_ip": tracking_uri_ip,
+        "tracking_uri_port": tracking_uri_port,
+        "is_k8s": True,
+        # Fixed-size deployments have no HPA or KEDA spec
+        "autoscaling": autoscaling if autoscaling and autoscaling["max_replicas"] > autoscaling["min_replicas"] else None,
+        "prometheus_url": PROMETHEUS_URL,
+        "protocol": protocol,
+        "server_image": MODEL_SERVER_V2_IMAGE if protocol["protocol"] == "v2" else MODEL_SERVER_IMAGE,
+    }
+
+def get_predictor_url(model_name, predictor_name, protocol="seldon", transport="rest"):
+    '''
+    Returns the url of the REST prediction endpoint of a predictor, served by its Seldon service.
+    Args:
+        protocol (str): Protocol of the deployment (seldon or v2).
+        transport (str): Transport of the deployment, only rest endpoints have an url.
+    Raises:
+        ValueError: If the deployment doesn't serve REST requests.
+    '''
+    if transport != "rest":
+        raise ValueError(f"Deployments with {transport} transport have no REST prediction endpoint")
+    base_url = f"http://laredo-server-{model_name}-{predictor_name}.laredo.svc.cluster.local:8000"
+    if protocol == "v2":
+        # The V2 endpoint is named after the model of the graph
+        return f"{base_url}/v2/models/classifier/infer"
+    return f"{base_url}/api/v1.0/predictions"
+
+def render_seldon_deployment(data):
+    '''
+    Renders the SeldonDeployment template and returns it as a dict.
+    '''
+    return yaml.safe_load(render_template(DEPLOYMENT_TEMPLATE, data))
+
+def get_model_cache_status(pods):
+    '''
+    Reads the model cache status reported by the prefetch init container of each replica.
+    Args:
+        pods (list): Pods of the deployment (kubernetes.client.V1Pod).
+    Returns:
+        dict: Status of each replica (pod, node, phase, model_cache) and the number of cache hits and misses.
+    '''
+    replicas = []
+    for pod in pods:
+        model_cache = None
+        for status in pod.status.init_container_statuses or []:
+            if status.name != MODEL_PREFETCH_CONTAINER:
+                continue
+            terminated = status.state.terminated if status.state else None
+            if terminated is None:
+                model_cache = {"cache": "pending"}
+            elif terminated.exit_code != 0:
+                model_cache = {"cache": "failed", "reason": terminated.reason}
+            else:
+                try:
+                    model_cache = json.loads(terminated.message or "")
+                except ValueError:
+                    model_cache = {"cache": "unknown"}
+        replicas.append({
+            "pod": pod.metadata.name,
+            "node": pod.spec.node_name,
+            "phase": pod.status.phase,
+            "model_cache": model_cache,
+        })
+    return {
+        "replicas": replicas,
+        "cache_hits": sum(1 for replica in replicas if (replica["model_cache"] or {}).get("cache") == "hit"),
+        "cache_misses": sum(1 for replica in replicas if (replica["model_cache"] or {}).get("cache") == "miss"),
+    }
@@ -0,0 +1,167 @@
+'''
+Comparison of the main and shadow predictors of a deployment, to catch a slow or diverging model version
+before promoting it.
+
+Two sources are compared:
+    live: latency quantiles of the real (mirrored) traffic of each predictor, from the Seldon executor
+        metrics in Prometheus
+    replay: rows provided by the caller, sent to both predictors, which gives their latency distributions
+        and the rate of rows where their predictions disagree
+'''
+import re
+import time
+
+import numpy as np
+import requests
+
+LIVE_LATENCY_QUANTILES = [0.5, 0.95, 0.99]
+LIVE_LATENCY_QUERY = (
+    'histogram_quantile({quantile}, sum(rate(seldon_api_executor_client_requests_seconds_bucket'
+    '{{deployment_name="laredo-server-{model_name}",predictor_name="{predictor}",namespace="laredo"}}[{window}])) by (le))'
+)
+# Prometheus range of the live latencies (e.g. 15m), formatted into the query
+LIVE_LATENCY_WINDOW_PATTERN = re.compile(r"^\d+[smhdw]$")
+REQUEST_TIMEOUT_SECONDS = 30
+
+def latency_summary(latencies):
+    '''
+    Summarizes a list of latencies (ms).
+    '''
+    if not latencies:
+        return {"requests": 0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "mean_ms": float(np.mean(latencies)),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
+
+def build_payload(rows, names=None, protocol="seldon"):
+    '''
+    Builds the body of a prediction request with rows of the model input.
+    V2 requests have one input per column when the columns have names (pandas codec), one tensor otherwise.
+    Args:
+        rows (list): Rows (lists of values) of the model input.
+        names (list): Column names of the rows, None to send them without names.
+        protocol (str): seldon or v2.
+    '''
+    if protocol != "v2":
+        payload = {"data": {"ndarray": rows}}
+        if names:
+            payload["data"]["names"] = names
+        return payload
+
+    def datatype(values):
+        return "FP64" if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values) else "BYTES"
+
+    if names:
+        columns = [[row[i] for row in rows] for i in range(len(names))]
+        return {
+            "parameters": {"content_type": "pd"},
+            "inputs": [
+                {"name": name, "shape": [len(rows)], "datatype": datatype(column), "data": column}
+                for name, column in zip(names, columns)
+            ],
+        }
+    values = [value for row in rows for value in row]
+    return {"inputs": [{"name": "input-0", "shape": [len(rows), len(rows[0]) if rows else 0], "datatype": datatype(values), "data": values}]}
+
+def extract_predictions(response):
+    '''
+    Gets the predictions of a Seldon or V2 protocol response as an array with one row per input row.
+    '''
+    if "outputs" in response:
+        output = response["outputs"][0]
+        predictions = np.asarray(output["data"]).reshape(output["shape"])
+        return predictions.reshape(len(predictions), -1)
+    data = response["data"]
+    if "ndarray" in data:
+        predictions = np.asarray(data["ndarray"])
+    elif "tensor" in data:
+        predictions = np.asarray(data["tensor"]["values"]).reshape(data["tensor"]["shape"])
+    else:
+        raise ValueError(f"Unsupported response data: {list(data.keys())}")
+    return predictions.reshape(len(predictions), -1)
+
+def disagreement_rate(main_predictions, shadow_predictions, tolerance=1e-6):
+    '''
+    Fraction of rows where the predictions of the two predictors differ.
+    Numeric predictions are compared with a relative tolerance, the rest must be equal.
+    Args:
+        main_predictions (np.ndarray): Predictions of the main predictor, one row per input row.
+        shadow_predictions (np.ndarray): Predictions of the shadow predictor.
+        tolerance (float): Relative tolerance of numeric predictions.
+    Returns:
+        float: Disagreement rate, between 0 and 1.
+    '''
+    if main_predictions.shape != shadow_predictions.shape:
+        return 1.0
+    if len(main_predictions) == 0:
+        return 0.0
+    if np.issubdtype(main_predictions.dtype, np.number) and np.issubdtype(shadow_predictions.dtype, np.number):
+        agree = np.isclose(main_predictions, shadow_predictions, rtol=tolerance, atol=0).all(axis=1)
+    else:
+        agree = (main_predictions.astype(str) == shadow_predictions.astype(str)).all(axis=1)
+    return float(1 - agree.mean())
+
+def replay(rows, main_url, shadow_url, names=None, batch_size=1, tolerance=1e-6, protocol="seldon", post=requests.post):
+    '''
+    Sends rows to both predictors and compares their latencies and predictions.
+    Requests alternate which predictor is called first, so neither one benefits from warmer caches.
+    Args:
+        rows (list): Rows (lists of values) of the model input.
+        main_url (str): Prediction endpoint of the main predictor.
+        shadow_url (str): Prediction endpoint of the shadow predictor.
+        names (list): Column names of the rows, None to send them without names.
+        batch_size (int): Rows per request.
+        tolerance (float): Relative tolerance of numeric predictions.
+        protocol (str): Protocol of the predictors (seldon or v2).
+        post: Function sending the requests (requests.post).
+    Returns:
+        dict: Latency summary of each predictor, the shadow/main p50 latency ratio and the disagreement rate.
+    '''
+    latencies = {"main": [], "shadow": []}
+    predictions = {"main": [], "shadow": []}
+    urls = {"main": main_url, "shadow": shadow_url}
+    for request_index, start in enumerate(range(0, len(rows), batch_size)):
+        payload = build_payload(rows[start:start + batch_size], names, protocol)
+        order = ["main", "shadow"] if request_index % 2 == 0 else ["shadow", "main"]
+        for predictor in order:
+            request_start = time.perf_counter()
+            response = post(urls[predictor], json=payload, timeout=REQUEST_TIMEOUT_SECONDS)
+            latencies[predictor].append((time.perf_counter() - request_start) * 1000)
+            response.raise_for_status()
+            predictions[predictor].append(extract_predictions(response.json()))
+
+    main_summary, shadow_summary = latency_summary(latencies["main"]), latency_summary(latencies["shadow"])
+    main_predictions = np.concatenate(predictions["main"]) if rows else np.empty((0, 1))
+    shadow_predictions = np.concatenate(predictions["shadow"]) if rows else np.empty((0, 1))
+    return {
+        "rows": len(rows),
+        "main": main_summary,
+        "shadow": shadow_summary,
+        "p50_latency_ratio": shadow_summary["p50_ms"] / main_summary["p50_ms"] if rows and main_summary["p50_ms"] else None,
+        "disagreement_rate": disagreement_rate(main_predictions, shadow_predictions, tolerance),
+    }
+
+def query_live_latency(prometheus_url, model_name, predictor, window="15m", get=requests.get):
+    '''
+    Gets the latency quantiles (ms) of the traffic served by a predictor in the last window from Prometheus.
+    Returns:
+        dict: p50_ms, p95_ms and p99_ms (None when there was no traffic), or None if Prometheus can't be queried.
+    '''
+    summary = {}
+    for quantile in LIVE_LATENCY_QUANTILES:
+        query = LIVE_LATENCY_QUERY.format(quantile=quantile, model_name=model_name, predictor=predictor, window=window)
+        try:
+            response = get(f"{prometheus_url}/api/v1/query", params={"query": query}, timeout=REQUEST_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            result = response.json()["data"]["result"]
+        except (requests.RequestException, KeyError, ValueError) as e:
+            print(f"Could not query the live latency of predictor {predictor}: {e}")
+            return None
+        value = float(result[0]["value"][1]) * 1000 if result else None
+        summary[f"p{round(quantile * 100)}_ms"] = value if value is None or np.isfinite(value) else None
+    return summary
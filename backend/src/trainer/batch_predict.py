@@ -0,0 +1,308 @@
+'''
+Offline batch inference of a registered model.
+
+Runs as a Kubernetes Job with the trainer image (launched by POST /models/<name>/predict-batch). The input
+dataset (CSV) is streamed from S3 in chunks, so it never has to fit in memory, and the chunks are scored by a
+pool of worker processes. Each worker loads the model once, when it starts, and writes the predictions of
+each chunk as a Parquet part file, so results are not sent back to the main process. The number of chunks
+in flight is bounded, which bounds the memory of the job regardless of the size of the dataset.
+The progress (rows_scored, chunks_done) is logged as metrics of the job run, where the API reads it. The number
+of chunks is only known at the end (chunks_total), so it is estimated from the size of the dataset and of the
+first chunk (chunks_total_estimate) when the job starts.
+'''
+import io
+import json
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import boto3
+import mlflow
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 50000
+# Chunks read ahead of the workers (per worker), bounds the memory of the job
+PENDING_CHUNKS_PER_WORKER = 2
+PREDICTION_COLUMN = "prediction"
+# Workers when neither the params nor the CPU limit of the container give their number
+DEFAULT_WORKERS = 2
+
+# Model, model input columns and S3 client of each worker process, set by init_worker
+_model = None
+_input_columns = None
+_s3_client = None
+
+def get_s3_client():
+    return boto3.client(
+        "s3",
+        endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY")
+    )
+
+def get_default_workers():
+    '''
+    Number of workers of the job: the CPU limit of the container (cgroup v2 or v1), DEFAULT_WORKERS without limit.
+    os.cpu_count() is the CPU count of the node, not of the pod
+    '''
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as file:
+            quota, period = file.read().split()
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as quota_file, open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as period_file:
+                quota, period = quota_file.read().strip(), period_file.read().strip()
+        except OSError:
+            return DEFAULT_WORKERS
+    if quota in ("max", "-1"):
+        return DEFAULT_WORKERS
+    return max(1, int(int(quota) / int(period)))
+
+def split_s3_uri(uri):
+    '''
+    Split an s3://bucket/key uri into (bucket, key)
+    '''
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    return bucket, key
+
+def read_chunks(input_uri, chunk_size, s3_client=None):
+    '''
+    Read a CSV dataset in chunks, streaming it if it is in S3
+    Args:
+        input_uri: s3://bucket/key or local path
+        chunk_size: Rows per chunk
+        s3_client: boto3 S3 client, used for s3 uris
+    Returns:
+        Iterator of pd.DataFrame
+    '''
+    if input_uri.startswith("s3://"):
+        bucket, key = split_s3_uri(input_uri)
+        source = (s3_client or get_s3_client()).get_object(Bucket=bucket, Key=key)["Body"]
+    else:
+        source = input_uri
+    return pd.read_csv(source, chunksize=chunk_size)
+
+def get_input_size(input_uri, s3_client=None):
+    '''
+    Size in bytes of a dataset, in S3 or local, None if it can't be read
+    '''
+    try:
+        if input_uri.startswith("s3://"):
+            bucket, key = split_s3_uri(input_uri)
+            return (s3_client or get_s3_client()).head_object(Bucket=bucket, Key=key)["ContentLength"]
+        return os.path.getsize(input_uri)
+    except Exception as e:
+        print(f"Could not read the size of {input_uri}: {e}")
+        return None
+
+def estimate_total_chunks(chunks, input_size, on_estimate):
+    '''
+    Pass the chunks through, calling on_estimate with the estimated number of chunks once the first one is read:
+    the size of the dataset divided by the size of the first chunk as CSV
+    Args:
+        chunks: Iterable of pd.DataFrame
+        input_size: Size of the dataset in bytes, None to not estimate
+        on_estimate: Function called with the estimated number of chunks
+    Returns:
+        Iterator of pd.DataFrame
+    '''
+    for index, chunk in enumerate(chunks):
+        if index == 0 and input_size:
+            chunk_size = len(chunk.to_csv(index=False).encode("utf-8"))
+            on_estimate(max(1, math.ceil(input_size / chunk_size)))
+        yield chunk
+
+def write_part(df, output_uri, part_name):
+    '''
+    Write a part of the results as Parquet, to S3 or to a local directory
+    '''
+    if output_uri.startswith("s3://"):
+        bucket, prefix = split_s3_uri(output_uri)
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        _s3_client.put_object(Bucket=bucket, Key=prefix.rstrip("/") + "/" + part_name, Body=buffer.getvalue())
+    else:
+        path = os.path.join(output_uri, part_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_parquet(path, index=False)
+
+def get_input_columns(model):
+    '''
+    Columns of the model input: those of the model signature, or those of the InputDecoder of the wrapper
+    (models trained with AutoGluon), None if the model doesn't declare them
+    Args:
+        model: pyfunc model
+    Returns:
+        List of column names or None
+    '''
+    schema = model.metadata.get_input_schema()
+    if schema is not None and schema.has_input_names():
+        return schema.input_names()
+    try:
+        python_model = model.unwrap_python_model()
+    except Exception:
+        # Not a python_function model (e.g. a sklearn flavor)
+        return None
+    input_decoder = getattr(python_model, "input_decoder", None)
+    return list(input_decoder.columns) if input_decoder is not None else None
+
+def init_worker(model_uri, tracking_uri):
+    '''
+    Load the model once per worker process
+    '''
+    global _model, _input_columns, _s3_client
+    if tracking_uri:
+        mlflow.set_tracking_uri(tracking_uri)
+    _model = mlflow.pyfunc.load_model(model_uri)
+    _input_columns = get_input_columns(_model)
+    _s3_client = get_s3_client()
+
+def score_chunk(index, chunk, output_uri, keep_columns, partition_by):
+    '''
+    Score a chunk with the model of the worker and write its results. Only the model input columns are
+    predicted on, the other columns (ids, target, partition column...) are only copied to the results
+    Args:
+        index: Index of the chunk, used to name its part files
+        chunk: pd.DataFrame with the model input and possibly other columns
+        output_uri: s3://bucket/prefix or local directory
+        keep_columns: Input columns copied to the results, None for all of them
+        partition_by: Column the results are partitioned by (column=value/ directories), None to not partition.
+            It doesn't need to be in keep_columns
+    Returns:
+        Number of rows scored
+    '''
+    if _input_columns is None:
+        model_input = chunk
+    else:
+        missing = [column for column in _input_columns if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"The input dataset doesn't have the model input columns {missing}")
+        model_input = chunk[_input_columns]
+    predictions = _model.predict(model_input)
+    if isinstance(predictions, pd.DataFrame):
+        predictions = predictions.add_prefix(PREDICTION_COLUMN + "_").reset_index(drop=True)
+    else:
+        values = np.asarray(predictions).reshape(len(chunk), -1)
+        prediction_columns = [PREDICTION_COLUMN] if values.shape[1] == 1 else [f"{PREDICTION_COLUMN}_{i}" for i in range(values.shape[1])]
+        predictions = pd.DataFrame(values, columns=prediction_columns)
+    columns = list(chunk.columns) if keep_columns is None else list(keep_columns)
+    # The partition column is needed to split the results even when it isn't kept
+    if partition_by is not None and partition_by not in columns:
+        columns.append(partition_by)
+    results = pd.concat([chunk[columns].reset_index(drop=True), predictions], axis=1)
+
+    part_name = f"part-{index:05d}.parquet"
+    if partition_by is None:
+        write_part(results, output_uri, part_name)
+    else:
+        for value, partition in results.groupby(partition_by, dropna=False):
+            write_part(partition.drop(columns=[partition_by]), output_uri, f"{partition_by}={value}/{part_name}")
+    return len(chunk)
+
+def predict_batch(chunks, model_uri, output_uri, workers, keep_columns=None, partition_by=None,
+                  tracking_uri=None, on_progress=None):
+    '''
+    Score chunks in a pool of worker processes, with at most PENDING_CHUNKS_PER_WORKER chunks per worker in flight
+    Args:
+        chunks: Iterable of pd.DataFrame
+        model_uri: Uri of the pyfunc model loaded by the workers
+        output_uri: s3://bucket/prefix or local directory of the results
+        workers: Number of worker processes
+        keep_columns: Input columns copied to the results, None for all of them
+        partition_by: Column the results are partitioned by, None to not partition
+        tracking_uri: MLflow tracking uri of the workers
+        on_progress: Function called with (rows_scored, chunks_done) each time a chunk is done
+    Returns:
+        Tuple (rows scored, chunks scored)
+    '''
+    progress = {"rows_scored": 0, "chunks_done": 0}
+    def collect(done):
+        for future in done:
+            progress["rows_scored"] += future.result()
+            progress["chunks_done"] += 1
+            if on_progress:
+                on_progress(progress["rows_scored"], progress["chunks_done"])
+
+    max_pending = workers * PENDING_CHUNKS_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model_uri, tracking_uri)) as executor:
+        pending = set()
+        for index, chunk in enumerate(chunks):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(score_chunk, index, chunk, output_uri, keep_columns, partition_by))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    return progress["rows_scored"], progress["chunks_done"]
+
+def run_batch_prediction(run_id, model_name, model_version, params, tracking_uri=None):
+    '''
+    Score a dataset of S3 with a registered model version and log the progress and results to the job run
+    Args:
+        run_id: Run id of the job, created by the API
+        model_name: str
+        model_version: str
+        params: Dict with the keys inputURI, outputURI and the optional keys chunkSize, workers,
+            keepColumns and partitionBy
+        tracking_uri: MLflow tracking uri of the workers
+    '''
+    chunk_size = params.get("chunkSize", DEFAULT_CHUNK_SIZE)
+    workers = params.get("workers") or get_default_workers()
+    if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+        raise ValueError(f"workers must be a positive integer, got {workers!r}")
+    mlflow_client = mlflow.MlflowClient()
+    for key, value in {
+        "model_name": model_name, "model_version": model_version, "input_uri": params["inputURI"],
+        "output_uri": params["outputURI"], "chunk_size": chunk_size, "workers": workers,
+    }.items():
+        mlflow_client.log_param(run_id, key, value)
+
+    start = time.perf_counter()
+    def log_progress(rows_scored, chunks_done):
+        mlflow_client.log_metric(run_id, "rows_scored", rows_scored, step=chunks_done)
+        mlflow_client.log_metric(run_id, "chunks_done", chunks_done, step=chunks_done)
+
+    chunks = estimate_total_chunks(
+        read_chunks(params["inputURI"], chunk_size),
+        get_input_size(params["inputURI"]),
+        lambda estimate: mlflow_client.log_metric(run_id, "chunks_total_estimate", estimate),
+    )
+    rows_scored, chunks_done = predict_batch(
+        chunks,
+        f"models:/{model_name}/{model_version}",
+        params["outputURI"],
+        workers,
+        keep_columns=params.get("keepColumns"),
+        partition_by=params.get("partitionBy"),
+        tracking_uri=tracking_uri,
+        on_progress=log_progress,
+    )
+    elapsed = time.perf_counter() - start
+    mlflow_client.log_metric(run_id, "chunks_total", chunks_done)
+    mlflow_client.log_metric(run_id, "rows_per_sec", rows_scored / elapsed if elapsed else 0)
+    mlflow_client.set_terminated(run_id, "FINISHED")
+    print(f"Scored {rows_scored} rows in {chunks_done} chunks ({elapsed:.1f}s), results in {params['outputURI']}") # Debugging line
+
+
+def main():
+    # Set mlflow tracking uri from environment variables
+    ip = os.environ['TRACKING_URI_IP']
+    port = os.environ['TRACKING_URI_PORT']
+    tracking_uri = f"http://{ip}:{port}"
+    mlflow.set_tracking_uri(tracking_uri)
+    # Read params from environment variables
+    run_id = os.environ.get("RUN_ID")
+    model_name = os.environ.get("MODEL_NAME")
+    model_version = os.environ.get("MODEL_VERSION")
+    params = json.loads(os.environ.get("PARAMS", "{}"))
+    try:
+        run_batch_prediction(run_id, model_name, model_version, params, tracking_uri=tracking_uri)
+    except Exception:
+        mlflow.MlflowClient().set_terminated(run_id, "FAILED")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+'''
+Latency and throughput benchmark of a registered model.
+
+Runs as a Kubernetes Job with the trainer image (launched by POST /models/<name>/benchmark), so the
+model is loaded in its own pod with the frameworks it needs, and never in the API process. Synthetic
+rows are generated from the schema of the dataset the model was trained on, and the pyfunc model
+predicts batches of several sizes. The latency percentiles and rows/sec of each batch size are logged
+as metrics of the benchmark run and as tags of the model version, where the deploy sizing reads them.
+'''
+import json
+import os
+import time
+
+import mlflow
+import numpy as np
+import pandas as pd
+
+DEFAULT_BATCH_SIZES = [1, 8, 32, 128]
+DEFAULT_ITERATIONS = 50
+WARMUP_ITERATIONS = 3
+# Model version tags are named "benchmark.<metric>"
+BENCHMARK_TAG_PREFIX = "benchmark."
+# Number of distinct values of the synthetic string columns
+STRING_CARDINALITY = 5
+
+def get_input_schema(mlflow_client, model_version):
+    '''
+    Get the input columns of a model version from the schema of its logged training dataset,
+    or from the model signature if the run has no dataset.
+    Args:
+        mlflow_client: mlflow.MlflowClient
+        model_version: mlflow.entities.model_registry.ModelVersion
+    Returns:
+        List of column specs ({"name": str, "type": str})
+    '''
+    dataset_inputs = mlflow_client.get_run(model_version.run_id).inputs.dataset_inputs
+    train_inputs = [
+        dataset_input for dataset_input in dataset_inputs
+        if any(tag.key == "mlflow.data.context" and tag.value == "train" for tag in dataset_input.tags)
+    ]
+    for dataset_input in train_inputs + dataset_inputs:
+        if dataset_input.dataset.schema:
+            return json.loads(dataset_input.dataset.schema)["mlflow_colspec"]
+
+    signature = mlflow.models.get_model_info(f"models:/{model_version.name}/{model_version.version}").signature
+    if signature is None or signature.inputs is None:
+        raise ValueError(f"Model {model_version.name} version {model_version.version} has no dataset schema nor signature")
+    return signature.inputs.to_dict()
+
+def synthetic_rows(columns, n_rows, seed=0):
+    '''
+    Generate random rows following a column schema.
+    Args:
+        columns: List of column specs ({"name": str, "type": str}), with mlflow types
+        n_rows: int
+        seed: int
+    Returns:
+        pd.DataFrame with n_rows rows
+    '''
+    rng = np.random.default_rng(seed)
+    data = {}
+    for column in columns:
+        name, column_type = column["name"], column["type"]
+        if column_type == "boolean":
+            data[name] = rng.integers(0, 2, n_rows).astype(bool)
+        elif column_type == "integer":
+            data[name] = rng.integers(0, 100, n_rows).astype(np.int32)
+        elif column_type == "long":
+            data[name] = rng.integers(0, 100, n_rows).astype(np.int64)
+        elif column_type == "float":
+            data[name] = rng.normal(size=n_rows).astype(np.float32)
+        elif column_type == "double":
+            data[name] = rng.normal(size=n_rows)
+        elif column_type == "string":
+            data[name] = np.array([f"value_{i}" for i in rng.integers(0, STRING_CARDINALITY, n_rows)], dtype=object)
+        elif column_type == "datetime":
+            data[name] = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n_rows), unit="D")
+        elif column_type == "binary":
+            data[name] = [rng.bytes(8) for _ in range(n_rows)]
+        else:
+            raise ValueError(f"Unsupported column type '{column_type}' of column '{name}'")
+    return pd.DataFrame(data, columns=[column["name"] for column in columns])
+
+def measure_latencies(predict, batch, iterations, warmup=WARMUP_ITERATIONS):
+    '''
+    Measure the latency of predicting a batch.
+    Args:
+        predict: Prediction function
+        batch: Model input
+        iterations: Number of measured predictions
+        warmup: Number of predictions discarded before measuring (lazy initialization, caches)
+    Returns:
+        List of latencies in ms
+    '''
+    for _ in range(warmup):
+        predict(batch)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        predict(batch)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def summarize_latencies(latencies, batch_size):
+    '''
+    Get the latency percentiles and throughput of the predictions of a batch size.
+    Args:
+        latencies: List of latencies in ms
+        batch_size: int
+    Returns:
+        Dict of metrics, suffixed with the batch size
+    '''
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        f"latency_p50_ms_batch_{batch_size}": float(p50),
+        f"latency_p95_ms_batch_{batch_size}": float(p95),
+        f"latency_p99_ms_batch_{batch_size}": float(p99),
+        f"rows_per_sec_batch_{batch_size}": float(batch_size * 1000 * len(latencies) / sum(latencies)),
+    }
+
+def run_benchmark(predict, rows, batch_sizes, iterations):
+    '''
+    Measure the latency and throughput of a prediction function at several batch sizes.
+    Single row latency (batch size 1) is always measured, as it is used to size deployments.
+    Args:
+        predict: Prediction function
+        rows: pd.DataFrame with at least max(batch_sizes) rows
+        batch_sizes: List of batch sizes
+        iterations: Number of measured predictions per batch size
+    Returns:
+        Dict of metrics
+    '''
+    metrics = {}
+    for batch_size in sorted(set([1] + list(batch_sizes))):
+        latencies = measure_latencies(predict, rows.iloc[:batch_size], iterations)
+        metrics.update(summarize_latencies(latencies, batch_size))
+    return metrics
+
+def benchmark_model(run_id, model_name, model_version, params):
+    '''
+    Benchmark a registered model version, log the results to the benchmark run and tag the model version with them.
+    Args:
+        run_id: Benchmark run id, created by the API
+        model_name: str
+        model_version: str
+        params: Dict with the optional keys batchSizes (list of int) and iterations (int)
+    Returns:
+        Dict of metrics
+    '''
+    batch_sizes = params.get("batchSizes", DEFAULT_BATCH_SIZES)
+    iterations = params.get("iterations", DEFAULT_ITERATIONS)
+    mlflow_client = mlflow.MlflowClient()
+    version = mlflow_client.get_model_version(model_name, model_version)
+
+    columns = get_input_schema(mlflow_client, version)
+    rows = synthetic_rows(columns, max(batch_sizes + [1]))
+
+    start = time.perf_counter()
+    model = mlflow.pyfunc.load_model(f"models:/{model_name}/{model_version}")
+    load_seconds = time.perf_counter() - start
+
+    metrics = run_benchmark(model.predict, rows, batch_sizes, iterations)
+    metrics["model_load_seconds"] = load_seconds
+
+    with mlflow.start_run(run_id=run_id):
+        mlflow.set_tags({"benchmarked_model": model_name, "benchmarked_version": model_version})
+        mlflow.log_params({"batch_sizes": batch_sizes, "iterations": iterations, "n_columns": len(columns)})
+        mlflow.log_metrics(metrics)
+
+    for key, value in metrics.items():
+        mlflow_client.set_model_version_tag(model_name, model_version, BENCHMARK_TAG_PREFIX + key, f"{value:.4f}")
+    mlflow_client.set_model_version_tag(model_name, model_version, BENCHMARK_TAG_PREFIX + "run_id", run_id)
+    print(f"Benchmark of model {model_name} version {model_version}: {metrics}") # Debugging line
+    return metrics
+
+
+def main():
+    # Set mlflow tracking uri from environment variables
+    ip = os.environ['TRACKING_URI_IP']
+    port = os.environ['TRACKING_URI_PORT']
+    mlflow.set_tracking_uri(f"http://{ip}:{port}")
+    # Read params from environment variables
+    run_id = os.environ.get("RUN_ID")
+    model_name = os.environ.get("MODEL_NAME")
+    model_version = os.environ.get("MODEL_VERSION")
+    params = json.loads(os.environ.get("PARAMS", "{}"))
+    benchmark_model(run_id, model_name, model_version, params)
+
+if __name__ == "__main__":
+    main()
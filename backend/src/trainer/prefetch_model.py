@@ -0,0 +1,116 @@
+'''
+Pre-fetch of a registered model version into the model cache of a node.
+
+Runs as the init container of the model server pods (see languageWrapper_template.jinja), with the cache
+directory mounted from the node, so the model is downloaded from MLflow once per node and version, and the
+replicas scheduled on that node afterwards load it from local disk. Cached models are stored in
+<cache>/<model_name>/<version>-<digest>, where the digest is the sha256 of the MLmodel file, so a version
+whose artifacts changed is never served from a stale cache. <cache>/<model_name>/<version> is a symlink to
+the current one, which is the path loaded by the model server.
+
+Downloads go to a temporary directory renamed into place once complete, so concurrent pods on the same node
+never see a partial model. Whether the model was in the cache (hit or miss) is written to the termination
+message of the container, where the API reads it (GET /models/<name>/deploy).
+'''
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import mlflow
+
+DEFAULT_CACHE_DIR = "/var/cache/laredo-models"
+TERMINATION_MESSAGE_PATH = "/dev/termination-log"
+DIGEST_LENGTH = 16
+
+def get_model_digest(model_version):
+    '''
+    Get the sha256 of the MLmodel file of a model version
+    Args:
+        model_version: mlflow.entities.model_registry.ModelVersion
+    Returns:
+        Hex digest, truncated to DIGEST_LENGTH characters
+    '''
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = mlflow.artifacts.download_artifacts(artifact_uri=model_version.source.rstrip("/") + "/MLmodel", dst_path=tmp_dir)
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:DIGEST_LENGTH]
+
+def point_link(link_path, target):
+    '''
+    Atomically make link_path a symlink to target
+    '''
+    tmp_link = f"{link_path}.{os.getpid()}.tmp"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(target, tmp_link)
+    os.replace(tmp_link, link_path)
+
+def fetch_into_cache(model_uri, model_dir, download):
+    '''
+    Download a model into the cache, unless it is already there
+    Args:
+        model_uri: Uri of the model
+        model_dir: Cache directory of the model version and digest
+        download: Function downloading an artifact uri into a directory and returning its local path
+            (mlflow.artifacts.download_artifacts)
+    Returns:
+        "hit" if the model was in the cache, "miss" if it was downloaded
+    '''
+    if os.path.isdir(model_dir):
+        return "hit"
+    parent_dir = os.path.dirname(model_dir)
+    os.makedirs(parent_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".download-", dir=parent_dir)
+    try:
+        local_path = download(artifact_uri=model_uri, dst_path=tmp_dir)
+        try:
+            os.rename(local_path, model_dir)
+        except OSError:
+            # Another pod of the node cached it while downloading
+            if not os.path.isdir(model_dir):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return "miss"
+
+def prefetch_model(model_name, model_version, cache_dir=DEFAULT_CACHE_DIR):
+    '''
+    Pre-fetch a registered model version into the cache
+    Args:
+        model_name: str
+        model_version: str
+        cache_dir: Cache directory of the node
+    Returns:
+        Dict with the cache status (hit/miss), the path of the model and the digest
+    '''
+    start = time.perf_counter()
+    version = mlflow.MlflowClient().get_model_version(model_name, model_version)
+    digest = get_model_digest(version)
+    model_dir = os.path.join(cache_dir, model_name, f"{model_version}-{digest}")
+
+    cache = fetch_into_cache(f"models:/{model_name}/{model_version}", model_dir, mlflow.artifacts.download_artifacts)
+    link_path = os.path.join(cache_dir, model_name, str(model_version))
+    point_link(link_path, os.path.basename(model_dir))
+    return {
+        "cache": cache,
+        "path": link_path,
+        "digest": digest,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+def main():
+    # Set mlflow tracking uri from environment variables
+    ip = os.environ['TRACKING_URI_IP']
+    port = os.environ['TRACKING_URI_PORT']
+    mlflow.set_tracking_uri(f"http://{ip}:{port}")
+    result = prefetch_model(os.environ["MODEL_NAME"], os.environ["MODEL_VERSION"], os.environ.get("CACHE_DIR", DEFAULT_CACHE_DIR))
+    print(f"Model cache {result['cache']}: {result['path']} ({result['seconds']}s)") # Debugging line
+    if os.path.isdir(os.path.dirname(TERMINATION_MESSAGE_PATH)):
+        with open(TERMINATION_MESSAGE_PATH, "w") as f:
+            json.dump(result, f)
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,19 @@
 import os
 import json
 
+import mlflow
 from flask import jsonify
 
-from src.utils.creation_types import *
-from src.utils.model_strategies import *
-from src.utils.preprocessing_strategy import *
-
-CREATION_TYPE = {
-    "BASIC": ModelBasicCreation,
-    "ADVANCED": ModelAdvancedCreation
-}
+from src.utils.strategy_registry import CREATION_TYPES, get_creation_type
 
 def train_model(run_id: str, type_str: str, params: dict):
-    model_creation_type = CREATION_TYPE.get(type_str.upper())
+    # Creation types (and the frameworks they use) are imported lazily by the registry
+    model_creation_type = get_creation_type(type_str)
     if model_creation_type is None:
         # Set run status to failed in mlflow
         mlflow.set_tag("mlflow.runStatus", "FAILED")
         return jsonify({
-            "error": f"Invalid creation type '{type_str}'. Must be one of: {list(CREATION_TYPE.keys())}" 
+            "error": f"Invalid creation type '{type_str}'. Must be one of: {list(CREATION_TYPES.keys())}" 
         }), 400
     print(f"Received request to create model with type '{type_str}' and params: {params}") # Debugging line
     model_creator = model_creation_type(run_id=run_id, **params)
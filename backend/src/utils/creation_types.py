@@ -4,8 +4,9 @@ import os
 
 import boto3
 from src.utils.utils import *
-from src.utils.preprocessing_strategy import *
-from src.utils.model_strategies import *
+from src.utils.input_decoder import InputDecoder
+from src.utils.micro_batching import DEFAULT_MAX_WAIT_MS
+from src.utils.strategy_registry import get_model_strategy, get_preprocessing_strategy
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
@@ -13,8 +14,15 @@ from sklearn.pipeline import Pipeline
 from sklearn.base import estimator_html_repr, clone
 from sklearn.metrics import f1_score, mean_squared_error, recall_score, silhouette_score, r2_score, accuracy_score
 from sklearn.model_selection import train_test_split
-from autogluon.tabular import TabularDataset, TabularPredictor
 import mlflow
+import numpy as np
+
+# Classes of a label encoded target, logged with the models trained on it so that retraining encodes
+# the new labels with the same codes
+LABEL_CLASSES_ARTIFACT = "label_classes.json"
+# Run tag with the preprocessing steps fitted before the logged estimator (comma separated, empty if none).
+# Only the estimator is logged, so models trained on preprocessed features can't be retrained on raw data
+PREPROCESSING_TAG = "preprocessing_steps"
 
 class ModelCreation():
     required_parameters = []
@@ -56,6 +64,38 @@ class ModelCreation():
     def create(self):
         pass
 
+    def get_micro_batching_config(self):
+        '''
+        Micro-batching config of the logged model wrapper, from the optional parameters of the request:
+        - microBatchSize: maximum number of rows predicted together (micro-batching is enabled if it is greater than 1).
+        - microBatchWaitMs: maximum time a request waits for other requests to be batched with.
+        Returns:
+            dict or None: The config, None if micro-batching is disabled.
+        '''
+        max_batch_size = getattr(self, 'microBatchSize', None)
+        if not max_batch_size or max_batch_size <= 1:
+            return None
+        config = {
+            "max_batch_size": int(max_batch_size),
+            "max_wait_ms": float(getattr(self, 'microBatchWaitMs', DEFAULT_MAX_WAIT_MS)),
+        }
+        mlflow.log_params({"micro_batch_size": config["max_batch_size"], "micro_batch_wait_ms": config["max_wait_ms"]})
+        return config
+
+    def get_input_decoder(self):
+        '''
+        Input decoder of the logged model wrapper, compiled from the column types of the request without the target,
+        if the optional parameter enforceInputSchema is set. The decoder enforces the training schema on each request,
+        on top of the DataFrame built by the model server, so it is not attached by default.
+        Returns:
+            InputDecoder or None: The decoder, None to pass the requests to the model as they are.
+        '''
+        if not getattr(self, 'enforceInputSchema', False):
+            return None
+        input_decoder = InputDecoder.from_columns_data_type(self.columnsDataType, self.target)
+        mlflow.log_param("enforce_input_schema", True)
+        return input_decoder
+
     def get_metrics(self, problem_type, x_test, y_test, predictions):
         metrics = {}
         if problem_type == "classifier":
@@ -102,6 +142,8 @@ class ModelBasicCreation(ModelCreation):
 
         x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2) 
 
+        # Imported here so that only AutoGluon jobs pay its import time
+        from autogluon.tabular import TabularDataset, TabularPredictor
         predictor = TabularPredictor(
             label=self.target,
             problem_type=self.problemType,
@@ -125,6 +167,7 @@ class ModelBasicCreation(ModelCreation):
                 presets=self.preset,
                 time_limit=self.timeLimit
             )
+            self.slim_predictor(model, x_test)
             algorithm = model._trainer.model_best
             parameters_value = model._trainer.load_model(algorithm).get_params()
             predictions = model.predict(x_test)
@@ -133,12 +176,68 @@ class ModelBasicCreation(ModelCreation):
             mlflow.log_params(parameters_value)
             metrics = self.get_metrics(self.problemType, x_test, y_test, predictions)
             mlflow.log_metrics(metrics)
-            mlflow.pyfunc.log_model(python_model=AutogluonModelMlflowWrapper(model), artifact_path="model", registered_model_name=self.modelName)
-            pipeline = autogluon_stack_to_sklearn_voting_classifier(model)
+            input_decoder = self.get_input_decoder()
+            mlflow.pyfunc.log_model(
+                python_model=AutogluonModelMlflowWrapper(
+                    model, micro_batching=self.get_micro_batching_config(), input_decoder=input_decoder
+                ),
+                artifact_path="model", registered_model_name=self.modelName
+            )
+            if input_decoder is not None:
+                mlflow.log_dict(input_decoder.to_dict(), "model/input_decoder.json")
+            pipeline = autogluon_metadata_to_sklearn_diagram(model, name=algorithm)
             mlflow.log_text(estimator_html_repr(pipeline), "estimator.html")
         
         return metrics
 
+    def slim_predictor(self, predictor, x_test):
+        '''
+        Reduces the size of the fitted predictor before it is logged, according to the optional
+        parameters of the request:
+        - distill: distills the ensemble into single models and uses the best of them.
+        - refitFull: refits the best model on all the data, collapsing its bagged folds into one model.
+        - keepBestOnly: deletes every model that is not the best one or one of its dependencies.
+        - saveSpace: deletes the files that are not needed for prediction.
+        When an option is set, the artifact size and single row inference latency are logged before and after
+        slimming. Without options the predictor is left as is and nothing is measured.
+        Args:
+            predictor (TabularPredictor): The fitted predictor, modified in place.
+            x_test (pd.DataFrame): Data used to measure the inference latency.
+        '''
+        distill = getattr(self, 'distill', False)
+        refit_full = getattr(self, 'refitFull', False)
+        keep_best_only = getattr(self, 'keepBestOnly', False)
+        save_space = getattr(self, 'saveSpace', False)
+        if not (distill or refit_full or keep_best_only or save_space):
+            return predictor
+
+        metrics = {
+            "artifact_size_mb_before_slimming": get_directory_size(predictor.path) / 2**20,
+            "inference_latency_ms_before_slimming": measure_predict_latency(predictor.predict, x_test.iloc[:1])
+        }
+
+        if distill:
+            distilled_models = predictor.distill(time_limit=getattr(self, 'distillTimeLimit', None))
+            leaderboard = predictor.leaderboard(silent=True)
+            leaderboard = leaderboard[leaderboard["model"].isin(distilled_models)]
+            if not leaderboard.empty:
+                predictor.set_model_best(leaderboard.sort_values("score_val", ascending=False)["model"].iloc[0])
+        if refit_full:
+            predictor.refit_full(model="best", set_best_to_refit_full=True)
+        if keep_best_only:
+            predictor.delete_models(models_to_keep=predictor.model_best, dry_run=False)
+        if save_space:
+            predictor.save_space()
+
+        metrics["artifact_size_mb"] = get_directory_size(predictor.path) / 2**20
+        metrics["inference_latency_ms"] = measure_predict_latency(predictor.predict, x_test.iloc[:1])
+        mlflow.log_params({
+            "distill": distill, "refit_full": refit_full,
+            "keep_best_only": keep_best_only, "save_space": save_space
+        })
+        mlflow.log_metrics(metrics)
+        return predictor
+
 
     def get_metrics(self, problem_type, x_test, y_test, predictions):
         metrics = {}
@@ -208,6 +307,7 @@ class ModelAdvancedCreation(ModelCreation):
         # dataset = pd.DataFrame.from_dict(self.datasetJSON)
         dataset = dataset.astype(self.columnsDataType)
         is_time_series = False
+        label_encoder = None
         if dataset[self.target].dtype == "object":
             label_encoder = LabelEncoder()
             dataset[self.target] = label_encoder.fit_transform(dataset[self.target])
@@ -231,7 +331,7 @@ class ModelAdvancedCreation(ModelCreation):
             if method == 'drop':
                 cols_to_drop = method_data.get('params', {}).get('columns', [])
             strategy_name = preprocessing_methods[method]['strategy']
-            strategy_class = globals().get(strategy_name) 
+            strategy_class = get_preprocessing_strategy(strategy_name)
             if strategy_class != None:
                 if 'params' in method_data:
                     step = strategy_class().get_step(method_data['params'])
@@ -252,7 +352,7 @@ class ModelAdvancedCreation(ModelCreation):
             dataset = dataset.sort_values(by=[time_series_group_column, time_series_time_column])
             # Create transformer for sliding window
             strategy_name = preprocessing_methods[time_series_method]['strategy']
-            strategy_class = globals().get(strategy_name) 
+            strategy_class = get_preprocessing_strategy(strategy_name)
             if strategy_class != None:
                 if 'params' in time_series_method_data:
                     step = strategy_class().get_step(time_series_method_data['params'])
@@ -265,11 +365,13 @@ class ModelAdvancedCreation(ModelCreation):
         y = dataset[self.target]
         x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2, shuffle= (not is_time_series))
 
-        strategy_class = globals().get(self.strategy)
+        strategy_class = get_model_strategy(self.strategy)
         if strategy_class is None:
             raise ValidationError(message="Invalid strategy", status_code=409)
         
         with mlflow.start_run(run_id=self.run_id):
+            if label_encoder is not None:
+                mlflow.log_dict({"classes": label_encoder.classes_.tolist()}, LABEL_CLASSES_ARTIFACT)
 
             x_train_mlflow = mlflow.data.from_pandas(x_train)
             x_test_mlflow = mlflow.data.from_pandas(x_test)
@@ -311,6 +413,7 @@ class ModelAdvancedCreation(ModelCreation):
             model = strategy_class().create_model(parameters_value)
 
             print(parameters_value)
+            mlflow.set_tag(PREPROCESSING_TAG, ",".join(name for name, _ in steps))
             steps.append(("model", model))
             pipeline = Pipeline(steps)   
 
@@ -325,4 +428,225 @@ class ModelAdvancedCreation(ModelCreation):
             printable_pipeline = get_printable_pytorch_pipeline(pipeline) if (self.implementation == 'pytorch') else pipeline
             mlflow.log_text(estimator_html_repr(printable_pipeline), "estimator.html")
             
-        return metrics
\ No newline at end of file
+        return metrics
+
+class ModelRetrainCreation(ModelCreation):
+    '''
+    Continues the training of the latest version of a registered model with new data only,
+    using the incremental mechanism supported by each kind of model:
+    - Random forests: warm_start, adding new trees fitted on the new data.
+    - Neural networks (skorch): partial_fit, training more epochs on the new data.
+    - AutoGluon predictors: refit_full, using the new data as extra training rows.
+    The result is registered as a new version of the same model, with tags pointing to
+    the version and run it was trained from. Only the estimator of ADVANCED models is logged,
+    so versions trained after preprocessing steps are not retrained.
+    '''
+    required_params = [
+        'modelName', 'problemType', 'datasetURL', 'columnsDataType', 'target'
+    ]
+    # Default number of trees added to a forest in each retraining
+    additional_estimators = 50
+    # Default number of epochs trained with partial_fit on neural networks
+    additional_epochs = 5
+
+    def get_latest_model_version(self, client):
+        versions = client.search_model_versions(f"name='{self.modelName}'")
+        if not versions:
+            raise ValidationError(message=f"Model '{self.modelName}' not found", status_code=404)
+        return max(versions, key=lambda version: int(version.version))
+
+    def create(self):
+        client = mlflow.MlflowClient()
+        previous_version = self.get_latest_model_version(client)
+        model_uri = f"models:/{self.modelName}/{previous_version.version}"
+        flavors = mlflow.models.get_model_info(model_uri).flavors
+
+        dataset = self.get_dataset_from_s3(self.datasetURL)
+        dataset = dataset.astype(self.columnsDataType)
+        if "sklearn" in flavors:
+            self.check_no_preprocessing(client, previous_version)
+        else:
+            self.check_not_slimmed(client, previous_version)
+        label_classes = None
+        if "sklearn" in flavors and dataset[self.target].dtype == "object":
+            label_classes = self.get_label_classes(previous_version)
+            dataset[self.target] = self.encode_labels(dataset[self.target], label_classes)
+
+        x = dataset.drop(columns=[self.target])
+        y = dataset[self.target]
+        x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.2)
+
+        with mlflow.start_run(run_id=self.run_id):
+            # Lineage with the version (and run) the new model is trained from
+            mlflow.set_tags({
+                "retrained_from_model": self.modelName,
+                "retrained_from_version": previous_version.version,
+                "retrained_from_run_id": previous_version.run_id,
+            })
+            if label_classes is not None:
+                mlflow.log_dict({"classes": label_classes}, LABEL_CLASSES_ARTIFACT)
+            mlflow.log_input(mlflow.data.from_pandas(x_train), context="train")
+            mlflow.log_input(mlflow.data.from_pandas(x_test), context="test")
+
+            if "sklearn" in flavors:
+                mlflow.set_tag(PREPROCESSING_TAG, "")
+                model = mlflow.sklearn.load_model(model_uri)
+                model = self.retrain_sklearn_model(model, x_train, y_train)
+                predictions = model.predict(self.to_model_input(model, x_test))
+                metrics = self.get_metrics(self.problemType, x_test, y_test, predictions)
+                mlflow.log_metrics(metrics)
+                model_info = mlflow.sklearn.log_model(sk_model=model, artifact_path="model", registered_model_name=self.modelName)
+                printable_pipeline = Pipeline([("model", model)])
+                if self.is_neural_network(model):
+                    printable_pipeline = get_printable_pytorch_pipeline(printable_pipeline)
+                mlflow.log_text(estimator_html_repr(printable_pipeline), "estimator.html")
+            else:
+                predictor = mlflow.pyfunc.load_model(model_uri).unwrap_python_model().model
+                predictor = self.retrain_autogluon_predictor(predictor, x_train, y_train)
+                predictions = predictor.predict(x_test)
+                metrics = self.get_metrics(self.problemType, x_test, y_test, predictions)
+                mlflow.log_metrics(metrics)
+                input_decoder = self.get_input_decoder()
+                model_info = mlflow.pyfunc.log_model(
+                    python_model=AutogluonModelMlflowWrapper(
+                        predictor, micro_batching=self.get_micro_batching_config(), input_decoder=input_decoder
+                    ),
+                    artifact_path="model", registered_model_name=self.modelName
+                )
+                if input_decoder is not None:
+                    mlflow.log_dict(input_decoder.to_dict(), "model/input_decoder.json")
+                pipeline = autogluon_metadata_to_sklearn_diagram(predictor)
+                mlflow.log_text(estimator_html_repr(pipeline), "estimator.html")
+
+        client.set_model_version_tag(self.modelName, model_info.registered_model_version, "retrained_from_version", previous_version.version)
+        client.set_model_version_tag(self.modelName, model_info.registered_model_version, "retrained_from_run_id", previous_version.run_id)
+
+        return metrics
+
+    def get_metrics(self, problem_type, x_test, y_test, predictions):
+        # AutoGluon models are registered with AutoGluon problem types
+        autogluon_problem_types = {"binary": "classifier", "multiclass": "classifier", "regression": "regressor"}
+        problem_type = autogluon_problem_types.get(problem_type, problem_type)
+        return super().get_metrics(problem_type, x_test, y_test, predictions)
+
+    def get_label_classes(self, version):
+        '''
+        Classes of the label encoded target of a model version, in the order of their codes.
+        '''
+        try:
+            return mlflow.artifacts.load_dict(f"runs:/{version.run_id}/{LABEL_CLASSES_ARTIFACT}")["classes"]
+        except (mlflow.exceptions.MlflowException, OSError, KeyError):
+            raise ValidationError(
+                message=f"The class encoding of version {version.version} of model '{self.modelName}' is unknown, it can't be retrained",
+                status_code=409
+            )
+
+    def check_no_preprocessing(self, client, version):
+        '''
+        Checks that the estimator of a model version was trained on the raw columns of the dataset.
+        Raises:
+            ValidationError: If it was trained after preprocessing steps, or its preprocessing is unknown.
+        '''
+        steps = client.get_run(version.run_id).data.tags.get(PREPROCESSING_TAG)
+        if steps is None:
+            raise ValidationError(
+                message=f"The preprocessing of version {version.version} of model '{self.modelName}' is unknown, it can't be retrained",
+                status_code=409
+            )
+        if steps:
+            raise ValidationError(
+                message=f"Version {version.version} of model '{self.modelName}' was trained after preprocessing steps ({steps}), it can't be retrained",
+                status_code=409
+            )
+
+    def check_not_slimmed(self, client, version):
+        '''
+        Checks that an AutoGluon predictor still has what refit_full needs: its cached training data and
+        base models, which slimming (refitFull, keepBestOnly, saveSpace) and previous retrains remove.
+        Raises:
+            ValidationError: If the predictor was slimmed or already refit.
+        '''
+        params = client.get_run(version.run_id).data.params
+        slimmed = [param for param in ("refit_full", "keep_best_only", "save_space") if params.get(param) == "True"]
+        if slimmed:
+            raise ValidationError(
+                message=f"Version {version.version} of model '{self.modelName}' was slimmed or refit ({', '.join(slimmed)}), it can't be retrained",
+                status_code=409
+            )
+
+    def encode_labels(self, labels, classes):
+        '''
+        Encodes the labels of the target with the codes of the model being retrained.
+        Raises:
+            ValidationError: If there are labels the model wasn't trained on.
+        '''
+        unseen_labels = sorted(set(labels) - set(classes))
+        if unseen_labels:
+            raise ValidationError(message=f"Labels not seen by model '{self.modelName}': {unseen_labels}", status_code=400)
+        return labels.map({label: code for code, label in enumerate(classes)})
+
+    def check_known_classes(self, model, y_train):
+        # Classifiers keep their classes, incremental training can't add new ones
+        classes = getattr(model, "classes_", None)
+        if classes is None:
+            return
+        unseen_classes = sorted(set(np.unique(y_train)) - set(np.asarray(classes).tolist()))
+        if unseen_classes:
+            raise ValidationError(message=f"Labels not seen by model '{self.modelName}': {unseen_classes}", status_code=400)
+
+    def check_every_class(self, model, y_train):
+        # A warm started forest refits its classes on the new data, so the new trees would predict fewer
+        # classes than the old ones: the new data must have every class of the model
+        classes = getattr(model, "classes_", None)
+        if classes is None:
+            return
+        missing_classes = sorted(set(np.asarray(classes).tolist()) - set(np.unique(y_train).tolist()))
+        if missing_classes:
+            raise ValidationError(
+                message=f"Model '{self.modelName}' can't be retrained without examples of its labels {missing_classes}",
+                status_code=400
+            )
+
+    def is_neural_network(self, model):
+        # Checked by attributes so that skorch (and torch) are not imported for other models
+        return hasattr(model, "partial_fit") and hasattr(model, "module_")
+
+    def to_model_input(self, model, x):
+        # skorch networks are trained on float32 tensors
+        if self.is_neural_network(model):
+            return x.to_numpy(dtype=np.float32)
+        return x
+
+    def retrain_sklearn_model(self, model, x_train, y_train):
+        self.check_known_classes(model, y_train)
+        if self.is_neural_network(model):
+            # skorch neural network: keep the trained weights and train more epochs on the new data
+            epochs = getattr(self, 'additionalEpochs', self.additional_epochs)
+            y_train = y_train.to_numpy()
+            if self.problemType == 'regressor':
+                y_train = y_train.astype(np.float32).reshape(-1, 1)
+            model.partial_fit(self.to_model_input(model, x_train), y_train, epochs=epochs)
+            mlflow.log_param("additional_epochs", epochs)
+        elif "warm_start" in model.get_params() and "n_estimators" in model.get_params():
+            # Forest: keep the trained trees and fit only the new ones on the new data
+            self.check_every_class(model, y_train)
+            additional_estimators = getattr(self, 'additionalEstimators', self.additional_estimators)
+            n_estimators = model.n_estimators + additional_estimators
+            model.set_params(warm_start=True, n_estimators=n_estimators)
+            model.fit(x_train, y_train)
+            mlflow.log_param("n_estimators", n_estimators)
+            mlflow.log_param("additional_estimators", additional_estimators)
+        else:
+            raise ValidationError(message=f"Model '{self.modelName}' ({type(model).__name__}) does not support incremental training", status_code=409)
+        mlflow.log_param("algorithm", type(model).__name__)
+        return model
+
+    def retrain_autogluon_predictor(self, predictor, x_train, y_train):
+        from autogluon.tabular import TabularDataset
+        # refit_full retrains the selected models on their original data plus the new rows,
+        # keeping the hyperparameters and ensemble structure found in the original fit
+        predictor.refit_full(train_data_extra=TabularDataset(x_train.join(y_train)), set_best_to_refit_full=True)
+        mlflow.log_param("algorithm", predictor.model_best)
+        # The refit models can't be refit again
+        mlflow.log_param("refit_full", True)
+        return predictor
@@ -0,0 +1,142 @@
+'''
+Schema enforcement of the model input.
+
+The columns and dtypes of the model input are known when the model is trained (columnsDataType minus the
+target), so the logged model can carry an InputDecoder compiled from them (optional parameter enforceInputSchema).
+The model server builds a DataFrame from each request, inferring its dtypes, and the decoder selects and reorders
+the training columns and casts them to the training dtypes, so the model gets the input it was trained on. Extra
+columns are ignored, as the model does without a decoder; inputs with missing or wrongly typed columns are
+rejected before reaching the model. A DataFrame that already has the training dtypes is only reordered, not
+copied. Other payloads (list of rows, list of records, dict of columns) are decoded the same way, for callers
+that predict with the wrapper directly.
+'''
+import json
+
+import numpy as np
+import pandas as pd
+
+class InputDecoder:
+    '''
+    Decodes prediction payloads into DataFrames with a fixed column order and dtypes.
+    Args:
+        columns (list): Column names, in the order of the model input.
+        dtypes (dict): Pandas dtype name of each column (e.g. "int64", "float64", "object", "category").
+    '''
+    def __init__(self, columns, dtypes):
+        self.columns = list(columns)
+        self.dtypes = {column: dtypes[column] for column in self.columns}
+        self.compile()
+
+    def compile(self):
+        self.numpy_dtypes = {}
+        self.extension_dtypes = {}
+        for column, dtype in self.dtypes.items():
+            pandas_dtype = pd.api.types.pandas_dtype(dtype)
+            if isinstance(pandas_dtype, np.dtype):
+                self.numpy_dtypes[column] = pandas_dtype
+            else:
+                # Pandas extension dtypes (e.g. category) are decoded as objects and converted by pandas
+                self.numpy_dtypes[column] = np.dtype(object)
+                self.extension_dtypes[column] = pandas_dtype
+        self.all_numeric = all(dtype.kind in "iufb" for dtype in self.numpy_dtypes.values())
+        self.column_set = set(self.columns)
+
+    @classmethod
+    def from_columns_data_type(cls, columns_data_type, target):
+        '''
+        Compiles the decoder of a model from the columnsDataType of its training request.
+        '''
+        return cls([column for column in columns_data_type if column != target], columns_data_type)
+
+    def to_dict(self):
+        return {"columns": self.columns, "dtypes": self.dtypes}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["columns"], data["dtypes"])
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.columns = state["columns"]
+        self.dtypes = state["dtypes"]
+        self.compile()
+
+    def decode(self, payload):
+        '''
+        Decodes a payload into a typed DataFrame.
+        Args:
+            payload: List of rows (lists of values in column order), list of records (dicts), a record, dict of
+                columns (lists of values), 2D np.ndarray or pd.DataFrame. A JSON string of any of them is parsed first.
+        Returns:
+            pd.DataFrame: The model input, with the columns and dtypes of the decoder.
+        Raises:
+            ValueError: If the payload does not match the schema.
+        '''
+        if isinstance(payload, (str, bytes)):
+            payload = json.loads(payload)
+        if isinstance(payload, list) and not payload:
+            raise ValueError("Empty payload")
+        if isinstance(payload, pd.DataFrame):
+            return self.decode_frame(payload)
+        if isinstance(payload, dict) and not any(isinstance(values, (list, tuple, np.ndarray)) for values in payload.values()):
+            # A single record
+            payload = [payload]
+        if isinstance(payload, dict):
+            self.check_columns(payload.keys())
+            return self.build_frame({column: payload[column] for column in self.columns})
+        if isinstance(payload, np.ndarray) or (isinstance(payload, list) and isinstance(payload[0], (list, tuple))):
+            return self.decode_rows(payload)
+        if isinstance(payload, list) and isinstance(payload[0], dict):
+            try:
+                return self.build_frame({column: [record[column] for record in payload] for column in self.columns})
+            except (KeyError, TypeError):
+                raise ValueError(f"Every record must have the columns {self.columns}")
+        raise ValueError(f"Unsupported payload type: {type(payload).__name__}")
+
+    def check_columns(self, columns):
+        # Extra columns are allowed, only the training columns are selected
+        missing = self.column_set - set(columns)
+        if missing:
+            raise ValueError(f"Missing columns: {sorted(missing)}")
+
+    def decode_rows(self, rows):
+        if self.all_numeric:
+            try:
+                array = np.asarray(rows, dtype=np.float64)
+            except (ValueError, TypeError):
+                raise ValueError("Rows must only have numeric values")
+            if array.ndim != 2 or array.shape[1] != len(self.columns):
+                raise ValueError(f"Rows must have {len(self.columns)} values")
+            return self.build_frame({column: array[:, i] for i, column in enumerate(self.columns)})
+
+        if any(len(row) != len(self.columns) for row in rows):
+            raise ValueError(f"Rows must have {len(self.columns)} values")
+        return self.build_frame(dict(zip(self.columns, zip(*rows))))
+
+    def decode_frame(self, frame):
+        self.check_columns(frame.columns)
+        frame = frame[self.columns]
+        mismatched = {column: dtype for column, dtype in self.dtypes.items() if str(frame[column].dtype) != dtype}
+        if not mismatched:
+            return frame
+        return self.build_frame({column: frame[column].to_numpy() for column in self.columns}, index=frame.index)
+
+    def build_frame(self, columns, index=None):
+        data = {}
+        for column, values in columns.items():
+            dtype = self.numpy_dtypes[column]
+            try:
+                array = np.asarray(values)
+                typed = array.astype(dtype, copy=False)
+            except (ValueError, TypeError):
+                raise ValueError(f"Column '{column}' must have values of type {self.dtypes[column]}")
+            if dtype.kind in "iub" and array.dtype.kind not in "iub" and len(array) and not np.array_equal(typed, array):
+                # Casting floats to integers would silently truncate them
+                raise ValueError(f"Column '{column}' must have values of type {self.dtypes[column]}")
+            data[column] = typed
+        frame = pd.DataFrame(data, index=index, copy=False)
+        if self.extension_dtypes:
+            frame = frame.astype(self.extension_dtypes)
+        return frame
@@ -0,0 +1,127 @@
+'''
+Micro-batching of concurrent prediction requests.
+
+Models like AutoGluon predictors or sklearn pipelines have a large fixed cost per predict call
+(input validation, feature generation, model dispatch), so predicting one row costs almost as much as
+predicting a few dozens. The MicroBatcher queues the requests received concurrently by the model server,
+predicts them with a single call and returns each caller its own rows.
+'''
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 5
+
+class _Request:
+    def __init__(self, model_input):
+        self.model_input = model_input
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+class MicroBatcher:
+    '''
+    Coalesces concurrent predict calls into batches predicted by a background thread.
+    A batch is predicted when it reaches max_batch_size rows or when its first request has waited
+    max_wait_ms, so a lone request is delayed at most max_wait_ms.
+    Args:
+        predict: Prediction function of the model, taking a pd.DataFrame.
+        max_batch_size (int): Maximum number of rows of a batch. Larger requests are predicted on their own.
+        max_wait_ms (float): Maximum time the first request of a batch waits for other requests.
+    '''
+    def __init__(self, predict, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.predict_function = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.requests = queue.Queue()
+        # Request that didn't fit in the previous batch, it starts the next one
+        self.pending = None
+        self.batches = 0
+        self.batched_rows = 0
+        self.thread = threading.Thread(target=self.run, daemon=True, name="micro-batcher")
+        self.thread.start()
+
+    def predict(self, model_input):
+        '''
+        Predicts model_input as part of a batch, blocking until its predictions are ready.
+        '''
+        if len(model_input) >= self.max_batch_size:
+            return self.predict_function(model_input)
+        request = _Request(model_input)
+        self.requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def next_batch(self):
+        '''
+        Waits for a request and collects the requests arriving until the batch is full or max_wait_ms passes.
+        A request that would take the batch over max_batch_size rows is kept for the next batch.
+        '''
+        if self.pending is not None:
+            batch, self.pending = [self.pending], None
+        else:
+            batch = [self.requests.get()]
+        rows = len(batch[0].model_input)
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while rows < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if rows + len(request.model_input) > self.max_batch_size:
+                self.pending = request
+                break
+            batch.append(request)
+            rows += len(request.model_input)
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            try:
+                self.predict_batch(batch)
+            except Exception:
+                # A request of the batch is invalid, predict them one by one so only that one fails
+                for request in batch:
+                    self.predict_batch([request])
+            finally:
+                for request in batch:
+                    request.done.set()
+
+    def predict_batch(self, batch):
+        '''
+        Predicts the requests of a batch with one call and splits the predictions between them.
+        Requests predicted alone get their error instead of raising it.
+        '''
+        if len(batch) == 1:
+            try:
+                batch[0].result = self.predict_function(batch[0].model_input)
+            except Exception as e:
+                batch[0].error = e
+            return
+
+        inputs = [request.model_input for request in batch]
+        predictions = self.predict_function(pd.concat(inputs, ignore_index=True))
+        self.batches += 1
+        self.batched_rows += sum(len(model_input) for model_input in inputs)
+
+        start = 0
+        for request in batch:
+            end = start + len(request.model_input)
+            if isinstance(predictions, (pd.Series, pd.DataFrame)):
+                result = predictions.iloc[start:end].copy()
+                # Callers get their predictions indexed like their input
+                result.index = request.model_input.index
+            else:
+                result = np.asarray(predictions)[start:end]
+            request.result = result
+            start = end
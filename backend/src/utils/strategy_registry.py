@@ -0,0 +1,68 @@
+'''
+Registry of the creation types, model strategies and preprocessing strategies available to the trainer.
+
+Each name is mapped to the module and class implementing it ("module:Class"). The module is only
+imported the first time the name is resolved, so a job only imports the frameworks it actually uses
+(e.g. a DecisionTree job never imports autogluon, torch or skorch).
+'''
+import importlib
+
+CREATION_TYPES = {
+    "BASIC": "src.utils.creation_types:ModelBasicCreation",
+    "ADVANCED": "src.utils.creation_types:ModelAdvancedCreation",
+    "RETRAIN": "src.utils.creation_types:ModelRetrainCreation",
+}
+
+MODEL_STRATEGIES = {
+    # Scikit-learn
+    "RandomForestClassifierSklearnStrategy": "src.utils.model_strategies:RandomForestClassifierSklearnStrategy",
+    "DecisionTreeClassifierSklearnStrategy": "src.utils.model_strategies:DecisionTreeClassifierSklearnStrategy",
+    "SupportVectorMachineClassifierSklearnStrategy": "src.utils.model_strategies:SupportVectorMachineClassifierSklearnStrategy",
+    "KNeighborsClassifierSklearnStrategy": "src.utils.model_strategies:KNeighborsClassifierSklearnStrategy",
+    "RandomForestRegressorSklearnStrategy": "src.utils.model_strategies:RandomForestRegressorSklearnStrategy",
+    "DecisionTreeRegressorSklearnStrategy": "src.utils.model_strategies:DecisionTreeRegressorSklearnStrategy",
+    "SupportVectorRegressionSklearnStrategy": "src.utils.model_strategies:SupportVectorRegressionSklearnStrategy",
+    "KNeighborsRegressorSklearnStrategy": "src.utils.model_strategies:KNeighborsRegressorSklearnStrategy",
+    # Pytorch (skorch)
+    "SimpleNeuralNetworkReggressorTorchStrategy": "src.utils.torch_model_strategies:SimpleNeuralNetworkReggressorTorchStrategy",
+    "SimpleNeuralNetworkClassifierTorchStrategy": "src.utils.torch_model_strategies:SimpleNeuralNetworkClassifierTorchStrategy",
+    "RNNRegressorTorchStrategy": "src.utils.torch_model_strategies:RNNRegressorTorchStrategy",
+    "RNNClassifierTorchStrategy": "src.utils.torch_model_strategies:RNNClassifierTorchStrategy",
+}
+
+PREPROCESSING_STRATEGIES = {
+    name: f"src.utils.preprocessing_strategy:{name}"
+    for name in [
+        "DropStrategy", "MinMaxScalerStrategy", "TargetEncoderStrategy", "NormalizerStrategy",
+        "StandardScalerStrategy", "OneHotEncoderStrategy", "SelectKBestStrategy", "PCAStrategy",
+        "SimpleImputerStrategy", "FfillStrategy", "BfillStrategy", "TabularToWindowStrategy",
+    ]
+}
+
+def load_class(path):
+    '''
+    Imports the module of a "module:Class" path and returns the class.
+    '''
+    module_name, class_name = path.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+def get_creation_type(name):
+    '''
+    Returns the creation type class registered with the given name (case insensitive), or None if there is none.
+    '''
+    path = CREATION_TYPES.get(name.upper()) if name else None
+    return load_class(path) if path else None
+
+def get_model_strategy(name):
+    '''
+    Returns the model strategy class registered with the given name, or None if there is none.
+    '''
+    path = MODEL_STRATEGIES.get(name)
+    return load_class(path) if path else None
+
+def get_preprocessing_strategy(name):
+    '''
+    Returns the preprocessing strategy class registered with the given name, or None if there is none.
+    '''
+    path = PREPROCESSING_STRATEGIES.get(name)
+    return load_class(path) if path else None
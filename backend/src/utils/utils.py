@@ -1,19 +1,23 @@
-from autogluon.tabular import TabularPredictor
 from sklearn.ensemble import VotingClassifier
 from sklearn.base import BaseEstimator, ClassifierMixin
-from lightgbm import LGBMClassifier
-from lightgbm import basic 
 import numpy as np
 import warnings
-import torch
-import skorch
 import re
+import os
+import threading
+import time
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import FunctionTransformer
 from sklearn.linear_model import LogisticRegression
 from sklearn.base import BaseEstimator, TransformerMixin
 import mlflow
 
+class ValidationError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
 def extract_layers_as_nested_dict(model_str):
     """
     Parses a model string and returns a nested dictionary representing the model's layer hierarchy.
@@ -146,13 +150,6 @@ def nested_dict_to_pipeline(nested_dict, prefix='', pipeline_name=''):
     return pipeline
 
 
-def convert_booster_to_lgbmclassifier(booster):
-    params = booster.params.copy()
-    clf = LGBMClassifier(**params)
-    clf.fitted_= True
-    return clf
-
-
 class NeuralNetwork(Pipeline):
     def __init__(self, steps, memory=None, verbose=False, hyperparams=None):
         super().__init__(steps, memory=memory, verbose=verbose)
@@ -161,100 +158,156 @@ class NeuralNetwork(Pipeline):
         if self.hyperparams:
             return f"NeuralNetwork({self.hyperparams})"
 
-def get_neural_network_estimator_from_autogluon_model(model):
-    """
-    Extracts a neural network estimator from an AutoGluon model.
-    This is a workaround since AutoGluon does not expose the model architecture directly.
-    """
-    if isinstance(model.model, torch.nn.Module):
-        # If the model is a PyTorch neural network, we can extract its architecture
-        # This is a workaround since AutoGluon does not expose the model architecture directly.
-        nn = str(model.model)
-    else:
-        # If the model is not a PyTorch neural network, we assume it's a
-        # FastAI neural network.
-        nn = str(model.model.model)
-    
-    nested_dict = extract_layers_as_nested_dict(nn)
-
-    # 2. Build sklearn pipeline
-    sklearn_pipeline = nested_dict_to_pipeline(nested_dict)
-
-    # 3. Wrap in custom pipeline 
-    wrapper = NeuralNetwork(steps=sklearn_pipeline.steps, hyperparams=model.get_params())
-
-    return wrapper
-
-def autogluon_stack_to_sklearn_voting_classifier(model, name="WeightedEnsemble_L2"):
+def get_directory_size(path):
+    '''
+    Computes the size of all the files inside a directory, recursively.
+    Args:
+        path (str): Path of the directory.
+    Returns:
+        int: Size in bytes.
+    '''
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            file_path = os.path.join(root, file)
+            if not os.path.islink(file_path):
+                size += os.path.getsize(file_path)
+    return size
+
+def measure_predict_latency(predict, model_input, repeats=20, warmup=2):
     '''
-    Converts an AutoGluon stacked model to a sklearn. Only for HTML diagram creation.
-    The function extracts the base models from the AutoGluon stacked model
-    and wraps them in a sklearn Pipeline or VotingClassifier that can be used for visualization.
+    Measures the median latency of a predict function over the same input.
     Args:
-        model (TabularPredictor): The AutoGluon model to convert.
-        name (str): The name of the model to extract. Default is "WeightedEnsemble_L2".
+        predict (callable): Function receiving the model input.
+        model_input: Input passed to the predict function on every call.
+        repeats (int): Number of timed calls.
+        warmup (int): Number of untimed calls done before measuring (lazy loading, caches...).
     Returns:
-        sklearn.pipeline.Pipeline or sklearn.ensemble.VotingClassifier: A sklearn-compatible model.
+        float: Median latency in milliseconds.
+    '''
+    for _ in range(warmup):
+        predict(model_input)
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(model_input)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+def autogluon_metadata_to_sklearn_diagram(predictor, name=None):
+    '''
+    Converts the structure of a fitted AutoGluon predictor to sklearn estimators. Only for HTML diagram creation.
+    It works only from the predictor metadata (model graph, leaderboard values and the small info file of
+    each model), so it never loads the training data or the model weights.
+    Args:
+        predictor (TabularPredictor): The fitted AutoGluon predictor.
+        name (str): The name of the model to represent. Default is the best model of the predictor.
+    Returns:
+        sklearn.pipeline.Pipeline, sklearn.ensemble.VotingClassifier or PlaceholderTransformer: A sklearn-compatible estimator.
     '''
-    predictor = model #TabularPredictor.load(model_path)
     trainer = predictor._trainer
+    return autogluon_model_metadata_to_estimator(trainer, name or trainer.model_best)
 
-    model = trainer.load_model(name)
-    if hasattr(model, 'base_model_names'):
-        base_model_names = model.base_model_names
-    else:
-        base_model_names = [name]
-    X_train, y_train = predictor.load_data_internal()
-    # train_data, _ = predictor.load_data_internal()
-    # X_train = train_data.drop(columns=[predictor.label])
-    # y_train = train_data[predictor.label]
-
-    estimators = []
-
-    for model_name in base_model_names:
-        model = trainer.load_model(model_name)
-        estimator = model.model
-
-        # Case 1: Sklearn-compatible model (RandomForest, ExtraTrees, etc.)
-        if isinstance(estimator, BaseEstimator):
-            estimators.append((model_name, estimator))
-
-        # Case 2: LightGBM Booster
-        elif isinstance(estimator, basic.Booster): 
-            try:
-                
-                booster = estimator#.booster_
-                clf = convert_booster_to_lgbmclassifier(booster)
-                estimators.append((model_name, clf))
-            except Exception as e:
-                warnings.warn(f"Failed to convert LightGBM model '{model_name}': {e}")
-
-        # Case 3: AutoGluon Neural Net or other non-sklearn model
-        else:
-            try:
-                if model_name.find("CatBoost") != -1:
-                    clf = rename_estimator(PlaceholderTransformer(desc=str(model.get_params())), model_name)
-                else:
-                    clf = get_neural_network_estimator_from_autogluon_model(model)
-                estimators.append((model_name, clf))
-            except Exception as e:
-                warnings.warn(f"Skipping model '{model_name}': cannot wrap ({e})")
-
-    if not estimators:
-        return 
-        # raise ValueError("No compatible models found.")
-    elif len(estimators) == 1:
-        warnings.warn("Only one model found, returning it directly without VotingClassifier.")
-        return estimators[0][1]
-
-    return VotingClassifier(estimators=estimators, voting='soft')
+def autogluon_model_metadata_to_estimator(trainer, model_name):
+    '''
+    Converts an AutoGluon model and the models it is stacked on (its ancestors in the trainer model graph)
+    to sklearn estimators. A model fitted on base models is a VotingClassifier of them. With more stack
+    levels, each level is a step of a Pipeline, so every model is converted once even though all the
+    models of a level are fitted on all the models of the previous one.
+    Args:
+        trainer (AbstractTrainer): The trainer of the AutoGluon predictor.
+        model_name (str): The name of the model to convert.
+    Returns:
+        sklearn.pipeline.Pipeline, sklearn.ensemble.VotingClassifier or PlaceholderTransformer: A sklearn-compatible estimator.
+    '''
+    levels = [[model_name]]
+    seen = {model_name}
+    while True:
+        base_model_names = [
+            base_model_name
+            for model in levels[0]
+            for base_model_name in trainer.model_graph.predecessors(model)
+            if base_model_name not in seen and not seen.add(base_model_name)
+        ]
+        if not base_model_names:
+            break
+        levels.insert(0, base_model_names)
+
+    if len(levels) == 1:
+        return autogluon_model_placeholder(trainer, model_name)
+    if len(levels) == 2:
+        estimators = [(name, autogluon_model_placeholder(trainer, name)) for name in levels[0]]
+        if len(estimators) == 1:
+            return estimators[0][1]
+        return rename_estimator(VotingClassifier(estimators=estimators, voting='soft'), model_name)
+
+    steps = []
+    for index, level in enumerate(levels[:-1]):
+        estimators = [(name, autogluon_model_placeholder(trainer, name)) for name in level]
+        step = estimators[0][1] if len(estimators) == 1 else rename_estimator(VotingClassifier(estimators=estimators, voting='soft'), f"StackLevel{index + 1}")
+        steps.append((f"level_{index + 1}", step))
+    steps.append((model_name, autogluon_model_placeholder(trainer, model_name)))
+    return Pipeline(steps)
+
+def autogluon_model_placeholder(trainer, model_name):
+    '''
+    Placeholder estimator of an AutoGluon model, named after it and described by its hyperparameters.
+    '''
+    hyperparameters = autogluon_model_hyperparameters(trainer, model_name)
+    desc = ", ".join(f"{param}={value!r}" for param, value in hyperparameters.items())
+    return rename_estimator(PlaceholderTransformer(desc=desc), model_name)
+
+def autogluon_model_hyperparameters(trainer, model_name):
+    '''
+    Reads the hyperparameters of an AutoGluon model from its info file, without loading the model.
+    Falls back to the values stored in the model graph (leaderboard values) if the info is not available.
+    '''
+    try:
+        return trainer.get_model_info(model_name).get("hyperparameters", {})
+    except Exception as e:
+        warnings.warn(f"Cannot read the hyperparameters of model '{model_name}': {e}")
+        attributes = trainer.model_graph.nodes[model_name]
+        return {attribute: attributes[attribute] for attribute in ("val_score", "fit_time", "predict_time") if attribute in attributes}
+
+# Guards the lazy creation of the micro-batcher of the wrappers, shared by the threads of the model server
+_MICRO_BATCHER_LOCK = threading.Lock()
 
 class AutogluonModelMlflowWrapper(mlflow.pyfunc.PythonModel):
-    def __init__(self, model):
+    def __init__(self, model, micro_batching=None, input_decoder=None):
         self.model = model
+        # Micro-batching config ({"max_batch_size": int, "max_wait_ms": float}), None to predict each request on its own
+        self.micro_batching = micro_batching
+        # InputDecoder compiled from the training schema, None to pass the input to the model as it is
+        self.input_decoder = input_decoder
+        self._batcher = None
+
+    def __getstate__(self):
+        # The batcher (thread and queue) is created by the server that loads the model
+        state = self.__dict__.copy()
+        state["_batcher"] = None
+        return state
+
+    def __setstate__(self, state):
+        # Models logged before micro-batching and input decoding existed have no config
+        state.setdefault("micro_batching", None)
+        state.setdefault("input_decoder", None)
+        state.setdefault("_batcher", None)
+        self.__dict__.update(state)
+
+    def get_batcher(self):
+        with _MICRO_BATCHER_LOCK:
+            if self._batcher is None:
+                from src.utils.micro_batching import MicroBatcher
+                self._batcher = MicroBatcher(self.model.predict, **self.micro_batching)
+        return self._batcher
 
     def predict(self, context, model_input):
         # Convert input DataFrame to the format expected by the AutoGluon model
+        if self.input_decoder is not None:
+            model_input = self.input_decoder.decode(model_input)
+        if self.micro_batching:
+            # Concurrent requests are predicted together by the batcher
+            return self.get_batcher().predict(model_input)
         return self.model.predict(model_input)
     
 
@@ -314,6 +367,7 @@ def get_printable_pytorch_pipeline(pipeline):
     Returns:
         sklearn.pipeline.Pipeline with PlaceholderTransformer
     '''
+    import skorch
     # Get the steps of the pipeline
     steps = []
     for name, estimator in pipeline.steps:
@@ -0,0 +1,94 @@
+import time
+import unittest
+import warnings
+from types import SimpleNamespace
+
+import networkx as nx
+from sklearn.base import estimator_html_repr
+from sklearn.ensemble import VotingClassifier
+from sklearn.pipeline import Pipeline
+from src.utils.utils import autogluon_metadata_to_sklearn_diagram
+
+class FakeTrainer:
+    '''
+    AutoGluon-like trainer with only metadata: loading a model fails the test
+    '''
+    def __init__(self, model_graph, model_best, missing_info=()):
+        self.model_graph = model_graph
+        self.model_best = model_best
+        self.missing_info = missing_info
+
+    def get_model_info(self, model_name):
+        if model_name in self.missing_info:
+            raise FileNotFoundError(model_name)
+        return {"hyperparameters": {"learning_rate": 0.05, "name": model_name}}
+
+    def load_model(self, model_name):
+        raise AssertionError(f"Model {model_name} was loaded")
+
+def fake_predictor(model_graph, model_best, missing_info=()):
+    def load_data_internal():
+        raise AssertionError("The training data was loaded")
+    return SimpleNamespace(_trainer=FakeTrainer(model_graph, model_best, missing_info), load_data_internal=load_data_internal)
+
+def stacked_graph(base_models, levels=2):
+    '''
+    Model graph of a stack: every model of a level is fitted on all the models of the previous one,
+    and a weighted ensemble combines the last level
+    '''
+    graph = nx.DiGraph()
+    previous_level = [f"{model}_BAG_L1" for model in base_models]
+    for model in previous_level:
+        graph.add_node(model, val_score=0.9, fit_time=1.0, predict_time=0.1)
+    for level in range(2, levels + 1):
+        current_level = [f"{model}_BAG_L{level}" for model in base_models]
+        graph.add_edges_from((base, model) for model in current_level for base in previous_level)
+        previous_level = current_level
+    graph.add_edges_from((model, f"WeightedEnsemble_L{levels + 1}") for model in previous_level)
+    return graph
+
+class TestAutogluonDiagram(unittest.TestCase):
+
+    def test_weighted_ensemble(self):
+        graph = stacked_graph(["LightGBM", "CatBoost", "NeuralNetTorch"], levels=1)
+        estimator = autogluon_metadata_to_sklearn_diagram(fake_predictor(graph, "WeightedEnsemble_L2"))
+
+        self.assertIsInstance(estimator, VotingClassifier)
+        self.assertEqual(type(estimator).__name__, "WeightedEnsemble_L2")
+        self.assertEqual([name for name, _ in estimator.estimators], ["LightGBM_BAG_L1", "CatBoost_BAG_L1", "NeuralNetTorch_BAG_L1"])
+        self.assertIn("learning_rate=0.05", estimator.estimators[0][1].desc)
+
+    def test_single_model(self):
+        graph = nx.DiGraph()
+        graph.add_node("LightGBM")
+        estimator = autogluon_metadata_to_sklearn_diagram(fake_predictor(graph, "WeightedEnsemble_L2"), name="LightGBM")
+
+        self.assertEqual(type(estimator).__name__, "LightGBM")
+
+    def test_missing_model_info_uses_graph_values(self):
+        graph = stacked_graph(["LightGBM", "CatBoost"], levels=1)
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter("always")
+            estimator = autogluon_metadata_to_sklearn_diagram(fake_predictor(graph, "WeightedEnsemble_L2", missing_info=["CatBoost_BAG_L1"]))
+
+        self.assertIn("val_score=0.9", estimator.estimators[1][1].desc)
+
+    def test_large_stack_in_milliseconds(self):
+        # Multi-layer stack of a best_quality preset: 12 model types on 3 levels
+        base_models = ["LightGBMXT", "LightGBM", "RandomForestGini", "RandomForestEntr", "CatBoost", "ExtraTreesGini",
+                       "ExtraTreesEntr", "NeuralNetFastAI", "XGBoost", "NeuralNetTorch", "LightGBMLarge", "KNeighbors"]
+        predictor = fake_predictor(stacked_graph(base_models, levels=3), "WeightedEnsemble_L4")
+        start = time.perf_counter()
+        estimator = autogluon_metadata_to_sklearn_diagram(predictor)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.assertIsInstance(estimator, Pipeline)
+        self.assertLess(elapsed_ms, 100)
+        # Each level once, not every path of the model graph
+        self.assertEqual([name for name, _ in estimator.steps], ["level_1", "level_2", "level_3", "WeightedEnsemble_L4"])
+        self.assertEqual([len(step.estimators) for _, step in estimator.steps[:3]], [12, 12, 12])
+        self.assertEqual(estimator_html_repr(estimator).count("<label>LightGBM_BAG_L1</label>"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
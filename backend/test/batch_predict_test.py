@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import mlflow
+import pandas as pd
+from src.trainer.batch_predict import DEFAULT_WORKERS, estimate_total_chunks, get_default_workers, get_input_size, predict_batch, read_chunks
+from src.utils.input_decoder import InputDecoder
+from src.utils.utils import AutogluonModelMlflowWrapper
+
+class DoubleModel(mlflow.pyfunc.PythonModel):
+    def predict(self, context, model_input):
+        return model_input["x"] * 2
+
+class SumModel:
+    '''
+    Stands for the AutoGluon predictor: only accepts its training columns
+    '''
+    def predict(self, model_input):
+        assert list(model_input.columns) == ["x", "y"]
+        return model_input["x"] + model_input["y"]
+
+class TestBatchPrediction(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp_dir.name, "model")
+        mlflow.pyfunc.save_model(self.model_path, python_model=DoubleModel())
+        self.input_path = os.path.join(self.tmp_dir.name, "input.csv")
+        pd.DataFrame({"id": range(25), "x": range(25), "group": ["a", "b"] * 12 + ["a"]}).to_csv(self.input_path, index=False)
+        self.output_path = os.path.join(self.tmp_dir.name, "predictions")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_scores_every_chunk(self):
+        progress = []
+        rows, chunks = predict_batch(
+            read_chunks(self.input_path, chunk_size=10), self.model_path, self.output_path, workers=2,
+            keep_columns=["id"], on_progress=lambda rows, chunks: progress.append((rows, chunks))
+        )
+        results = pd.read_parquet(self.output_path).sort_values("id").reset_index(drop=True)
+
+        self.assertEqual((rows, chunks), (25, 3))
+        self.assertEqual(progress[-1], (25, 3))
+        self.assertEqual(sorted(os.listdir(self.output_path)), ["part-00000.parquet", "part-00001.parquet", "part-00002.parquet"])
+        self.assertEqual(list(results.columns), ["id", "prediction"])
+        self.assertEqual(list(results["prediction"]), [2 * i for i in range(25)])
+
+    def test_partitioned_results(self):
+        predict_batch(
+            read_chunks(self.input_path, chunk_size=10), self.model_path, self.output_path, workers=1,
+            partition_by="group"
+        )
+
+        self.assertEqual(sorted(os.listdir(self.output_path)), ["group=a", "group=b"])
+        self.assertEqual(len(pd.read_parquet(os.path.join(self.output_path, "group=a"))), 13)
+
+    def test_partition_column_not_kept(self):
+        predict_batch(
+            read_chunks(self.input_path, chunk_size=10), self.model_path, self.output_path, workers=1,
+            keep_columns=["id"], partition_by="group"
+        )
+        results = pd.read_parquet(os.path.join(self.output_path, "group=b"))
+
+        self.assertEqual(sorted(os.listdir(self.output_path)), ["group=a", "group=b"])
+        self.assertEqual(list(results.columns), ["id", "prediction"])
+        self.assertEqual(len(results), 12)
+
+    def test_selects_the_model_input_columns(self):
+        # A dataset file with the target, an id and the partition column besides the model input
+        pd.DataFrame({"id": range(5), "y": range(5), "label": [0, 1] * 2 + [0], "x": range(5), "group": ["a"] * 5}).to_csv(self.input_path, index=False)
+        decoder = InputDecoder.from_columns_data_type({"x": "int64", "y": "int64", "label": "int64"}, target="label")
+        model_path = os.path.join(self.tmp_dir.name, "autogluon_model")
+        mlflow.pyfunc.save_model(model_path, python_model=AutogluonModelMlflowWrapper(SumModel(), input_decoder=decoder))
+
+        predict_batch(
+            read_chunks(self.input_path, chunk_size=2), model_path, self.output_path, workers=1,
+            keep_columns=["id", "label"], partition_by="group"
+        )
+        results = pd.read_parquet(os.path.join(self.output_path, "group=a")).sort_values("id")
+
+        self.assertEqual(list(results.columns), ["id", "label", "prediction"])
+        self.assertEqual(list(results["prediction"]), [2 * i for i in range(5)])
+
+    def test_estimates_the_total_chunks(self):
+        estimates = []
+        chunks = estimate_total_chunks(read_chunks(self.input_path, chunk_size=10), get_input_size(self.input_path), estimates.append)
+
+        self.assertEqual(estimates, [])
+        self.assertEqual(len(list(chunks)), 3)
+        self.assertEqual(estimates, [3])
+
+    def test_default_workers_follow_the_cpu_limit(self):
+        with mock.patch("builtins.open", mock.mock_open(read_data="300000 100000\n")):
+            self.assertEqual(get_default_workers(), 3)
+        with mock.patch("builtins.open", mock.mock_open(read_data="max 100000\n")):
+            self.assertEqual(get_default_workers(), DEFAULT_WORKERS)
+
+
+if __name__ == '__main__':
+    unittest.main()
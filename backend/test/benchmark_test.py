@@ -0,0 +1,48 @@
+import unittest
+from src.trainer.benchmark import run_benchmark, summarize_latencies, synthetic_rows
+
+class TestModelBenchmark(unittest.TestCase):
+
+    columns = [
+        {"name": "age", "type": "long", "required": True},
+        {"name": "income", "type": "double", "required": True},
+        {"name": "city", "type": "string", "required": True},
+        {"name": "member", "type": "boolean", "required": True},
+    ]
+
+    def test_synthetic_rows_follow_schema(self):
+        rows = synthetic_rows(self.columns, 20)
+
+        self.assertEqual(list(rows.columns), ["age", "income", "city", "member"])
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(rows["age"].dtype, "int64")
+        self.assertEqual(rows["income"].dtype, "float64")
+        self.assertEqual(rows["member"].dtype, "bool")
+        self.assertTrue(rows["city"].str.startswith("value_").all())
+
+    def test_synthetic_rows_are_reproducible(self):
+        self.assertTrue(synthetic_rows(self.columns, 10).equals(synthetic_rows(self.columns, 10)))
+
+    def test_unsupported_type(self):
+        with self.assertRaises(ValueError):
+            synthetic_rows([{"name": "x", "type": "tensor"}], 5)
+
+    def test_summarize_latencies(self):
+        metrics = summarize_latencies([10.0] * 99 + [100.0], batch_size=4)
+
+        self.assertEqual(metrics["latency_p50_ms_batch_4"], 10.0)
+        self.assertGreater(metrics["latency_p99_ms_batch_4"], 10.0)
+        self.assertAlmostEqual(metrics["rows_per_sec_batch_4"], 4 * 1000 * 100 / 1090)
+
+    def test_run_benchmark_always_measures_single_row(self):
+        batch_lengths = []
+        rows = synthetic_rows(self.columns, 16)
+        metrics = run_benchmark(lambda batch: batch_lengths.append(len(batch)), rows, [16], iterations=5)
+
+        self.assertIn("latency_p50_ms_batch_1", metrics)
+        self.assertIn("rows_per_sec_batch_16", metrics)
+        self.assertEqual(set(batch_lengths), {1, 16})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import pickle
+import unittest
+
+import numpy as np
+import pandas as pd
+from src.utils.input_decoder import InputDecoder
+
+class TestInputDecoder(unittest.TestCase):
+
+    columns_data_type = {"age": "int64", "income": "float64", "city": "object", "label": "int64"}
+
+    def setUp(self):
+        self.decoder = InputDecoder.from_columns_data_type(self.columns_data_type, target="label")
+
+    def assert_typed(self, frame):
+        self.assertEqual(list(frame.columns), ["age", "income", "city"])
+        self.assertEqual([str(dtype) for dtype in frame.dtypes], ["int64", "float64", "object"])
+
+    def test_payload_formats(self):
+        payloads = [
+            [[30, 1000.5, "Santander"], [40, 2000, "Madrid"]],
+            [{"city": "Santander", "age": 30, "income": 1000.5}, {"age": 40, "income": 2000, "city": "Madrid"}],
+            {"income": [1000.5, 2000], "age": [30, 40], "city": ["Santander", "Madrid"]},
+            '[[30, 1000.5, "Santander"], [40, 2000, "Madrid"]]',
+            pd.DataFrame({"city": ["Santander", "Madrid"], "age": [30.0, 40.0], "income": [1000.5, 2000]}),
+        ]
+        for payload in payloads:
+            frame = self.decoder.decode(payload)
+
+            self.assert_typed(frame)
+            self.assertEqual(list(frame["age"]), [30, 40])
+            self.assertEqual(list(frame["city"]), ["Santander", "Madrid"])
+
+    def test_single_record(self):
+        frame = self.decoder.decode({"age": 30, "income": 1.0, "city": "Santander"})
+
+        self.assert_typed(frame)
+        self.assertEqual(len(frame), 1)
+
+    def test_numeric_fast_path(self):
+        decoder = InputDecoder(["x", "y"], {"x": "float32", "y": "int64"})
+        frame = decoder.decode(np.array([[0.5, 1], [1.5, 2]]))
+
+        self.assertEqual(frame["x"].dtype, np.float32)
+        self.assertEqual(list(frame["y"]), [1, 2])
+
+    def test_typed_frame_keeps_its_index(self):
+        frame = pd.DataFrame({"city": ["Santander"], "age": [30], "income": [1.0]}, index=[7])
+
+        pd.testing.assert_frame_equal(self.decoder.decode(frame), frame[["age", "income", "city"]])
+
+    def test_rejects_malformed_payloads(self):
+        payloads = [
+            [],
+            [[30, 1000.5]],
+            [[30, 1000.5, "Santander", 1]],
+            [[30.5, 1000.5, "Santander"]],
+            [["thirty", 1000.5, "Santander"]],
+            [{"age": 30, "income": 1000.5}],
+            {"age": [30], "income": [1.0]},
+            "not json",
+        ]
+        for payload in payloads:
+            with self.assertRaises(ValueError):
+                self.decoder.decode(payload)
+
+    def test_ignores_extra_columns(self):
+        payloads = [
+            {"age": [30], "income": [1.0], "city": ["Santander"], "label": [1]},
+            [{"label": 1, "age": 30, "income": 1.0, "city": "Santander"}],
+            pd.DataFrame({"id": [7], "city": ["Santander"], "age": [30], "income": [1.0]}),
+        ]
+        for payload in payloads:
+            frame = self.decoder.decode(payload)
+
+            self.assert_typed(frame)
+            self.assertEqual(list(frame["age"]), [30])
+
+    def test_pickle(self):
+        decoder = pickle.loads(pickle.dumps(self.decoder))
+
+        self.assertEqual(decoder.to_dict(), self.decoder.to_dict())
+        self.assert_typed(decoder.decode([[30, 1.0, "Santander"]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
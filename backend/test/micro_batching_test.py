@@ -0,0 +1,101 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+import pandas as pd
+from src.utils.micro_batching import MicroBatcher
+
+class FakeModel:
+    '''
+    Model predicting twice column x, recording the size of each predict call
+    '''
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def predict(self, model_input):
+        if (model_input["x"] < 0).any():
+            raise ValueError("Negative input")
+        self.calls.append(len(model_input))
+        time.sleep(self.delay)
+        return model_input["x"] * 2
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def predict_concurrently(self, batcher, inputs):
+        results = [None] * len(inputs)
+        def request(i):
+            try:
+                results[i] = batcher.predict(inputs[i])
+            except ValueError as e:
+                results[i] = e
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(len(inputs))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_requests_are_batched(self):
+        model = FakeModel(delay=0.01)
+        batcher = MicroBatcher(model.predict, max_batch_size=64, max_wait_ms=50)
+        inputs = [pd.DataFrame({"x": [i]}, index=[100 + i]) for i in range(20)]
+        results = self.predict_concurrently(batcher, inputs)
+
+        self.assertLess(len(model.calls), 20)
+        for i, result in enumerate(results):
+            self.assertEqual(list(result), [2 * i])
+            self.assertEqual(list(result.index), [100 + i])
+
+    def test_max_batch_size(self):
+        model = FakeModel(delay=0.01)
+        batcher = MicroBatcher(model.predict, max_batch_size=4, max_wait_ms=50)
+        self.predict_concurrently(batcher, [pd.DataFrame({"x": [i]}) for i in range(12)])
+
+        self.assertTrue(all(size <= 4 for size in model.calls))
+        self.assertEqual(sum(model.calls), 12)
+
+    def test_multi_row_requests_do_not_overflow(self):
+        model = FakeModel(delay=0.01)
+        batcher = MicroBatcher(model.predict, max_batch_size=8, max_wait_ms=50)
+        sizes = [3, 5, 2, 6, 4, 7, 1, 3]
+        inputs = [pd.DataFrame({"x": range(10 * i, 10 * i + size)}) for i, size in enumerate(sizes)]
+        results = self.predict_concurrently(batcher, inputs)
+
+        self.assertTrue(all(size <= 8 for size in model.calls))
+        self.assertEqual(sum(model.calls), sum(sizes))
+        for model_input, result in zip(inputs, results):
+            self.assertEqual(list(result), list(model_input["x"] * 2))
+
+    def test_request_that_would_overflow_starts_next_batch(self):
+        batcher = MicroBatcher(FakeModel().predict, max_batch_size=4, max_wait_ms=50)
+        # Stop the background thread from taking the requests
+        batcher.requests = type(batcher.requests)()
+        requests = [SimpleNamespace(model_input=pd.DataFrame({"x": range(size)})) for size in (3, 2, 1)]
+        for request in requests:
+            batcher.requests.put(request)
+
+        self.assertEqual(batcher.next_batch(), requests[:1])
+        self.assertEqual(batcher.next_batch(), requests[1:])
+
+    def test_large_requests_are_not_batched(self):
+        model = FakeModel()
+        batcher = MicroBatcher(model.predict, max_batch_size=4)
+        result = batcher.predict(pd.DataFrame({"x": range(10)}))
+
+        self.assertEqual(model.calls, [10])
+        self.assertEqual(len(result), 10)
+
+    def test_invalid_request_only_fails_itself(self):
+        model = FakeModel(delay=0.01)
+        batcher = MicroBatcher(model.predict, max_batch_size=64, max_wait_ms=50)
+        inputs = [pd.DataFrame({"x": [i if i != 3 else -1]}) for i in range(8)]
+        results = self.predict_concurrently(batcher, inputs)
+
+        self.assertIsInstance(results[3], ValueError)
+        self.assertEqual([list(results[i]) for i in range(8) if i != 3], [[2 * i] for i in range(8) if i != 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
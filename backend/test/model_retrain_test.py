@@ -0,0 +1,119 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import mlflow
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from src.utils.creation_types import ModelRetrainCreation
+from src.utils.utils import ValidationError
+
+class FakeNeuralNetwork:
+    '''
+    skorch-like network recording its partial_fit calls
+    '''
+    module_ = object()
+    classes_ = np.array([0, 1])
+
+    def __init__(self):
+        self.calls = []
+
+    def partial_fit(self, x, y, epochs):
+        self.calls.append((x.dtype, len(x), epochs))
+        return self
+
+@mock.patch("mlflow.log_param")
+class TestModelRetrain(unittest.TestCase):
+
+    def setUp(self):
+        self.x = pd.DataFrame({"a": range(20), "b": [i % 3 for i in range(20)]})
+        self.y = pd.Series([i % 2 for i in range(20)])
+
+    def creation(self, **params):
+        params = {"modelName": "testModel", "problemType": "classifier", "datasetURL": "", "columnsDataType": {}, "target": "y", **params}
+        return ModelRetrainCreation(None, **params)
+
+    def test_forest_adds_trees(self, log_param):
+        model = RandomForestClassifier(n_estimators=10, random_state=0).fit(self.x, self.y)
+        model = self.creation(additionalEstimators=5).retrain_sklearn_model(model, self.x, self.y)
+
+        self.assertEqual(len(model.estimators_), 15)
+        self.assertTrue(model.warm_start)
+
+    def test_neural_network_trains_more_epochs(self, log_param):
+        model = FakeNeuralNetwork()
+        self.creation(additionalEpochs=3).retrain_sklearn_model(model, self.x, self.y)
+
+        self.assertEqual(model.calls, [(np.float32, 20, 3)])
+
+    def test_unsupported_model(self, log_param):
+        model = LogisticRegression().fit(self.x, self.y)
+        with self.assertRaises(ValidationError) as context:
+            self.creation().retrain_sklearn_model(model, self.x, self.y)
+
+        self.assertEqual(context.exception.status_code, 409)
+
+    def test_unseen_classes(self, log_param):
+        model = RandomForestClassifier(n_estimators=10, random_state=0).fit(self.x, self.y)
+        with self.assertRaises(ValidationError) as context:
+            self.creation().retrain_sklearn_model(model, self.x, self.y.replace(1, 2))
+
+        self.assertEqual(context.exception.status_code, 400)
+
+    def test_missing_classes(self, log_param):
+        y = pd.Series([i % 3 for i in range(20)])
+        model = RandomForestClassifier(n_estimators=10, random_state=0).fit(self.x, y)
+        with self.assertRaises(ValidationError) as context:
+            self.creation().retrain_sklearn_model(model, self.x, y.replace(2, 1))
+
+        self.assertEqual(context.exception.status_code, 400)
+        self.assertEqual(len(model.estimators_), 10)
+
+    def test_labels_keep_the_codes_of_the_model(self, log_param):
+        creation = self.creation()
+        with mock.patch("mlflow.artifacts.load_dict", return_value={"classes": ["cat", "dog", "fish"]}) as load_dict:
+            classes = creation.get_label_classes(SimpleNamespace(run_id="run", version="1"))
+
+        self.assertEqual(load_dict.call_args.args[0], "runs:/run/label_classes.json")
+
+        # A fresh LabelEncoder would encode dog as 0
+        self.assertEqual(list(creation.encode_labels(pd.Series(["dog", "fish", "dog"]), classes)), [1, 2, 1])
+        with self.assertRaises(ValidationError) as context:
+            creation.encode_labels(pd.Series(["dog", "bird"]), classes)
+        self.assertEqual(context.exception.status_code, 400)
+
+    def test_unknown_class_encoding(self, log_param):
+        missing = mlflow.exceptions.MlflowException("No such file or directory")
+        with mock.patch("mlflow.artifacts.load_dict", side_effect=missing), self.assertRaises(ValidationError) as context:
+            self.creation().get_label_classes(SimpleNamespace(run_id="run", version="1"))
+
+        self.assertEqual(context.exception.status_code, 409)
+
+    def test_preprocessed_versions(self, log_param):
+        version = SimpleNamespace(run_id="run", version="1")
+        for tags, status_code in (({"preprocessing_steps": "MinMaxScaler"}, 409), ({}, 409), ({"preprocessing_steps": ""}, None)):
+            client = mock.Mock()
+            client.get_run.return_value.data.tags = tags
+            if status_code is None:
+                self.creation().check_no_preprocessing(client, version)
+                continue
+            with self.assertRaises(ValidationError) as context:
+                self.creation().check_no_preprocessing(client, version)
+            self.assertEqual(context.exception.status_code, status_code)
+
+    def test_slimmed_predictors(self, log_param):
+        version = SimpleNamespace(run_id="run", version="1")
+        client = mock.Mock()
+        client.get_run.return_value.data.params = {"distill": "False", "refit_full": "False", "keep_best_only": "False", "save_space": "True"}
+        with self.assertRaises(ValidationError) as context:
+            self.creation().check_not_slimmed(client, version)
+        self.assertEqual(context.exception.status_code, 409)
+
+        client.get_run.return_value.data.params = {"distill": "True", "save_space": "False"}
+        self.creation().check_not_slimmed(client, version)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from src.trainer.prefetch_model import fetch_into_cache, point_link
+
+class TestModelPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.downloads = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def download(self, artifact_uri, dst_path):
+        self.downloads.append(artifact_uri)
+        model_path = os.path.join(dst_path, "model")
+        os.makedirs(model_path)
+        with open(os.path.join(model_path, "MLmodel"), "w") as f:
+            f.write("flavors: {}")
+        return model_path
+
+    def test_miss_then_hit(self):
+        model_dir = os.path.join(self.tmp_dir.name, "testModel", "1-abc")
+
+        self.assertEqual(fetch_into_cache("models:/testModel/1", model_dir, self.download), "miss")
+        self.assertEqual(fetch_into_cache("models:/testModel/1", model_dir, self.download), "hit")
+        self.assertEqual(len(self.downloads), 1)
+        self.assertTrue(os.path.isfile(os.path.join(model_dir, "MLmodel")))
+        # No temporary download directory is left behind
+        self.assertEqual(os.listdir(os.path.dirname(model_dir)), ["1-abc"])
+
+    def test_point_link(self):
+        model_path = os.path.join(self.tmp_dir.name, "testModel")
+        os.makedirs(os.path.join(model_path, "1-abc"))
+        os.makedirs(os.path.join(model_path, "1-def"))
+        link_path = os.path.join(model_path, "1")
+
+        point_link(link_path, "1-abc")
+        point_link(link_path, "1-def")
+
+        self.assertEqual(os.readlink(link_path), "1-def")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,248 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from src.api import seldon_deployment
+from src.api.seldon_deployment import (
+    build_autoscaling_spec,
+    build_deployment_data,
+    build_protocol_spec,
+    derive_batch_prediction_resources,
+    derive_resource_requests,
+    get_model_cache_status,
+    get_predictor_url,
+    render_seldon_deployment,
+    validate_model_versions,
+)
+
+class TestSeldonDeploymentRendering(unittest.TestCase):
+
+    def render(self, params={}, resources=None):
+        autoscaling = build_autoscaling_spec(params)
+        data = build_deployment_data("testModel", "10.0.0.1", "5000", autoscaling=autoscaling, resources=resources)
+        return render_seldon_deployment(data)
+
+    def test_fixed_replicas(self):
+        deployment = self.render()
+        predictor = deployment["spec"]["predictors"][0]
+
+        self.assertEqual(deployment["metadata"]["name"], "laredo-server-testModel")
+        self.assertEqual(predictor["replicas"], 1)
+        self.assertNotIn("hpaSpec", predictor["componentSpecs"][0])
+        self.assertNotIn("kedaSpec", predictor["componentSpecs"][0])
+
+    def test_fixed_replicas_greater_than_one(self):
+        for params in [{"minReplicas": 3}, {"minReplicas": 3, "maxReplicas": 3}]:
+            predictor = self.render(params)["spec"]["predictors"][0]
+
+            self.assertEqual(predictor["replicas"], 3)
+            self.assertNotIn("hpaSpec", predictor["componentSpecs"][0])
+            self.assertNotIn("kedaSpec", predictor["componentSpecs"][0])
+
+    def test_cpu_autoscaling(self):
+        deployment = self.render({"minReplicas": 2, "maxReplicas": 5, "targetCpuUtilization": 60})
+        predictor = deployment["spec"]["predictors"][0]
+        hpa_spec = predictor["componentSpecs"][0]["hpaSpec"]
+
+        self.assertEqual(predictor["replicas"], 2)
+        self.assertEqual(hpa_spec["minReplicas"], 2)
+        self.assertEqual(hpa_spec["maxReplicas"], 5)
+        self.assertEqual(hpa_spec["metricsv2"][0]["resource"]["name"], "cpu")
+        self.assertEqual(hpa_spec["metricsv2"][0]["resource"]["target"]["averageUtilization"], 60)
+
+    def test_autoscaling_without_target_uses_default_cpu_target(self):
+        deployment = self.render({"minReplicas": 1, "maxReplicas": 3})
+        hpa_spec = deployment["spec"]["predictors"][0]["componentSpecs"][0]["hpaSpec"]
+
+        self.assertEqual(hpa_spec["metricsv2"][0]["resource"]["target"]["averageUtilization"], 80)
+
+    def test_request_rate_autoscaling(self):
+        deployment = self.render({"minReplicas": 1, "maxReplicas": 4, "targetRequestsPerSecond": 50})
+        component_spec = deployment["spec"]["predictors"][0]["componentSpecs"][0]
+        keda_spec = component_spec["kedaSpec"]
+
+        self.assertNotIn("hpaSpec", component_spec)
+        self.assertEqual(keda_spec["minReplicaCount"], 1)
+        self.assertEqual(keda_spec["maxReplicaCount"], 4)
+        self.assertEqual(keda_spec["triggers"][0]["type"], "prometheus")
+        self.assertEqual(keda_spec["triggers"][0]["metadata"]["threshold"], "50")
+        self.assertIn('deployment_name="laredo-server-testModel"', keda_spec["triggers"][0]["metadata"]["query"])
+
+    def test_resources(self):
+        resources = derive_resource_requests(artifact_size_bytes=300 * 2**20, latency_ms=30)
+        deployment = self.render(resources=resources)
+        container = deployment["spec"]["predictors"][0]["componentSpecs"][0]["spec"]["containers"][0]
+
+        self.assertEqual(container["resources"]["requests"]["cpu"], "500m")
+        self.assertEqual(container["resources"]["requests"]["memory"], "1152Mi")
+        self.assertEqual(container["resources"]["limits"]["memory"], "2304Mi")
+
+    def test_resources_unknown_model(self):
+        resources = derive_resource_requests()
+
+        self.assertEqual(resources["requests"], {"cpu": "500m", "memory": "1024Mi"})
+
+    def test_resources_grow_with_latency(self):
+        fast = derive_resource_requests(latency_ms=5)
+        slow = derive_resource_requests(latency_ms=1000)
+
+        self.assertEqual(fast["requests"]["cpu"], "250m")
+        self.assertEqual(slow["requests"]["cpu"], "2000m")
+
+    def test_batch_prediction_resources(self):
+        resources = derive_batch_prediction_resources(3, artifact_size_bytes=300 * 2**20)
+
+        self.assertEqual(resources["requests"], {"cpu": "3", "memory": "3456Mi"})
+        self.assertEqual(resources["limits"], {"cpu": "3", "memory": "6912Mi"})
+
+    def parameters(self, predictor):
+        return {parameter["name"]: parameter["value"] for parameter in predictor["graph"]["parameters"]}
+
+    @mock.patch.object(seldon_deployment, "MODEL_SERVER_LOADS_MODEL_URI", True)
+    def test_model_cache(self):
+        data = build_deployment_data("testModel", "10.0.0.1", "5000", model_version="3", prefetch_image="trainer:1.0")
+        pod_spec = render_seldon_deployment(data)["spec"]["predictors"][0]["componentSpecs"][0]["spec"]
+        init_container = pod_spec["initContainers"][0]
+        parameters = {
+            parameter["name"]: parameter["value"]
+            for parameter in render_seldon_deployment(data)["spec"]["predictors"][0]["graph"]["parameters"]
+        }
+
+        self.assertEqual(init_container["name"], "model-prefetch")
+        self.assertEqual(init_container["image"], "trainer:1.0")
+        self.assertIn({"name": "MODEL_VERSION", "value": "3"}, init_container["env"])
+        self.assertEqual(pod_spec["volumes"][0]["hostPath"]["path"], "/var/cache/laredo-models")
+        self.assertTrue(pod_spec["containers"][0]["volumeMounts"][0]["readOnly"])
+        self.assertEqual(parameters["model_uri"], "/var/cache/laredo-models/testModel/3")
+        self.assertEqual(parameters["model_version"], "3")
+
+    @mock.patch.object(seldon_deployment, "MODEL_SERVER_LOADS_MODEL_URI", True)
+    def test_model_uri_without_model_cache(self):
+        data = build_deployment_data("testModel", "10.0.0.1", "5000", model_version="3")
+        predictor = render_seldon_deployment(data)["spec"]["predictors"][0]
+
+        self.assertNotIn("initContainers", predictor["componentSpecs"][0]["spec"])
+        self.assertEqual(self.parameters(predictor)["model_uri"], "models:/testModel/3")
+
+    def test_without_model_cache(self):
+        pod_spec = self.render()["spec"]["predictors"][0]["componentSpecs"][0]["spec"]
+
+        self.assertNotIn("initContainers", pod_spec)
+        self.assertNotIn("volumes", pod_spec)
+
+    def test_server_without_model_uri(self):
+        # The server loads the latest version from MLflow, so prefetching the version would be wasted
+        data = build_deployment_data("testModel", "10.0.0.1", "5000", model_version="3", prefetch_image="trainer:1.0")
+        predictor = render_seldon_deployment(data)["spec"]["predictors"][0]
+
+        self.assertNotIn("initContainers", predictor["componentSpecs"][0]["spec"])
+        self.assertNotIn("model_uri", self.parameters(predictor))
+        self.assertEqual(predictor["componentSpecs"][0]["spec"]["containers"][0]["image"], seldon_deployment.MODEL_SERVER_IMAGE)
+
+    def test_validate_model_versions(self):
+        validate_model_versions("4", "4")
+        with self.assertRaises(ValueError):
+            validate_model_versions("3", "4")
+        with self.assertRaises(ValueError):
+            validate_model_versions("4", "4", shadow_version="3")
+        with mock.patch.object(seldon_deployment, "MODEL_SERVER_LOADS_MODEL_URI", True):
+            validate_model_versions("3", "4", shadow_version="2")
+
+    def test_model_cache_status(self):
+        def pod(name, terminated):
+            state = SimpleNamespace(terminated=terminated)
+            return SimpleNamespace(
+                metadata=SimpleNamespace(name=name),
+                spec=SimpleNamespace(node_name="node-1"),
+                status=SimpleNamespace(phase="Running", init_container_statuses=[SimpleNamespace(name="model-prefetch", state=state)]),
+            )
+        pods = [
+            pod("hit", SimpleNamespace(exit_code=0, reason="Completed", message=json.dumps({"cache": "hit"}))),
+            pod("miss", SimpleNamespace(exit_code=0, reason="Completed", message=json.dumps({"cache": "miss"}))),
+            pod("failed", SimpleNamespace(exit_code=1, reason="Error", message="")),
+            pod("pending", None),
+        ]
+        status = get_model_cache_status(pods)
+
+        self.assertEqual((status["cache_hits"], status["cache_misses"]), (1, 1))
+        self.assertEqual([replica["model_cache"]["cache"] for replica in status["replicas"]], ["hit", "miss", "failed", "pending"])
+
+    def test_default_protocol(self):
+        deployment = self.render()
+
+        self.assertEqual(deployment["spec"]["protocol"], "seldon")
+        self.assertEqual(deployment["spec"]["transport"], "rest")
+        self.assertEqual(deployment["spec"]["predictors"][0]["graph"]["endpoint"]["type"], "REST")
+
+    @mock.patch.object(seldon_deployment, "MODEL_SERVER_V2_IMAGE", "mlserver:1.0")
+    def test_protocols(self):
+        expected = {
+            "grpc": ("seldon", "grpc", "GRPC", seldon_deployment.MODEL_SERVER_IMAGE),
+            "V2": ("v2", "rest", "REST", "mlserver:1.0"),
+        }
+        for protocol, (spec_protocol, transport, endpoint_type, image) in expected.items():
+            data = build_deployment_data("testModel", "10.0.0.1", "5000", protocol=build_protocol_spec({"protocol": protocol}))
+            deployment = render_seldon_deployment(data)
+
+            self.assertEqual(deployment["spec"]["protocol"], spec_protocol)
+            self.assertEqual(deployment["spec"]["transport"], transport)
+            self.assertEqual(deployment["spec"]["predictors"][0]["graph"]["endpoint"]["type"], endpoint_type)
+            self.assertEqual(deployment["spec"]["predictors"][0]["componentSpecs"][0]["spec"]["containers"][0]["image"], image)
+
+    def test_v2_protocol_needs_server_image(self):
+        with self.assertRaises(ValueError):
+            build_protocol_spec({"protocol": "v2"})
+
+    def test_predictor_url(self):
+        self.assertEqual(
+            get_predictor_url("testModel", "shadow"),
+            "http://laredo-server-testModel-shadow.laredo.svc.cluster.local:8000/api/v1.0/predictions"
+        )
+        self.assertEqual(
+            get_predictor_url("testModel", "example", protocol="v2"),
+            "http://laredo-server-testModel-example.laredo.svc.cluster.local:8000/v2/models/classifier/infer"
+        )
+        with self.assertRaises(ValueError):
+            get_predictor_url("testModel", "example", transport="grpc")
+
+    def test_invalid_protocol(self):
+        for params in [{"protocol": "SOAP"}, {"protocol": 2}]:
+            with self.assertRaises(ValueError):
+                build_protocol_spec(params)
+
+    @mock.patch.object(seldon_deployment, "MODEL_SERVER_LOADS_MODEL_URI", True)
+    def test_shadow_predictor(self):
+        data = build_deployment_data(
+            "testModel", "10.0.0.1", "5000", model_version="3", shadow_version="4",
+            resources=derive_resource_requests(latency_ms=5), shadow_resources=derive_resource_requests(latency_ms=1000)
+        )
+        main, shadow = render_seldon_deployment(data)["spec"]["predictors"]
+        cpu_request = lambda predictor: predictor["componentSpecs"][0]["spec"]["containers"][0]["resources"]["requests"]["cpu"]
+
+        self.assertEqual((main["name"], shadow["name"]), ("example", "shadow"))
+        self.assertNotIn("shadow", main)
+        self.assertTrue(shadow["shadow"])
+        self.assertEqual((self.parameters(main)["model_uri"], self.parameters(shadow)["model_uri"]), ("models:/testModel/3", "models:/testModel/4"))
+        self.assertEqual((cpu_request(main), cpu_request(shadow)), ("250m", "2000m"))
+
+    def test_without_shadow_predictor(self):
+        self.assertEqual(len(self.render()["spec"]["predictors"]), 1)
+
+    def test_invalid_autoscaling(self):
+        invalid_params = [
+            {"minReplicas": 0},
+            {"minReplicas": 3, "maxReplicas": 2},
+            {"minReplicas": "2"},
+            {"maxReplicas": 3, "targetCpuUtilization": 150},
+            {"maxReplicas": 3, "targetRequestsPerSecond": -1},
+            {"maxReplicas": 3, "targetCpuUtilization": 50, "targetRequestsPerSecond": 10},
+            {"minReplicas": 3, "targetCpuUtilization": 50},
+            {"minReplicas": 2, "maxReplicas": 2, "targetRequestsPerSecond": 10},
+        ]
+        for params in invalid_params:
+            with self.assertRaises(ValueError):
+                build_autoscaling_spec(params)
+
+
+if __name__ == '__main__':
+    unittest.main()
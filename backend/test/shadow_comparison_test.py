@@ -0,0 +1,54 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+from src.api.shadow_comparison import LIVE_LATENCY_WINDOW_PATTERN, build_payload, disagreement_rate, extract_predictions, replay
+
+class TestShadowComparison(unittest.TestCase):
+
+    def fake_post(self, predictions):
+        '''
+        Fake requests.post answering with the prediction of each row given by its url
+        '''
+        def post(url, json, timeout):
+            values = [predictions[url](row) for row in json["data"]["ndarray"]]
+            return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"data": {"names": [], "ndarray": values}})
+        return post
+
+    def test_extract_predictions(self):
+        self.assertEqual(extract_predictions({"data": {"ndarray": [1, 0, 1]}}).shape, (3, 1))
+        self.assertEqual(extract_predictions({"data": {"tensor": {"shape": [2, 2], "values": [0.1, 0.9, 0.8, 0.2]}}}).shape, (2, 2))
+        self.assertEqual(extract_predictions({"outputs": [{"name": "output-0", "shape": [3], "data": [1, 0, 1]}]}).shape, (3, 1))
+
+    def test_v2_payload(self):
+        payload = build_payload([[1, "a"], [2.5, "b"]], names=["x", "y"], protocol="v2")
+
+        self.assertEqual(payload["parameters"], {"content_type": "pd"})
+        self.assertEqual(payload["inputs"][0], {"name": "x", "shape": [2], "datatype": "FP64", "data": [1, 2.5]})
+        self.assertEqual(payload["inputs"][1]["datatype"], "BYTES")
+        self.assertEqual(build_payload([[1, 2], [3, 4]], protocol="v2")["inputs"][0]["shape"], [2, 2])
+
+    def test_live_latency_window(self):
+        for window in ("30s", "15m", "2h", "1d", "1w"):
+            self.assertTrue(LIVE_LATENCY_WINDOW_PATTERN.fullmatch(window))
+        for window in ("15", "m", "1h30m", '15m])) or vector(1) #', "15m\n"):
+            self.assertFalse(LIVE_LATENCY_WINDOW_PATTERN.fullmatch(window))
+
+    def test_disagreement_rate(self):
+        self.assertEqual(disagreement_rate(np.array([[1], [2], [3], [4]]), np.array([[1], [2], [0], [4]])), 0.25)
+        self.assertEqual(disagreement_rate(np.array([[0.5]]), np.array([[0.5 + 1e-9]])), 0.0)
+        self.assertEqual(disagreement_rate(np.array([["a"], ["b"]]), np.array([["a"], ["c"]])), 0.5)
+
+    def test_replay(self):
+        post = self.fake_post({"main": lambda row: row[0] > 0, "shadow": lambda row: row[0] > 1})
+        rows = [[0], [1], [2], [3]]
+        result = replay(rows, "main", "shadow", batch_size=3, post=post)
+
+        self.assertEqual(result["rows"], 4)
+        self.assertEqual(result["main"]["requests"], 2)
+        self.assertEqual(result["shadow"]["requests"], 2)
+        self.assertEqual(result["disagreement_rate"], 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+from src.utils.creation_types import ModelBasicCreation
+
+class FakePredictor:
+    '''
+    TabularPredictor-like predictor whose models are files of its directory
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.model_best = "WeightedEnsemble_L2"
+        self.predict_calls = 0
+        self.deleted_models = False
+        for name, size in (("WeightedEnsemble_L2", 100), ("LightGBM", 1000), ("utils", 500)):
+            with open(os.path.join(path, name), "wb") as f:
+                f.write(b"0" * size)
+
+    def predict(self, model_input):
+        self.predict_calls += 1
+        return pd.Series([0] * len(model_input))
+
+    def delete_models(self, models_to_keep, dry_run):
+        self.deleted_models = True
+        os.remove(os.path.join(self.path, "LightGBM"))
+
+    def save_space(self):
+        os.remove(os.path.join(self.path, "utils"))
+
+@mock.patch("mlflow.log_params")
+@mock.patch("mlflow.log_metrics")
+class TestSlimPredictor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.predictor = FakePredictor(self.tmp_dir.name)
+        self.x_test = pd.DataFrame({"x": range(5)})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def creation(self, **params):
+        params = {
+            "modelName": "testModel", "problemType": "binary", "datasetURL": "", "columnsDataType": {}, "target": "y",
+            "preset": "medium_quality", "evalMetric": "accuracy", "timeLimit": 60, **params
+        }
+        return ModelBasicCreation(None, **params)
+
+    def test_slimming_disabled(self, log_metrics, log_params):
+        self.creation().slim_predictor(self.predictor, self.x_test)
+
+        self.assertEqual(self.predictor.predict_calls, 0)
+        log_metrics.assert_not_called()
+        log_params.assert_not_called()
+
+    def test_keep_best_only_and_save_space(self, log_metrics, log_params):
+        self.creation(keepBestOnly=True, saveSpace=True).slim_predictor(self.predictor, self.x_test)
+        metrics = log_metrics.call_args.args[0]
+
+        self.assertTrue(self.predictor.deleted_models)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["WeightedEnsemble_L2"])
+        self.assertEqual(metrics["artifact_size_mb_before_slimming"], 1600 / 2**20)
+        self.assertEqual(metrics["artifact_size_mb"], 100 / 2**20)
+        self.assertIn("inference_latency_ms", metrics)
+        self.assertEqual(log_params.call_args.args[0], {"distill": False, "refit_full": False, "keep_best_only": True, "save_space": True})
+
+
+if __name__ == '__main__':
+    unittest.main()
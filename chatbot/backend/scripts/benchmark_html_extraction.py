@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark_html_extraction.py
+
+Benchmark of the parsing of web documentation pages by WebLoader.
+Compares, per page, the original parsing (BeautifulSoup tree of the whole page and a
+Markdownify transformer per page, kept in tests/html_extraction_test.py as the
+reference) with the fast extraction path (src/utils/html_extractor.py and a shared
+markdown converter), and checks that both produce the same document.
+
+The pages are read from a directory of saved .html files; --save downloads the pages
+of DOCS_URL into it first. Without saved pages, the sample pages of the test are used.
+
+Usage:
+    python benchmark_html_extraction.py [--pages-dir PAGES_DIR] [--save] [--repeats N]
+
+Arguments:
+    --pages-dir     Directory of saved .html pages (default: ../web_samples)
+    --save          Download the pages of DOCS_URL into the directory before the benchmark
+    --repeats       Parses of each page per path (default: 5)
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+import requests
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config.config_url import DOCS_URL
+from src.utils.html_extractor import extract_article
+from src.utils.web_loader import WebLoader
+from tests.html_extraction_test import SAMPLE_PAGES, legacy_parse_page
+
+
+def save_pages(pages_dir: str) -> None:
+    """
+    Downloads the pages of DOCS_URL into the directory, named after the URL.
+
+    Args:
+        pages_dir (str): Directory where the pages are saved.
+    """
+    os.makedirs(pages_dir, exist_ok=True)
+    with requests.Session() as session:
+        for url in DOCS_URL:
+            response = session.get(url, timeout=10)
+            response.raise_for_status()
+            name = f"{url.rstrip('/').split('/')[-1] or 'index'}-{hashlib.sha256(url.encode()).hexdigest()[:8]}"
+            with open(os.path.join(pages_dir, f"{name}.html"), "w", encoding="utf-8") as file:
+                file.write(response.text)
+            print(f"Saved {url}")
+
+
+def load_pages(pages_dir: str) -> Dict[str, str]:
+    """
+    Reads the saved pages of the directory, or returns the sample pages of the test.
+
+    Returns:
+        Dict[str, str]: HTML content of each page, by name.
+    """
+    if os.path.isdir(pages_dir):
+        pages = {}
+        for file_name in sorted(os.listdir(pages_dir)):
+            if file_name.endswith(".html"):
+                with open(os.path.join(pages_dir, file_name), encoding="utf-8") as file:
+                    pages[file_name] = file.read()
+        if pages:
+            return pages
+    print(f"No saved pages in {pages_dir}, using the sample pages of tests/html_extraction_test.py")
+    return dict(SAMPLE_PAGES)
+
+
+def measure(parse: Callable[[str, str], object], pages: Dict[str, str], repeats: int) -> float:
+    """
+    Returns the best time, in milliseconds, of a pass of the parser over every page.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for name, html in pages.items():
+            parse(f"https://example.com/{name}", html)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> int:
+    """
+    Main entry point for the script.
+
+    Returns:
+        int: 0 on success, 1 if the paths produce different documents.
+    """
+    parser = argparse.ArgumentParser(description="Web page parsing benchmark")
+    parser.add_argument(
+        "--pages-dir",
+        type=str,
+        default=os.path.join(os.path.dirname(__file__), "..", "web_samples"),
+        help="Directory of saved .html pages (default: ../web_samples)",
+    )
+    parser.add_argument("--save", action="store_true", help="Download the pages of DOCS_URL first")
+    parser.add_argument("--repeats", type=int, default=5, help="Parses of each page per path (default: 5)")
+    args = parser.parse_args()
+
+    pages_dir = os.path.abspath(args.pages_dir)
+    if args.save:
+        save_pages(pages_dir)
+    pages = load_pages(pages_dir)
+    loader = WebLoader(urls=[], use_cache=False)
+
+    mismatches = [
+        name for name, html in pages.items()
+        if loader._parse_page(f"https://example.com/{name}", html)
+        != legacy_parse_page(f"https://example.com/{name}", html)
+    ]
+
+    total_mb = sum(len(html.encode("utf-8")) for html in pages.values()) / 1e6
+    print(f"Pages: {len(pages)}, {total_mb:.2f} MB")
+    print(f"{'path':<28}{'total (ms)':>12}{'ms/page':>10}")
+    results = {
+        "original (soup + transformer)": measure(legacy_parse_page, pages, args.repeats),
+        "fast extraction only": measure(lambda url, html: extract_article(html), pages, args.repeats),
+        "fast (extraction + convert)": measure(loader._parse_page, pages, args.repeats),
+    }
+    for name, milliseconds in results.items():
+        print(f"{name:<28}{milliseconds:>12.1f}{milliseconds / len(pages):>10.2f}")
+    print(f"Speedup: {results['original (soup + transformer)'] / results['fast (extraction + convert)']:.2f}x")
+
+    if mismatches:
+        print(f"✗ {len(mismatches)} pages differ from the original parsing: {mismatches}")
+        return 1
+    print("✓ Documents match the original parsing")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark_markdown_cleaner.py
+
+Throughput benchmark of the Markdown cleaning used by DocumentManager (plain_words_only).
+Compares the original cleaning (17 sequential re.sub calls, kept in
+tests/markdown_cleaner_test.py as the golden reference) with clean_markdown
+(src/utils/markdown_cleaner.py) over the sections of the docs corpus, and checks that
+both produce the same output.
+
+Usage:
+    python benchmark_markdown_cleaner.py [--docs-path DOCS_PATH] [--repeats N]
+
+Arguments:
+    --docs-path     Path to the documentation directory (default: ../docs)
+    --repeats       Passes over the corpus per cleaner (default: 20)
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, List
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from langchain.text_splitter import MarkdownTextSplitter
+
+from src.config.config_init import MARKDOWN_SPLITTER_CONFIG
+from src.utils.markdown_cleaner import clean_markdown
+from tests.markdown_cleaner_test import legacy_process_section
+
+
+def load_sections(docs_path: str) -> List[str]:
+    """
+    Splits the Markdown files of the docs directory into sections, as DocumentManager does.
+
+    Args:
+        docs_path (str): Path to the documentation directory.
+
+    Returns:
+        List[str]: The sections of every Markdown file.
+    """
+    splitter = MarkdownTextSplitter(**MARKDOWN_SPLITTER_CONFIG)
+    sections = []
+    for root, _, files in os.walk(docs_path):
+        for file_name in sorted(files):
+            if file_name.endswith(".md"):
+                with open(os.path.join(root, file_name), encoding="utf-8") as file:
+                    sections.extend(splitter.split_text(file.read()))
+    return sections
+
+
+def measure(cleaner: Callable[[str], str], sections: List[str], repeats: int) -> float:
+    """
+    Measures the best time of a pass of the cleaner over all the sections.
+
+    Returns:
+        float: Seconds of the fastest pass.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for section in sections:
+            cleaner(section)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    """
+    Main entry point for the script.
+
+    Returns:
+        int: 0 on success, 1 if the cleaners produce different outputs.
+    """
+    parser = argparse.ArgumentParser(description="Markdown cleaning throughput benchmark")
+    parser.add_argument(
+        "--docs-path",
+        type=str,
+        default=os.path.join(os.path.dirname(__file__), "..", "docs"),
+        help="Path to the documentation directory (default: ../docs)",
+    )
+    parser.add_argument("--repeats", type=int, default=20, help="Passes over the corpus per cleaner (default: 20)")
+    args = parser.parse_args()
+
+    sections = load_sections(os.path.abspath(args.docs_path))
+    total_mb = sum(len(section.encode("utf-8")) for section in sections) / 1e6
+    mismatches = sum(clean_markdown(section) != legacy_process_section(section) for section in sections)
+
+    print(f"Corpus: {len(sections)} sections, {total_mb:.2f} MB")
+    print(f"{'cleaner':<16}{'time (ms)':>12}{'sections/s':>14}{'MB/s':>10}")
+    results = {}
+    for name, cleaner in [("re.sub chain", legacy_process_section), ("clean_markdown", clean_markdown)]:
+        seconds = measure(cleaner, sections, args.repeats)
+        results[name] = seconds
+        print(f"{name:<16}{seconds * 1000:>12.2f}{len(sections) / seconds:>14.0f}{total_mb / seconds:>10.2f}")
+    print(f"Speedup: {results['re.sub chain'] / results['clean_markdown']:.2f}x")
+
+    if mismatches:
+        print(f"✗ {mismatches} sections differ from the original cleaning")
+        return 1
+    print("✓ Outputs match the original cleaning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
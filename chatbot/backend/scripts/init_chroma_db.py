@@ -7,12 +7,36 @@ before containerization. This avoids the overhead of database initialization dur
 container startup.
 
 Usage:
-    python init_chroma_db.py [--docs-path DOCS_PATH] [--db-path DB_PATH] [--no-reset]
+    python init_chroma_db.py [--docs-path DOCS_PATH] [--db-path DB_PATH] [--reset]
+                             [--embedding-cache-path CACHE_PATH] [--batch-size N]
+                             [--concurrency N] [--requests-per-minute N]
+                             [--checkpoint-path CHECKPOINT_PATH] [--crawl] [--stream]
+                             [--dedup-threshold THRESHOLD] [--unified]
 
 Arguments:
     --docs-path     Path to the documentation directory (default: ../backend/docs)
     --db-path       Path where the Chroma database will be stored (default: ../backend/database)
-    --no-reset      Don't delete existing database; append to it instead (default: delete and recreate)
+    --reset         Delete the existing database and embed every document again
+                    (default: update it, embedding only new or changed chunks)
+    --embedding-cache-path
+                    SQLite file caching the computed embeddings, kept across resets
+                    (default: ../embedding_cache/embeddings.sqlite)
+    --batch-size    Chunks per embedding request and per write (default: 64)
+    --concurrency   Maximum embedding requests in flight to Ollama (default: 4)
+    --requests-per-minute
+                    Maximum embedding requests per minute, 0 for no limit (default: 600)
+    --checkpoint-path
+                    JSON file recording the written batches; an interrupted run started
+                    again resumes after the last written batch (default: ../database.ingestion.json)
+    --crawl         Also crawl the pages of the documentation sitemaps (DOCS_SITEMAPS)
+    --stream        Load, split, embed and write the documents at the same time through
+                    bounded queues, instead of loading the whole corpus first
+    --dedup-threshold
+                    Estimated Jaccard similarity from which a chunk is dropped as a
+                    near-duplicate of another local or web chunk, 0 to keep every chunk
+                    (default: 0, or DEDUPLICATION_THRESHOLD if DEDUPLICATION_ENABLED=true)
+    --unified       Index local and web chunks in a single collection ('documents'), tagged
+                    with their source type, for the backend's UNIFIED_COLLECTION_ENABLED mode
 
 Example:
     # Initialize with default paths (docs from ../backend/docs, output to ../backend/database)
@@ -21,8 +45,8 @@ Example:
     # Use custom paths
     python init_chroma_db.py --docs-path /path/to/docs --db-path /path/to/database
 
-    # Append to existing database instead of recreating
-    python init_chroma_db.py --no-reset
+    # Delete the existing database and rebuild it from scratch
+    python init_chroma_db.py --reset
 """
 
 import sys
@@ -30,13 +54,15 @@ import os
 import argparse
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from langchain_core.documents import Document
+from src.config.config_init import DEDUPLICATION_CONFIG, INGESTION_CONFIG, UNIFIED_COLLECTION_CONFIG
 from src.config.config_url import DOCS_URL
+from src.utils.embedding_cache import CachedEmbeddings
 from src.utils.embedding_manager import EmbeddingManager
 from src.utils.document_manager import DocumentManager
 from src.utils.ollama_model_manager import ModelManager as OllamaModelManager
@@ -52,7 +78,15 @@ class ChromaDatabaseInitializer:
         self,
         docs_path: str = "./docs",
         db_path: str = "./database",
-        reset_database: bool = True,
+        reset_database: bool = False,
+        embedding_cache_path: Optional[str] = None,
+        ingestion_options: Optional[Dict[str, Any]] = None,
+        crawl: bool = False,
+        streaming: bool = False,
+        deduplication_threshold: Optional[float] = (
+            DEDUPLICATION_CONFIG["threshold"] if DEDUPLICATION_CONFIG["enabled"] else None
+        ),
+        unified: bool = False,
     ) -> None:
         """
         Initialize the ChromaDatabaseInitializer.
@@ -60,11 +94,27 @@ class ChromaDatabaseInitializer:
         Args:
             docs_path (str): Path to the documentation directory.
             db_path (str): Path where the Chroma database will be stored.
-            reset_database (bool): Whether to delete and recreate the database (True) or append (False).
+            reset_database (bool): Whether to delete and recreate the database (True) or update
+                it with only the new, changed and deleted chunks (False).
+            embedding_cache_path (Optional[str]): SQLite file of the embedding cache.
+            ingestion_options (Optional[Dict[str, Any]]): Arguments of the IngestionEngine
+                (batch_size, concurrency, requests_per_minute, checkpoint_path).
+            crawl (bool): Whether to also crawl the documentation sitemaps (DOCS_SITEMAPS).
+            streaming (bool): Whether to index the documents as a stream (load, split, embed and
+                write at the same time, see IngestionPipeline) instead of step by step.
+            deduplication_threshold (Optional[float]): Similarity from which near-duplicate chunks
+                are dropped before embedding (see ChunkDeduplicator), None to keep every chunk.
+            unified (bool): Whether to index local and web chunks in a single collection.
         """
         self.docs_path = docs_path
         self.db_path = db_path
         self.reset_database = reset_database
+        self.embedding_cache_path = embedding_cache_path
+        self.ingestion_options = ingestion_options
+        self.crawl = crawl
+        self.streaming = streaming
+        self.deduplication_threshold = deduplication_threshold
+        self.unified = unified
         self.embedding_manager: Optional[EmbeddingManager] = None
 
         # Validate paths
@@ -77,7 +127,7 @@ class ChromaDatabaseInitializer:
         if self.reset_database:
             logger.info("Database will be reset (deleted and recreated)")
         else:
-            logger.info("Database will be appended to (not reset)")
+            logger.info("Database will be updated incrementally (only changed chunks are embedded)")
 
     def initialize(self) -> None:
         """
@@ -97,32 +147,79 @@ class ChromaDatabaseInitializer:
                 directory_path=self.docs_path,
                 web_paths=DOCS_URL,  # No web documents for pre-initialization
                 plain_words_only=True,
+                crawl=self.crawl,
+                streaming=self.streaming,
             )
-            local_sections = document_manager.local_sections
-            logger.info(
-                f"✓ Loaded and split documents into {len(local_sections)} sections"
-            )
+            if self.streaming:
+                local_sections: Iterable[Document] = document_manager.iter_local_documents()
+                web_documents: Iterable[Document] = document_manager.iter_web_documents()
+                logger.info("✓ Documents will be loaded and split while they are embedded")
+            else:
+                local_sections = document_manager.local_sections
+                web_documents = document_manager.web_sections
+                logger.info(
+                    f"✓ Loaded and split documents into {len(document_manager.local_sections)} sections"
+                )
 
             # Step 3: Initialize Chroma database with embeddings
             logger.info(
                 "Step 3/3: Creating Chroma database and embedding documents (this may take a while)..."
             )
 
-            # Create empty web documents list for compatibility
-            # empty_web_documents: List[Document] = []
-            web_documents: List[Document] = document_manager.web_sections
-
-            # If reset_database is False, we need to modify the EmbeddingManager to not reset
-            # For now, we'll create a custom embedding manager that respects the reset flag
             self.embedding_manager = self._create_embedding_manager(
                 embedding_model, local_sections, web_documents
             )
 
+            for collection_name, stats in self.embedding_manager.index_stats.items():
+                logger.info(
+                    f"Collection '{collection_name}': {stats['added']} added, "
+                    f"{stats['deleted']} deleted, {stats['unchanged']} unchanged"
+                )
+            deduplicator = self.embedding_manager.deduplicator
+            if deduplicator:
+                stats = deduplicator.stats
+                logger.info(
+                    f"Deduplication: {stats['duplicates']} of {stats['chunks']} chunks and "
+                    f"{stats['tokens_saved']} of {stats['tokens']} tokens not embedded "
+                    f"(threshold {deduplicator.threshold})"
+                )
+            for collection_name, stats in self.embedding_manager.pipeline_stats.items():
+                logger.info(
+                    f"Pipeline of '{collection_name}': {stats['total']['sections']} sections in "
+                    f"{stats['total']['seconds']:.2f}s ({stats['total']['sections_per_sec']:.1f} sections/sec)"
+                )
+                for stage in ("load", "split", "embed", "write"):
+                    stage_stats = stats[stage]
+                    queue_info = (
+                        f", input queue {stage_stats['queue_mean']:.1f}/{stage_stats['queue_size']} on average"
+                        if "queue_mean" in stage_stats
+                        else ""
+                    )
+                    logger.info(
+                        f"  {stage}: {stage_stats['items']} items, {stage_stats['items_per_sec']:.1f}/sec"
+                        f"{queue_info}"
+                    )
+            for collection_name, stats in self.embedding_manager.ingestion_engine.stats.items():
+                logger.info(
+                    f"Ingestion of '{collection_name}': {stats['chunks']} chunks, {stats['tokens']} tokens "
+                    f"in {stats['seconds']:.2f}s ({stats['chunks_per_sec']:.1f} chunks/sec, "
+                    f"{stats['tokens_per_sec']:.1f} tokens/sec)"
+                )
+            embedding_model = self.embedding_manager.embedding_model
+            if isinstance(embedding_model, CachedEmbeddings):
+                cache_stats = embedding_model.stats()["document"]
+                logger.info(
+                    f"Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                    f"(hit ratio {cache_stats['hit_ratio']:.1%})"
+                )
             logger.info("✓ Chroma database initialized successfully")
             logger.info(
                 f"Database location: {os.path.abspath(self.db_path)}"
             )
-            logger.info(f"Collections created: 'local_documents', 'web_documents'")
+            if self.unified:
+                logger.info(f"Collection created: '{UNIFIED_COLLECTION_CONFIG['collection_name']}'")
+            else:
+                logger.info(f"Collections created: 'local_documents', 'web_documents'")
             logger.success = True  # Mark as successful
 
         except Exception as e:
@@ -132,11 +229,11 @@ class ChromaDatabaseInitializer:
     def _create_embedding_manager(
         self,
         embedding_model: any,
-        local_documents: List[Document],
-        web_documents: List[Document],
+        local_documents: Iterable[Document],
+        web_documents: Iterable[Document],
     ) -> EmbeddingManager:
         """
-        Creates an EmbeddingManager with optional reset control.
+        Creates an EmbeddingManager that resets the database or updates it incrementally.
 
         Args:
             embedding_model: The embeddings model to use.
@@ -146,22 +243,19 @@ class ChromaDatabaseInitializer:
         Returns:
             EmbeddingManager: The initialized embedding manager.
         """
-        # Create a custom EmbeddingManager that respects the reset_database flag
-        # We'll handle this by temporarily modifying the reset behavior
-        embedding_manager = EmbeddingManager(
+        return EmbeddingManager(
             embedding_model=embedding_model,
             local_documents=local_documents,
             web_documents=web_documents,
             persist_directory=self.db_path,
+            reset=self.reset_database,
+            embedding_cache_path=self.embedding_cache_path,
+            ingestion_options=self.ingestion_options,
+            streaming=self.streaming,
+            deduplication_threshold=self.deduplication_threshold,
+            unified=self.unified,
         )
 
-        # Note: EmbeddingManager._reset_database is called in __init__
-        # Since we initialized with default reset=True, it will reset the database
-        # If we need --no-reset, we'd need to modify EmbeddingManager to support this
-        # For now, the simple approach is to always reset during pre-initialization
-
-        return embedding_manager
-
 
 def main() -> int:
     """
@@ -181,8 +275,8 @@ Examples:
   # Use custom paths
   python init_chroma_db.py --docs-path /path/to/docs --db-path /path/to/database
 
-  # Append to existing database instead of recreating
-  python init_chroma_db.py --no-reset
+  # Delete the existing database and rebuild it from scratch
+  python init_chroma_db.py --reset
         """,
     )
 
@@ -201,9 +295,71 @@ Examples:
     )
 
     parser.add_argument(
-        "--no-reset",
+        "--reset",
+        action="store_true",
+        help="Delete the existing database and embed every document again (default: incremental update)",
+    )
+
+    parser.add_argument(
+        "--embedding-cache-path",
+        type=str,
+        default=os.path.join(os.path.dirname(__file__), "..", "embedding_cache", "embeddings.sqlite"),
+        help="SQLite file caching the computed embeddings (default: ../embedding_cache/embeddings.sqlite)",
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=INGESTION_CONFIG["batch_size"],
+        help=f"Chunks per embedding request and per write (default: {INGESTION_CONFIG['batch_size']})",
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=INGESTION_CONFIG["concurrency"],
+        help=f"Maximum embedding requests in flight (default: {INGESTION_CONFIG['concurrency']})",
+    )
+
+    parser.add_argument(
+        "--requests-per-minute",
+        type=float,
+        default=INGESTION_CONFIG["requests_per_minute"],
+        help=f"Maximum embedding requests per minute, 0 for no limit (default: {INGESTION_CONFIG['requests_per_minute']})",
+    )
+
+    parser.add_argument(
+        "--checkpoint-path",
+        type=str,
+        default=os.path.join(os.path.dirname(__file__), "..", "database.ingestion.json"),
+        help="JSON file recording the written batches, to resume interrupted runs (default: ../database.ingestion.json)",
+    )
+
+    parser.add_argument(
+        "--crawl",
         action="store_true",
-        help="Don't delete existing database; append to it instead (default: reset)",
+        help="Also crawl the pages of the documentation sitemaps (DOCS_SITEMAPS), recrawling only the changed ones",
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Load, split, embed and write the documents at the same time, with bounded memory",
+    )
+
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEDUPLICATION_CONFIG["threshold"] if DEDUPLICATION_CONFIG["enabled"] else 0,
+        help="Similarity from which near-duplicate chunks are dropped before embedding, 0 to keep every chunk "
+        "(default: 0, or DEDUPLICATION_THRESHOLD if DEDUPLICATION_ENABLED=true)",
+    )
+
+    parser.add_argument(
+        "--unified",
+        action="store_true",
+        default=UNIFIED_COLLECTION_CONFIG["enabled"],
+        help="Index local and web chunks in a single collection, for UNIFIED_COLLECTION_ENABLED=true",
     )
 
     args = parser.parse_args()
@@ -211,7 +367,14 @@ Examples:
     # Resolve paths to absolute
     docs_path = os.path.abspath(args.docs_path)
     db_path = os.path.abspath(args.db_path)
-    reset_database = not args.no_reset
+    reset_database = args.reset
+    embedding_cache_path = os.path.abspath(args.embedding_cache_path)
+    ingestion_options = {
+        "batch_size": args.batch_size,
+        "concurrency": args.concurrency,
+        "requests_per_minute": args.requests_per_minute or None,
+        "checkpoint_path": os.path.abspath(args.checkpoint_path),
+    }
 
     logger.info("=" * 80)
     logger.info("Chroma Database Pre-Initialization Script")
@@ -219,11 +382,28 @@ Examples:
     logger.info(f"Documentation path: {docs_path}")
     logger.info(f"Database path: {db_path}")
     logger.info(f"Reset existing database: {reset_database}")
+    logger.info(f"Embedding cache path: {embedding_cache_path}")
+    logger.info(f"Crawl documentation sitemaps: {args.crawl}")
+    logger.info(f"Streaming ingestion: {args.stream}")
+    logger.info(f"Near-duplicate threshold: {args.dedup_threshold or 'disabled'}")
+    logger.info(f"Unified collection: {args.unified}")
+    logger.info(
+        f"Ingestion: batches of {args.batch_size} chunks, {args.concurrency} concurrent requests, "
+        f"checkpoint at {ingestion_options['checkpoint_path']}"
+    )
     logger.info("=" * 80)
 
     try:
         initializer = ChromaDatabaseInitializer(
-            docs_path=docs_path, db_path=db_path, reset_database=reset_database
+            docs_path=docs_path,
+            db_path=db_path,
+            reset_database=reset_database,
+            embedding_cache_path=embedding_cache_path,
+            ingestion_options=ingestion_options,
+            crawl=args.crawl,
+            streaming=args.stream,
+            deduplication_threshold=args.dedup_threshold or None,
+            unified=args.unified,
         )
         initializer.initialize()
 
@@ -8,17 +8,30 @@ API keys, models, documents, and embeddings before the main process begins.
 """
 
 import os
-from typing import List
+from typing import Dict, List, Optional, Set
+
+from langchain_core.documents import Document
+
+from src.config.config_init import DIRECTORY_WATCHER_CONFIG
+from src.utils.directory_loader import DirectoryLoader
+from src.utils.directory_watcher import DirectoryWatcher
 from src.utils.key_manager import KeyManager
 from src.utils.gemini_model_manager import ModelManager
 from src.utils.ollama_model_manager import ModelManager as OllamaModelManager
 from src.utils.embedding_manager import EmbeddingManager
 from src.utils.document_manager import DocumentManager
 from src.utils.logger_manager import logger
+from src.utils.section_splitter import split_documents
 
 
 class CoreInitializer:
-    def __init__(self, docs_path: str, web_paths: List[str], skip_db_init: bool = False) -> None:
+    def __init__(
+        self,
+        docs_path: str,
+        web_paths: List[str],
+        skip_db_init: bool = False,
+        watch_docs: bool = DIRECTORY_WATCHER_CONFIG["enabled"],
+    ) -> None:
         """
         Initializes the application with paths for local and web documents.
 
@@ -27,6 +40,8 @@ class CoreInitializer:
             web_paths (List[str]): List of URLs to web documents.
             skip_db_init (bool): If True and database exists, skip database initialization.
                                 If False, always initialize the database. Defaults to False.
+            watch_docs (bool): If True, changes to the local documents are applied to the local
+                collection while the application runs (see DirectoryWatcher).
         """
         self._docs_path: str = docs_path
         self._web_paths: List[str] = web_paths
@@ -35,6 +50,8 @@ class CoreInitializer:
         self._document_manager: DocumentManager | None = None
         self._embedding_manager: EmbeddingManager | None = None
         self._ollama_model_manager: OllamaModelManager | None = None
+        self._watch_docs: bool = watch_docs
+        self._directory_watcher: Optional[DirectoryWatcher] = None
 
     def initialize(self) -> None:
         """
@@ -73,8 +90,17 @@ class CoreInitializer:
                     embedding_model=self._ollama_model_manager.embeddings,
                     local_documents=self._document_manager.local_sections,
                     web_documents=self._document_manager.web_sections,
+                    plain_words_only=self._document_manager.plain_words_only,
                 )
 
+            if self._watch_docs:
+                # The files as they were indexed, so that changes made meanwhile are applied
+                file_stats = self._document_manager.local_file_stats if self._document_manager else None
+                self._directory_watcher = DirectoryWatcher(
+                    self._docs_path, self._on_docs_changed, file_stats=file_stats
+                )
+                self._directory_watcher.start()
+
             # Log successful initialization
             logger.info("Core initialized successfully.")
         except Exception as e:
@@ -82,6 +108,28 @@ class CoreInitializer:
             logger.error(f"Error during core initialization: {e}")
             raise
 
+    def _on_docs_changed(self, changed: Set[str], deleted: Set[str]) -> None:
+        """
+        Updates the chunks of the changed and deleted local documents in the local collection,
+        split like the indexed documents and deduplicated by the EmbeddingManager.
+
+        Args:
+            changed (Set[str]): The added or modified files, relative to the docs path.
+            deleted (Set[str]): The deleted files, relative to the docs path.
+        """
+        documents = DirectoryLoader(self._docs_path).read_documents(sorted(changed))
+        sections_by_source: Dict[str, List[Document]] = {file_name: [] for file_name in deleted}
+        sections_by_source.update({document.metadata["file_name"]: [] for document in documents})
+        for section in split_documents(documents, self.embedding_manager.plain_words_only):
+            sections_by_source[section.metadata["file_name"]].append(section)
+        self.embedding_manager.update_local_sources(sections_by_source)
+
+    def stop_watching(self) -> None:
+        """Stops watching the local documents, if they are watched."""
+        if self._directory_watcher:
+            self._directory_watcher.stop()
+            self._directory_watcher = None
+
     def _database_exists(self) -> bool:
         """
         Checks if a Chroma database already exists at the default location.
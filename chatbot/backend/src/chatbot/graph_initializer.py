@@ -173,39 +173,23 @@ class GraphInitializer:
             language=language,
         )
 
-    def search_local(self, state: SearchState) -> GenerationState:
+    def search(self, state: SearchState) -> GenerationState:
         """
-        Searches local documents for relevant context based on the user's question.
+        Searches the local and web documents for relevant context based on the user's question,
+        embedding the question once (see EmbeddingManager.query_sources).
 
         Args:
             state (State): The current state containing the user's question.
 
         Returns:
-            dict: A dictionary containing the local search results added to the local context.
+            dict: A dictionary containing the local and web search results added to their contexts.
         """
         question = state["question"].content  # type: ignore
 
-        local_docs = self._embedding_manager.query_local_embeddings(
-            query=question, k=K_LOCAL_SEARCH  # type: ignore
+        local_docs, web_docs = self._embedding_manager.query_sources(
+            query=question, k_local=K_LOCAL_SEARCH, k_web=K_WEB_SEARCH  # type: ignore
         )
-        return {"local_context": local_docs}  # type: ignore
-
-    def search_web(self, state: SearchState) -> GenerationState:
-        """
-        Searches web documents for relevant context based on the user's question.
-
-        Args:
-            state (State): The current state containing the user's question.
-
-        Returns:
-            dict: A dictionary containing the web search results added to the web context.
-        """
-        question = state["question"].content  # type: ignore
-
-        web_docs = self._embedding_manager.query_web_embeddings(
-            query=question, k=K_WEB_SEARCH  # type: ignore
-        )
-        return {"web_context": web_docs}  # type: ignore
+        return {"local_context": local_docs, "web_context": web_docs}  # type: ignore
 
     def generate_answer(self, state: GenerationState) -> SummarizationState:
         """
@@ -398,15 +382,12 @@ class GraphInitializer:
         logger.info("Creating subgraph for local and web search.")
         search_graph: StateGraph = StateGraph(input=SearchState, output=GenerationState)
 
-        # Add nodes for local and web search
-        search_graph.add_node("search_local", self.search_local)  # type: ignore
-        search_graph.add_node("search_web", self.search_web)  # type: ignore
+        # Add a single node for the local and web search
+        search_graph.add_node("search", self.search)  # type: ignore
 
         # Define edges for the search subgraph
-        search_graph.add_edge(START, "search_local")
-        search_graph.add_edge(START, "search_web")
-        search_graph.add_edge("search_local", END)
-        search_graph.add_edge("search_web", END)
+        search_graph.add_edge(START, "search")
+        search_graph.add_edge("search", END)
 
         # Compile the search subgraph
         self._search_subgraph: StateGraph = search_graph.compile()  # type: ignore
@@ -24,6 +24,54 @@ MARKDOWN_SPLITTER_CONFIG: Dict[str, Any] = {
     "keep_separator": True,  # Include separators in the resulting chunks
 }
 
+DIRECTORY_WATCHER_CONFIG: Dict[str, Any] = {
+    "enabled": os.getenv("DOCS_WATCH_ENABLED", "false").lower() == "true",  # Update the index when local docs change
+    "debounce_seconds": 2.0,  # Changes are applied once the directory hasn't changed for this long
+    "poll_interval": 2.0,  # Seconds between two scans when inotify isn't available
+    "use_inotify": True,  # Use inotify on Linux, polling otherwise
+}
+
+DEDUPLICATION_CONFIG: Dict[str, Any] = {
+    "enabled": os.getenv("DEDUPLICATION_ENABLED", "false").lower() == "true",  # Drop near-duplicate chunks (opt-in)
+    "threshold": float(os.getenv("DEDUPLICATION_THRESHOLD", "0.85")),  # Estimated Jaccard similarity of duplicates
+    "num_perm": 128,  # MinHash permutations
+    "shingle_size": 5,  # Words per shingle
+}
+
+SECTION_SPLITTER_CONFIG: Dict[str, Any] = {
+    "workers": min(4, os.cpu_count() or 1),  # Processes splitting and cleaning large corpora
+    "parallel_min_characters": 10_000_000,  # Smaller corpora are split in-process (starting processes costs more)
+    "documents_per_task": 16,  # Documents sent to a process at a time
+}
+
+WEB_LOADER_CONFIG: Dict[str, Any] = {
+    "max_workers": 20,  # Pages fetched concurrently (and pooled connections per host)
+    "timeout": 10,  # Timeout of each request, in seconds
+    "cache_enabled": os.getenv("WEB_CACHE_ENABLED", "true").lower() == "true",  # Cache the converted pages
+    "cache_directory": os.getenv("WEB_CACHE_DIRECTORY", "./web_cache"),  # Directory of the page cache
+    "fast_extraction": True,  # Extract the article without a BeautifulSoup tree of the whole page
+    "async": os.getenv("WEB_LOADER_ASYNC", "true").lower() == "true",  # Use AsyncWebLoader (asyncio + aiohttp)
+    "per_host_limit": 4,  # Concurrent connections per host (AsyncWebLoader)
+    "max_retries": 3,  # Attempts per URL (AsyncWebLoader)
+    "backoff_base": 0.5,  # Base delay of the exponential backoff between attempts, in seconds (AsyncWebLoader)
+    "backoff_max": 30.0,  # Maximum delay between attempts, in seconds (AsyncWebLoader)
+    # Seconds for loading all the pages, pages still pending are dropped; no deadline by default (AsyncWebLoader)
+    "deadline": float(os.environ["WEB_LOADER_DEADLINE"]) if os.getenv("WEB_LOADER_DEADLINE") else None,
+    "parse_workers": min(4, os.cpu_count() or 1),  # Processes parsing the pages, 0 for threads (AsyncWebLoader)
+}
+
+WEB_CRAWLER_CONFIG: Dict[str, Any] = {
+    "enabled": os.getenv("WEB_CRAWLER_ENABLED", "false").lower() == "true",  # Crawl DOCS_SITEMAPS too
+    "follow_links": False,  # Also crawl the (allowed) links of the visited pages
+    "max_pages": 5000,  # Maximum pages visited per crawl
+    "max_frontier": 20000,  # Maximum URLs waiting to be visited; further URLs are dropped
+    "max_sitemap_depth": 3,  # Maximum nesting of sitemap indexes
+    "requests_per_second": 5.0,  # Crawl rate (sitemaps and pages)
+    "concurrency": 4,  # Pages fetched concurrently
+    "wave_size": 100,  # Pages fetched between two saves of the crawl state
+    "state_path": os.getenv("WEB_CRAWLER_STATE_PATH", "./web_cache/crawl_state.json"),  # Persisted crawl state
+}
+
 # -------------------------
 # LLM (Language Model) Configuration
 # -------------------------
@@ -91,6 +139,12 @@ EMBEDDINGS_CONFIG: Dict[str, Any] = {
     "request_options": None,  # Additional request options
 }
 
+EMBEDDING_CACHE_CONFIG: Dict[str, Any] = {
+    "enabled": os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true",  # Cache the computed embeddings
+    "path": os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache/embeddings.sqlite"),  # SQLite file of the cache
+    "max_entries": int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000")),  # Least recently used vectors are evicted beyond this
+}
+
 # -------------------------
 # Chroma Database Configuration
 # -------------------------
@@ -102,6 +156,16 @@ CHROMA_DB_CONFIG: Dict[str, Any] = {
     "create_collection_if_not_exists": True,  # Create the collection if it doesn't exist
 }
 
+CHROMA_INDEX_BATCH_SIZE = 256  # Chunks deleted per Chroma call
+
+INGESTION_CONFIG: Dict[str, Any] = {
+    "batch_size": 64,  # Chunks per embedding request and per write to Chroma
+    "concurrency": 4,  # Maximum number of embedding requests in flight
+    "requests_per_minute": 600,  # Maximum embedding requests per minute (None for no limit)
+    "max_retries": 3,  # Attempts per batch before the ingestion fails
+    "queue_size": 8,  # Items buffered between two stages of the streaming ingestion pipeline
+}
+
 # -----------------------------
 # Logger Configuration
 # -----------------------------
@@ -114,6 +178,13 @@ K_WEB_SEARCH = 1  # Default number of web documents to retrieve
 
 K_LOCAL_SEARCH = 3  # Default number of local documents to retrieve
 
+UNIFIED_COLLECTION_CONFIG: Dict[str, Any] = {
+    # Index local and web chunks in one collection, with their "source_type" as metadata
+    "enabled": os.getenv("UNIFIED_COLLECTION_ENABLED", "false").lower() == "true",
+    "collection_name": "documents",  # Name of the unified collection
+    "overfetch_factor": 3,  # Candidates fetched per requested chunk, before the per-source quotas
+}
+
 # -------------------------
 # Flask Configuration
 # -------------------------
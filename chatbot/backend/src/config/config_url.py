@@ -35,3 +35,20 @@ DOCS_URL: List[str] = [
     "https://auto.gluon.ai/stable/api/autogluon.tabular.TabularPredictor.html",
     "https://auto.gluon.ai/stable/api/autogluon.tabular.models.html"
 ]
+
+
+# ---------------------
+# Documentation sitemaps (crawler mode)
+# ---------------------
+
+DOCS_SITEMAPS: List[str] = [
+    "https://scikit-learn.org/1.6/sitemap.xml",
+    "https://auto.gluon.ai/stable/sitemap.xml",
+]
+
+# Only the API reference and user guide pages of the sitemaps are crawled
+DOCS_ALLOWED_PREFIXES: List[str] = [
+    "https://scikit-learn.org/1.6/modules/",
+    "https://auto.gluon.ai/stable/api/",
+    "https://auto.gluon.ai/stable/tutorials/",
+]
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+File: async_web_loader.py
+
+This file contains the AsyncWebLoader class, a drop-in replacement for WebLoader
+that fetches the pages with asyncio and aiohttp instead of a pool of threads per
+retry round:
+- Connections are limited per host, so a documentation host gets at most
+  `per_host_limit` concurrent requests.
+- Failed requests (connection errors, timeouts, 429 and 5xx responses) are retried
+  with jittered exponential backoff, honoring Retry-After.
+- The whole load can have a deadline (opt-in, WEB_LOADER_DEADLINE): pages still
+  pending when it expires are dropped and logged.
+- Parsing and Markdown conversion (CPU-bound) run in a pool of worker processes,
+  so fetching and parsing overlap.
+Pages are cached and requested conditionally like in WebLoader (see http_cache.py).
+"""
+
+import asyncio
+import multiprocessing
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import aiohttp
+from langchain_core.documents import Document
+
+from src.config.config_init import WEB_LOADER_CONFIG
+from src.utils.http_cache import HttpCache
+from src.utils.logger_manager import logger
+from src.utils.web_loader import WebLoader
+
+# Responses worth retrying: rate limited or server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# WebLoader of each parse worker process, used only for its parsing methods
+_worker_loader: Optional[WebLoader] = None
+
+
+def _init_parse_worker() -> None:
+    """Creates the WebLoader of a parse worker process."""
+    global _worker_loader
+    _worker_loader = WebLoader(urls=[], use_cache=False)
+
+
+def _parse_page(url: str, html_content: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """Parses a page in a worker process (see WebLoader._parse_page)."""
+    if _worker_loader is None:
+        _init_parse_worker()
+    return _worker_loader._parse_page(url, html_content)  # type: ignore
+
+
+class RetryableResponse(Exception):
+    """Raised for responses that should be retried, with their Retry-After delay."""
+
+    def __init__(self, status: int, retry_after: Optional[float]) -> None:
+        super().__init__(f"HTTP {status}")
+        self.retry_after = retry_after
+
+
+class AsyncWebLoader(WebLoader):
+    def __init__(
+        self,
+        urls: List[str],
+        cache_directory: Optional[str] = None,
+        use_cache: bool = WEB_LOADER_CONFIG["cache_enabled"],
+        per_host_limit: int = WEB_LOADER_CONFIG["per_host_limit"],
+        max_retries: int = WEB_LOADER_CONFIG["max_retries"],
+        backoff_base: float = WEB_LOADER_CONFIG["backoff_base"],
+        backoff_max: float = WEB_LOADER_CONFIG["backoff_max"],
+        deadline: Optional[float] = WEB_LOADER_CONFIG["deadline"],
+        parse_workers: int = WEB_LOADER_CONFIG["parse_workers"],
+    ) -> None:
+        """
+        Initializes the AsyncWebLoader instance with a list of URLs to process.
+
+        Args:
+            urls (List[str]): List of URLs to be fetched and converted to Markdown.
+            cache_directory (Optional[str]): Directory of the page cache. Defaults to the configured one.
+            use_cache (bool): If False, every page is fetched and converted again.
+            per_host_limit (int): Maximum concurrent connections per host.
+            max_retries (int): Maximum attempts per URL.
+            backoff_base (float): Base delay of the exponential backoff between attempts, in seconds.
+            backoff_max (float): Maximum delay between attempts, in seconds.
+            deadline (Optional[float]): Seconds for the whole load; pending pages are dropped after it.
+                None to wait for every page.
+            parse_workers (int): Worker processes parsing the pages (0 to parse them in threads).
+        """
+        super().__init__(urls, cache_directory=cache_directory, use_cache=use_cache)
+        self._per_host_limit = per_host_limit
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._deadline = deadline
+        self._parse_workers = parse_workers
+
+    def get_documents(self) -> List[Document]:
+        """
+        Fetches and parses the list of URLs, returning a list of Document objects
+        (in the order of the URLs). Each URL is attempted up to `max_retries` times,
+        with backoff, until the deadline (if any).
+
+        Returns:
+            List[Document]: A list of Document objects containing the content of the parsed web pages.
+        """
+        return asyncio.run(self.aget_documents())
+
+    def iter_documents(self) -> Iterator[Document]:
+        """
+        Yields the documents of get_documents. The pages are loaded together, within the
+        deadline (if any), before the first one is yielded.
+
+        Yields:
+            Document: The content of each parsed web page, in the order of the URLs.
+        """
+        yield from self.get_documents()
+
+    async def aget_documents(self) -> List[Document]:
+        """
+        Asynchronous version of get_documents.
+
+        Returns:
+            List[Document]: A list of Document objects containing the content of the parsed web pages.
+        """
+        self.not_modified = 0
+        urls = list(dict.fromkeys(self.urls))
+        if not urls:
+            return []
+        pool: Optional[Executor] = (
+            ProcessPoolExecutor(
+                max_workers=self._parse_workers,
+                # Forking a process with running threads (gunicorn, loaders) isn't safe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_parse_worker,
+            )
+            if self._parse_workers > 0
+            else None
+        )
+        connector = aiohttp.TCPConnector(
+            limit=self._max_workers, limit_per_host=self._per_host_limit
+        )
+        timeout = aiohttp.ClientTimeout(total=WEB_LOADER_CONFIG["timeout"])
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                tasks = [asyncio.create_task(self._load_url(session, pool, url)) for url in urls]
+                _, pending = await asyncio.wait(tasks, timeout=self._deadline)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        documents: List[Document] = []
+        for url, task in zip(urls, tasks):
+            if task.cancelled():
+                logger.warning(f"Deadline of {self._deadline}s exceeded, URL not loaded: {url}")
+            elif task.exception():
+                logger.error(f"Error getting document for URL {url}: {task.exception()}")
+            elif task.result():
+                documents.append(task.result())
+        logger.info(
+            f"All documents loaded: {len(documents)} ({self.not_modified} not modified, from the cache)"
+        )
+        return documents
+
+    async def _load_url(
+        self, session: aiohttp.ClientSession, pool: Optional[Executor], url: str
+    ) -> Optional[Document]:
+        """
+        Fetches a URL (conditionally, if it's cached), retrying with backoff, and parses it.
+
+        Args:
+            session (aiohttp.ClientSession): The session shared by the requests.
+            pool (Optional[Executor]): The parse worker pool (None to parse in a thread).
+            url (str): The URL to fetch and process.
+
+        Returns:
+            Optional[Document]: A Document object if successful, None otherwise.
+        """
+        cached = self._cache.get(url) if self._cache else None
+        for attempt in range(self._max_retries):
+            retry_after: Optional[float] = None
+            try:
+                async with session.get(
+                    url, headers=HttpCache.conditional_headers(cached)
+                ) as response:
+                    if response.status == 304 and cached:
+                        logger.info(f"Not modified, using cached document: {url[-30:]}")
+                        self.not_modified += 1
+                        return self._create_document(cached["markdown"], cached["metadata"])
+                    if response.status in RETRYABLE_STATUSES:
+                        raise RetryableResponse(
+                            response.status, self._parse_retry_after(response.headers.get("Retry-After"))
+                        )
+                    response.raise_for_status()
+                    html_content = await response.text()
+                    headers = response.headers
+                logger.info(f"Fetched URL successfully: {url[-30:]}")
+                return await self._parse_and_cache(pool, url, html_content, headers)
+            except aiohttp.ClientResponseError as e:
+                # Other 4xx errors won't change by retrying
+                logger.error(f"Error fetching URL {url}: {e.status} {e.message}")
+                return None
+            except RetryableResponse as e:
+                retry_after = e.retry_after
+                error: Exception = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+
+            if attempt + 1 < self._max_retries:
+                delay = self._backoff_delay(attempt, retry_after)
+                logger.warning(
+                    f"Attempt {attempt + 1}/{self._max_retries} for URL {url} failed ({error!r}), "
+                    f"retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+        logger.warning(f"Failed to load URL after {self._max_retries} attempts: {url}")
+        return None
+
+    async def _parse_and_cache(
+        self, pool: Optional[Executor], url: str, html_content: str, headers
+    ) -> Optional[Document]:
+        """
+        Parses a fetched page in the worker pool, caches it and creates its document.
+        """
+        loop = asyncio.get_running_loop()
+        parsed = (
+            await loop.run_in_executor(pool, _parse_page, url, html_content)
+            if pool
+            else await loop.run_in_executor(None, self._parse_page, url, html_content)
+        )
+        if parsed is None:
+            return None
+        markdown_content, metadata = parsed
+        if self._cache and markdown_content:
+            await loop.run_in_executor(
+                None, self._cache.put, url, headers, markdown_content, metadata
+            )
+        return self._create_document(markdown_content, metadata)
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """
+        Returns the delay before the next attempt: exponential backoff with full jitter,
+        at least the Retry-After delay of the server.
+
+        Args:
+            attempt (int): The failed attempt (0 for the first one).
+            retry_after (Optional[float]): The Retry-After delay of the response, if any.
+
+        Returns:
+            float: The delay, in seconds.
+        """
+        delay = random.uniform(0, min(self._backoff_max, self._backoff_base * 2**attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self._backoff_max))
+        return delay
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Returns the Retry-After header in seconds (HTTP dates are ignored)."""
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
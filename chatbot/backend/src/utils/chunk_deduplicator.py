@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+File: chunk_deduplicator.py
+
+This file defines the ChunkDeduplicator class, which removes near-duplicate chunks
+before they are embedded: the overlap between consecutive sections, parameter tables
+and boilerplate repeated across pages, and text found in both the local and the web
+documents. Each chunk gets a MinHash signature of its word shingles, signatures are
+indexed with locality-sensitive hashing (LSH) bands, and a chunk whose estimated
+Jaccard similarity to a kept chunk reaches the threshold is dropped. The first
+occurrence is kept, so the order of the chunks (e.g. local documents first) decides
+which copy stays. The chunks of a file can be forgotten, so that its new version isn't
+compared with the old one when it's indexed again.
+"""
+
+import hashlib
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config.config_init import DEDUPLICATION_CONFIG
+from src.utils.ingestion_engine import count_tokens
+from src.utils.logger_manager import logger
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+_WORDS = re.compile(r"\w+")
+
+
+def lsh_bands(threshold: float, num_perm: int, false_negative_weight: float = 0.9) -> Tuple[int, int]:
+    """
+    Chooses the LSH bands and rows per band for a similarity threshold. Two chunks are
+    compared when their signatures agree on every row of a band, which happens with
+    probability 1 - (1 - s ** rows) ** bands for a similarity s: the bands and rows minimize
+    the weighted probability mass of comparing chunks below the threshold (false positives)
+    and missing chunks above it (false negatives). Compared chunks are checked against the
+    threshold, so false positives only cost time and missed duplicates are weighted more.
+
+    Args:
+        threshold (float): The Jaccard similarity above which chunks are duplicates.
+        num_perm (int): The number of MinHash permutations (at least bands * rows).
+        false_negative_weight (float): Weight of the false negatives, in [0, 1].
+
+    Returns:
+        Tuple[int, int]: The number of bands and of rows per band.
+    """
+    below = (np.arange(100) + 0.5) * threshold / 100
+    above = threshold + (np.arange(100) + 0.5) * (1 - threshold) / 100
+    best: Tuple[float, int, int] = (float("inf"), 1, num_perm)
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positives = np.mean(1 - (1 - below**rows) ** bands) * threshold
+            false_negatives = np.mean((1 - above**rows) ** bands) * (1 - threshold)
+            error = (1 - false_negative_weight) * false_positives + false_negative_weight * false_negatives
+            if error < best[0]:
+                best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class ChunkDeduplicator:
+    """
+    Drops the chunks that are near-duplicates of a chunk already seen (MinHash + LSH).
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUPLICATION_CONFIG["threshold"],
+        num_perm: int = DEDUPLICATION_CONFIG["num_perm"],
+        shingle_size: int = DEDUPLICATION_CONFIG["shingle_size"],
+    ) -> None:
+        """
+        Initializes the ChunkDeduplicator.
+
+        Args:
+            threshold (float): Estimated Jaccard similarity of the word shingles from which a
+                chunk is a duplicate (1.0 drops only chunks with the same words).
+            num_perm (int): Number of MinHash permutations; more is more precise and slower.
+            shingle_size (int): Number of consecutive words of each shingle.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1].")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+
+        # Fixed seed: the same chunks are always deduplicated the same way
+        generator = np.random.RandomState(1)
+        self._a = generator.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self._buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+        self._sources: List[str] = []  # File name of each kept chunk
+        self._forgotten: Set[int] = set()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"chunks": 0, "duplicates": 0, "tokens": 0, "tokens_saved": 0}
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Returns the MinHash signature of the word shingles of a text (lowercase words).
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            np.ndarray: The num_perm minimum hashes.
+        """
+        words = _WORDS.findall(text.lower())
+        count = max(len(words) - self.shingle_size + 1, 1)
+        hashes = np.fromiter(
+            (
+                int.from_bytes(
+                    hashlib.blake2b(" ".join(words[i : i + self.shingle_size]).encode("utf-8"), digest_size=4).digest(),
+                    "little",
+                )
+                for i in range(count)
+            ),
+            dtype=np.uint64,
+            count=count,
+        )
+        # (a * x + b) mod p for every permutation (rows) and shingle (columns)
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=1)
+
+    def is_duplicate(self, document: Document) -> bool:
+        """
+        Returns whether a chunk is a near-duplicate of a chunk seen before; if it isn't, it's
+        remembered for the next ones.
+
+        Args:
+            document (Document): The chunk.
+
+        Returns:
+            bool: True if the chunk should be dropped.
+        """
+        signature = self.signature(document.page_content)
+        keys = [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes() for band in range(self.bands)
+        ]
+        tokens = count_tokens(document.page_content)
+        with self._lock:
+            self.stats["chunks"] += 1
+            self.stats["tokens"] += tokens
+            candidates = {index for band, key in enumerate(keys) for index in self._buckets[band].get(key, ())}
+            candidates -= self._forgotten
+            for index in candidates:
+                if float(np.mean(self._signatures[index] == signature)) >= self.threshold:
+                    self.stats["duplicates"] += 1
+                    self.stats["tokens_saved"] += tokens
+                    return True
+            index = len(self._signatures)
+            self._signatures.append(signature)
+            self._sources.append((document.metadata or {}).get("file_name", ""))
+            for band, key in enumerate(keys):
+                self._buckets[band][key].append(index)
+        return False
+
+    def deduplicate(self, documents: List[Document]) -> List[Document]:
+        """
+        Returns the chunks that aren't near-duplicates of a previous chunk (of this list or
+        of those seen before), in their order.
+
+        Args:
+            documents (List[Document]): The chunks.
+
+        Returns:
+            List[Document]: The chunks to keep.
+        """
+        return [document for document in documents if not self.is_duplicate(document)]
+
+    def forget(self, file_name: str) -> None:
+        """
+        Forgets the kept chunks of a file: the next chunks are no longer compared with them.
+
+        Args:
+            file_name (str): The file name of the chunks (metadata "file_name").
+        """
+        with self._lock:
+            self._forgotten.update(index for index, source in enumerate(self._sources) if source == file_name)
+
+    def log_stats(self, name: Optional[str] = None) -> None:
+        """Logs the chunks and tokens saved so far."""
+        stats = self.stats
+        share = stats["duplicates"] / stats["chunks"] if stats["chunks"] else 0.0
+        logger.info(
+            f"Deduplication{f' of {name}' if name else ''}: {stats['duplicates']}/{stats['chunks']} chunks "
+            f"({share:.1%}) and {stats['tokens_saved']}/{stats['tokens']} tokens removed "
+            f"(threshold {self.threshold}, {self.bands} bands of {self.rows} rows)."
+        )
@@ -3,12 +3,14 @@
 File: directory_loader.py
 
 This file defines the DirectoryLoader class, responsible for loading Markdown documents
-from a specified directory.
+from a specified directory and its subdirectories. The documents are named after their
+path relative to the directory, and the modification time and size of each file are
+recorded, so that changed files can be detected (see directory_watcher.py).
 """
 
 import os
 import concurrent.futures
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 from langchain_core.documents import Document
 from src.utils.logger_manager import logger
@@ -28,6 +30,8 @@ class DirectoryLoader:
         self._directory_path: str = directory_path
         self._markdown_files_extension: str = markdown_files_extension
         self._local_documents: List[Document] = []
+        # (mtime in nanoseconds, size) of the files of the last load, by relative path
+        self.file_stats: Dict[str, Tuple[int, int]] = {}
 
     def _read_file(self, file_path: str, file_name: str) -> Document:
         """
@@ -50,12 +54,60 @@ class DirectoryLoader:
             logger.error(f"Error reading file {file_path}: {e}")
             raise
 
+    def scan_files(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Lists the Markdown files of the directory and of its subdirectories with os.scandir,
+        recording the modification time and size of each one, so that changed files can be
+        detected without reading them.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: (mtime in nanoseconds, size in bytes) of each file, by
+                path relative to the directory (with "/" separators).
+        """
+        files: Dict[str, Tuple[int, int]] = {}
+        pending: List[Tuple[str, str]] = [(self._directory_path, "")]
+        while pending:
+            directory, prefix = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.startswith("."):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append((entry.path, f"{prefix}{entry.name}/"))
+                        elif entry.name.endswith(self._markdown_files_extension) and entry.is_file():
+                            stat = entry.stat()
+                            files[f"{prefix}{entry.name}"] = (stat.st_mtime_ns, stat.st_size)
+            except OSError as e:
+                logger.error(f"Error scanning directory {directory}: {e}")
+        return files
+
+    def read_documents(self, file_names: Iterable[str]) -> List[Document]:
+        """
+        Reads some Markdown files of the directory, skipping those that can't be read
+        (e.g. deleted in the meantime).
+
+        Args:
+            file_names (Iterable[str]): Paths of the files, relative to the directory.
+
+        Returns:
+            List[Document]: A Document object for each file read.
+        """
+        documents: List[Document] = []
+        for file_name in file_names:
+            try:
+                documents.append(self._read_file(os.path.join(self._directory_path, file_name), file_name))
+            except Exception as e:
+                logger.error(f"Error processing file: {e}")
+        return documents
+
     def _load_local_documents(self) -> None:
         """
-        Loads the Markdown documents from the specified directory in parallel.
+        Loads the Markdown documents from the specified directory, and its subdirectories,
+        in parallel.
 
-        This method scans the directory for Markdown files, reads them concurrently,
-        and stores the resulting documents.
+        This method scans the directory for Markdown files, recording their modification
+        time and size in `file_stats`, reads them concurrently, and stores the resulting documents.
         """
         if not self._directory_path:
             logger.error("The 'directory_path' must be provided.")
@@ -66,14 +118,10 @@ class DirectoryLoader:
             logger.error(f"Directory not found: {self._directory_path}")
             raise FileNotFoundError(f"Directory not found: {self._directory_path}")
 
-        # List of Markdown file paths
-        markdown_files: List[str] = [
-            os.path.join(self._directory_path, file_name)
-            for file_name in os.listdir(self._directory_path)
-            if file_name.endswith(self._markdown_files_extension)
-        ]
+        # Markdown files, by path relative to the directory
+        self.file_stats = self.scan_files()
 
-        if not markdown_files:
+        if not self.file_stats:
             logger.warning(
                 f"No Markdown files found in the directory: {self._directory_path}"
             )
@@ -81,8 +129,8 @@ class DirectoryLoader:
         # Process files in parallel using ThreadPoolExecutor
         with concurrent.futures.ThreadPoolExecutor() as executor:
             futures = [
-                executor.submit(self._read_file, file_path, os.path.basename(file_path))
-                for file_path in markdown_files
+                executor.submit(self._read_file, os.path.join(self._directory_path, file_name), file_name)
+                for file_name in self.file_stats
             ]
 
             # Wait for all futures to complete and append the documents to the list
@@ -92,6 +140,25 @@ class DirectoryLoader:
                 except Exception as e:
                     logger.error(f"Error processing file: {e}")
 
+    def iter_documents(self) -> Iterator[Document]:
+        """
+        Reads the Markdown documents one at a time, without keeping them, so that large
+        directories can be processed with constant memory.
+
+        Yields:
+            Document: A Document object containing the content of each Markdown file.
+        """
+        if not self._directory_path or not os.path.exists(self._directory_path):
+            logger.error(f"Directory not found: {self._directory_path}")
+            return
+
+        self.file_stats = self.scan_files()
+        for file_name in sorted(self.file_stats):
+            try:
+                yield self._read_file(os.path.join(self._directory_path, file_name), file_name)
+            except Exception as e:
+                logger.error(f"Error processing file: {e}")
+
     def get_documents(self) -> List[Document]:
         """
         Returns the loaded Markdown documents.
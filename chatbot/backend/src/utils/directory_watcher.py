@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+File: directory_watcher.py
+
+This file defines the DirectoryWatcher class, which watches a directory of Markdown
+documents (and its subdirectories) and reports the files that were added, modified or
+deleted. On Linux, inotify (through ctypes, there is no dependency for it) wakes the
+watcher as soon as something changes; elsewhere, or if inotify isn't available, the
+directory is polled. Either way, changes are debounced: they are reported once the
+directory hasn't changed for `debounce_seconds`, so that an editor saving a file in
+several writes, or a batch of copied files, gives a single update. What changed is
+computed by comparing the modification time and size of the files (see
+DirectoryLoader.scan_files) with those of the previous report.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from src.config.config_init import DIRECTORY_WATCHER_CONFIG
+from src.utils.directory_loader import DirectoryLoader
+from src.utils.logger_manager import logger
+
+# Called with the added or modified files and the deleted files (relative paths)
+ChangeHandler = Callable[[Set[str], Set[str]], None]
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class _Inotify:
+    """Minimal inotify binding: recursive watches and a blocking wait for events."""
+
+    def __init__(self, directory_path: str) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd: int = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: Dict[int, str] = {}
+        self._watch_tree(directory_path)
+
+    def _watch_tree(self, directory_path: str) -> None:
+        """Adds a watch for the directory and each of its subdirectories."""
+        pending = [directory_path]
+        while pending:
+            directory = pending.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"Can't watch {directory}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self._watches[wd] = directory
+            try:
+                with os.scandir(directory) as entries:
+                    pending.extend(
+                        entry.path for entry in entries
+                        if entry.is_dir(follow_symlinks=False) and not entry.name.startswith(".")
+                    )
+            except OSError:
+                continue
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Waits up to `timeout` seconds for events, watching the new subdirectories.
+
+        Returns:
+            bool: Whether something changed in the watched directories.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size : offset + EVENT_HEADER.size + name_length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + name_length
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+            elif mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and wd in self._watches:
+                self._watch_tree(os.path.join(self._watches[wd], os.fsdecode(name)))
+        return True
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class DirectoryWatcher:
+    """
+    Watches a directory of Markdown documents and reports its changes, debounced, to a handler.
+    """
+
+    def __init__(
+        self,
+        directory_path: str,
+        on_change: ChangeHandler,
+        debounce_seconds: float = DIRECTORY_WATCHER_CONFIG["debounce_seconds"],
+        poll_interval: float = DIRECTORY_WATCHER_CONFIG["poll_interval"],
+        use_inotify: bool = DIRECTORY_WATCHER_CONFIG["use_inotify"],
+        file_stats: Optional[Dict[str, Tuple[int, int]]] = None,
+    ) -> None:
+        """
+        Initializes the DirectoryWatcher.
+
+        Args:
+            directory_path (str): The directory of Markdown documents to watch.
+            on_change (ChangeHandler): Called, in the watcher thread, with the added or modified
+                files and the deleted files (paths relative to the directory).
+            debounce_seconds (float): Changes are reported once the directory hasn't changed for this long.
+            poll_interval (float): Seconds between two scans when polling.
+            use_inotify (bool): If False, the directory is polled even on Linux.
+            file_stats (Optional[Dict[str, Tuple[int, int]]]): The files already indexed (see
+                DirectoryLoader.file_stats). Defaults to those found when the watcher starts.
+        """
+        self.directory_path = directory_path
+        self.on_change = on_change
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend: Optional[str] = None
+        self._loader = DirectoryLoader(directory_path)
+        self._file_stats = file_stats
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts watching, in a daemon thread."""
+        if self._file_stats is None:
+            self._file_stats = self._loader.scan_files()
+        inotify: Optional[_Inotify] = None
+        if self.use_inotify:
+            try:
+                inotify = _Inotify(self.directory_path)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify unavailable ({e}), polling {self.directory_path} instead.")
+        self.backend = "inotify" if inotify else "polling"
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(inotify,), name="directory-watcher", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Watching {self.directory_path} for changes ({self.backend}).")
+
+    def stop(self) -> None:
+        """Stops watching and waits for the watcher thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, inotify: Optional[_Inotify]) -> None:
+        """Watcher loop: waits for changes, debounces them and reports them."""
+        try:
+            while not self._stop.is_set():
+                if inotify:
+                    if not inotify.wait(timeout=0.2):
+                        continue
+                    # Debounce: wait until no event arrives for debounce_seconds
+                    while not self._stop.is_set() and inotify.wait(timeout=self.debounce_seconds):
+                        pass
+                    self._report(self._loader.scan_files())
+                else:
+                    if self._stop.wait(self.poll_interval):
+                        break
+                    file_stats = self._loader.scan_files()
+                    if file_stats == self._file_stats:
+                        continue
+                    # Debounce: rescan until the files stay the same for debounce_seconds
+                    while not self._stop.wait(self.debounce_seconds):
+                        latest = self._loader.scan_files()
+                        if latest == file_stats:
+                            break
+                        file_stats = latest
+                    self._report(file_stats)
+        finally:
+            if inotify:
+                inotify.close()
+
+    def _report(self, file_stats: Dict[str, Tuple[int, int]]) -> None:
+        """Reports the files that differ from the last successful report to the handler."""
+        previous = self._file_stats or {}
+        changed = {name for name, stats in file_stats.items() if previous.get(name) != stats}
+        deleted = set(previous) - set(file_stats)
+        if not changed and not deleted:
+            return
+        logger.info(f"Local documents changed: {len(changed)} added or modified, {len(deleted)} deleted.")
+        try:
+            self.on_change(changed, deleted)
+        except Exception as e:
+            # Not recorded as reported: the changes are reported again with the next ones
+            logger.error(f"Error updating the changed local documents: {e}")
+            return
+        self._file_stats = file_stats
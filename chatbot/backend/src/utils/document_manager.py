@@ -7,18 +7,19 @@ and splitting of Markdown and web documents.
 """
 
 import concurrent.futures
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from langchain.text_splitter import MarkdownTextSplitter
 from langchain_core.documents import Document
 
-from src.config.config_init import MARKDOWN_SPLITTER_CONFIG
+from src.config.config_init import WEB_CRAWLER_CONFIG, WEB_LOADER_CONFIG
+from src.config.config_url import DOCS_ALLOWED_PREFIXES, DOCS_SITEMAPS
 from src.utils.logger_manager import logger
+from src.utils.async_web_loader import AsyncWebLoader
 from src.utils.directory_loader import DirectoryLoader
+from src.utils.section_splitter import split_documents
+from src.utils.web_crawler import WebCrawler
 from src.utils.web_loader import WebLoader
 
-import re
-
 
 class DocumentManager:
     """
@@ -30,6 +31,8 @@ class DocumentManager:
         directory_path: Optional[str] = None,
         web_paths: Optional[List[str]] = None,
         plain_words_only: bool = True,
+        crawl: bool = WEB_CRAWLER_CONFIG["enabled"],
+        streaming: bool = False,
     ) -> None:
         """
         Initializes the DocumentManager by loading and splitting documents.
@@ -38,6 +41,10 @@ class DocumentManager:
             directory_path (Optional[str]): Path to the directory containing Markdown files.
             web_paths (Optional[List[str]]): List of web document URLs.
             plain_words_only (bool): If True, sections will be converted to plain words only.
+            crawl (bool): If True, the pages of DOCS_SITEMAPS (within DOCS_ALLOWED_PREFIXES) are
+                crawled in addition to the web document URLs.
+            streaming (bool): If True, nothing is loaded: the documents are read one at a time
+                with iter_local_documents and iter_web_documents (see IngestionPipeline).
 
         Raises:
             ValueError: If neither 'directory_path' nor 'web_paths' is provided.
@@ -47,6 +54,7 @@ class DocumentManager:
             raise ValueError("Either directory_path or web_paths must be provided.")
 
         self._directory_path = directory_path
+        self._directory_loader: Optional[DirectoryLoader] = None
         self._local_documents: List[Document] = []
         self._local_sections: List[Document] = []
 
@@ -55,6 +63,10 @@ class DocumentManager:
         self._web_sections: List[Document] = []
 
         self._plain_words_only = plain_words_only
+        self._crawl = crawl
+
+        if streaming:
+            return
 
         # Execute loading and splitting in parallel
         with concurrent.futures.ThreadPoolExecutor() as executor:
@@ -85,88 +97,58 @@ class DocumentManager:
         """Loads the Markdown documents from the specified directory."""
         if self._directory_path is None:
             raise ValueError("directory_path must be provided.")
-        loader = DirectoryLoader(
+        self._directory_loader = DirectoryLoader(
             directory_path=self._directory_path, markdown_files_extension=".md"
         )
-        self._local_documents = loader.get_documents()
+        self._local_documents = self._directory_loader.get_documents()
 
     def _load_web_documents(self) -> None:
         """Loads the web documents from the specified URLs."""
         if self.web_paths is None:
             raise ValueError("web_paths must be provided.")
-        loader = WebLoader(urls=self.web_paths)
-        self._web_documents = loader.get_documents()
-
-    def _process_section(self, section: str) -> str:
-        """Process a section according to the plain_words_only flag, cleaning markdown
-        symbols, images, links, tables, footnotes, and formatting text."""
-        if self._plain_words_only:
-            text = section
-            # Remove code blocks (```...``` including content)
-            text = re.sub(r"```[\s\S]*?```", "", text)
-            # Remove images ![alt](url)
-            text = re.sub(r"!\[[^\]]*\]\([^\)]*\)", "", text)
-            # Remove links [text](url)
-            text = re.sub(r"\[[^\]]*\]\([^\)]*\)", "", text)
-            # Remove double-bracket links [[text]](url)
-            text = re.sub(r"\[\[[^\]]*\]\]\([^\)]*\)", "", text)
-            # Remove reference-style links [text][id]
-            text = re.sub(r"\[[^\]]*\]\[[^\]]*\]", "", text)
-            # Remove footnote references [^1]
-            text = re.sub(r"\[\^\d+\]", "", text)
-            # Remove tables (lines starting/containing |)
-            text = re.sub(r"^\s*\|.*\|\s*$", "", text, flags=re.MULTILINE)
-            # Remove table header separators (| --- |)
-            text = re.sub(r"^\s*\|?\s*:?-+:?\s*\|.*$", "", text, flags=re.MULTILINE)
-            # Remove HTML tags
-            text = re.sub(r"<[^>]+>", "", text)
-            # Remove headers (#, ##, ###, etc.)
-            text = re.sub(r"^#+\s*", "", text, flags=re.MULTILINE)
-            # Remove emphasis (*, _, **, __)
-            text = re.sub(r"(\*\*|__|\*|_)", "", text)
-            # Remove inline code/backticks
-            text = re.sub(r"`+", "", text)
-            # Remove blockquotes
-            text = re.sub(r"^>\s*", "", text, flags=re.MULTILINE)
-            # Remove unordered list markers (-, *, + at line start)
-            text = re.sub(r"^(\s*[-*+])\s+", "", text, flags=re.MULTILINE)
-            # Remove ordered list markers (1. 2. etc.)
-            # text = re.sub(r"^\s*\d+\.\s+", "", text, flags=re.MULTILINE)
-            # Remove horizontal rules
-            text = re.sub(r"^---+$", "", text, flags=re.MULTILINE)
-            # Remove extra newlines and trim
-            text = re.sub(r"\n+", "\n", text)
-            # Remove extra tabs and trim
-            text = re.sub(r"\t+", "\t", text)
-            text = text.strip()
-            return text
-        return section
+        self._web_documents = self._create_web_loader().get_documents()
+
+    def iter_local_documents(self) -> Iterator[Document]:
+        """Reads the local Markdown documents one at a time, without splitting nor keeping them."""
+        if self._directory_path is None:
+            return iter(())
+        self._directory_loader = DirectoryLoader(
+            directory_path=self._directory_path, markdown_files_extension=".md"
+        )
+        return self._directory_loader.iter_documents()
+
+    def iter_web_documents(self) -> Iterator[Document]:
+        """
+        Loads the web documents as they are fetched, without splitting nor keeping them.
+        The threaded WebLoader is used instead of AsyncWebLoader, which loads every page
+        before returning them.
+        """
+        if self.web_paths is None:
+            return iter(())
+        return self._create_web_loader(streaming=True).iter_documents()
+
+    def _create_web_loader(self, streaming: bool = False) -> WebLoader:
+        """Creates the loader of the web documents: crawler, asynchronous or threaded."""
+        loader: WebLoader
+        if self._crawl:
+            loader = WebCrawler(
+                sitemap_urls=DOCS_SITEMAPS,
+                allowed_prefixes=DOCS_ALLOWED_PREFIXES,
+                seed_urls=self.web_paths,
+            )
+        elif WEB_LOADER_CONFIG["async"] and not streaming:
+            loader = AsyncWebLoader(urls=self.web_paths)
+        else:
+            loader = WebLoader(urls=self.web_paths)
+        return loader
 
     def _split_local_documents(self) -> None:
         """Splits the local documents into sections, optionally as plain words only."""
-        splitter: MarkdownTextSplitter = MarkdownTextSplitter(
-            **MARKDOWN_SPLITTER_CONFIG
-        )
-        for doc in self._local_documents:
-            split_sections: List[str] = splitter.split_text(doc.page_content)
-            for section in split_sections:
-                processed_section: str = self._process_section(section)
-                self._local_sections.append(
-                    Document(page_content=processed_section, metadata=doc.metadata)  # type: ignore
-                )
+        self._local_sections = split_documents(self._local_documents, self._plain_words_only)
 
     def _split_web_documents(self) -> None:
         """Splits the web documents into sections, optionally as plain words only."""
-        splitter: MarkdownTextSplitter = MarkdownTextSplitter(
-            **MARKDOWN_SPLITTER_CONFIG
-        )
-        for doc in self._web_documents:
-            split_sections: List[str] = splitter.split_text(doc.page_content)
-            for section in split_sections:
-                processed_section: str = self._process_section(section)
-                self._web_sections.append(
-                    Document(page_content=processed_section, metadata=doc.metadata)  # type: ignore
-                )
+        self._web_sections = split_documents(self._web_documents, self._plain_words_only)
 
     @property
     def local_documents(self) -> List[Document]:
@@ -187,3 +169,16 @@ class DocumentManager:
     def web_sections(self) -> List[Document]:
         """Gets the split sections of the web documents."""
         return self._web_sections
+
+    @property
+    def plain_words_only(self) -> bool:
+        """Gets whether the sections are converted to plain words only."""
+        return self._plain_words_only
+
+    @property
+    def local_file_stats(self) -> Optional[Dict[str, Tuple[int, int]]]:
+        """
+        Gets the modification time and size of the local files when they were loaded (see
+        DirectoryLoader.file_stats), or None if they weren't.
+        """
+        return self._directory_loader.file_stats if self._directory_loader else None
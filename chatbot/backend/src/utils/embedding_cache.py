@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+File: embedding_cache.py
+
+This file defines the CachedEmbeddings class, an embeddings adapter that stores the
+vectors computed by an embeddings model (Ollama, Gemini...) in a local SQLite file,
+keyed by the model, the kind of embedding (document or query) and a hash of the text.
+Rebuilding the vector stores of an unchanged corpus then costs no embedding calls.
+The cache keeps at most `max_entries` vectors, evicting the least recently used ones.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from src.config.config_init import EMBEDDING_CACHE_CONFIG
+from src.utils.logger_manager import logger
+
+# Kinds of embedding: some models embed documents and queries differently
+DOCUMENT = "document"
+QUERY = "query"
+
+# SQLite limits the number of parameters of a statement
+_LOOKUP_BATCH_SIZE = 500
+
+
+def get_model_id(embedding_model: Any) -> str:
+    """
+    Returns an ID of the embeddings model: its class and model name (and task type, if any).
+
+    Args:
+        embedding_model (Embeddings): The embeddings model.
+
+    Returns:
+        str: The model ID, e.g. "OllamaEmbeddings:nomic-embed-text:v1.5".
+    """
+    parts = [type(embedding_model).__name__]
+    for attribute in ("model", "model_name", "task_type"):
+        value = getattr(embedding_model, attribute, None)
+        if value:
+            parts.append(str(value))
+    return ":".join(parts)
+
+
+def hash_text(text: str) -> str:
+    """Returns the SHA-256 hex digest of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings adapter that serves the vectors of previously embedded texts from a
+    SQLite cache and only calls the wrapped model for the rest.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Embeddings,
+        cache_path: str = EMBEDDING_CACHE_CONFIG["path"],
+        max_entries: int = EMBEDDING_CACHE_CONFIG["max_entries"],
+        model_id: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes the CachedEmbeddings, opening (or creating) the SQLite cache.
+
+        Args:
+            embedding_model (Embeddings): The model used to compute the vectors missing from the cache.
+            cache_path (str): Path of the SQLite file.
+            max_entries (int): Maximum number of vectors kept; the least recently used are evicted.
+            model_id (Optional[str]): ID of the model in the cache keys. Defaults to get_model_id(embedding_model).
+        """
+        self.embedding_model = embedding_model
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.model_id = model_id or get_model_id(embedding_model)
+
+        self._hits: Dict[str, int] = {DOCUMENT: 0, QUERY: 0}
+        self._misses: Dict[str, int] = {DOCUMENT: 0, QUERY: 0}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(cache_path))
+        os.makedirs(directory, exist_ok=True)
+        # The vector stores embed from several threads, access is serialized by the lock
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model_id, kind, text_hash)
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._connection.commit()
+        logger.info(f"Embedding cache for '{self.model_id}' at {cache_path} ({len(self)} vectors).")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds documents, computing only the vectors missing from the cache.
+
+        Args:
+            texts (List[str]): The texts to embed.
+
+        Returns:
+            List[List[float]]: The vector of each text.
+        """
+        return self._embed(texts, DOCUMENT)
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embeds a query, computing its vector only if it's missing from the cache.
+
+        Args:
+            text (str): The query to embed.
+
+        Returns:
+            List[float]: The vector of the query.
+        """
+        return self._embed([text], QUERY)[0]
+
+    def _embed(self, texts: List[str], kind: str) -> List[List[float]]:
+        """
+        Looks up the vectors of the texts in the cache, computes the missing ones with the
+        wrapped model (once per distinct text) and stores them.
+        """
+        hashes = [hash_text(text) for text in texts]
+        vectors = self._lookup(hashes, kind)
+
+        missing: Dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in vectors:
+                missing.setdefault(text_hash, text)
+
+        with self._lock:
+            self._hits[kind] += sum(text_hash in vectors for text_hash in hashes)
+            self._misses[kind] += len(missing)
+
+        if missing:
+            missing_texts = list(missing.values())
+            if kind == QUERY:
+                computed = [self.embedding_model.embed_query(text) for text in missing_texts]
+            else:
+                computed = self.embedding_model.embed_documents(missing_texts)
+            computed_vectors = dict(zip(missing.keys(), computed))
+            self._store(computed_vectors, kind)
+            vectors.update(computed_vectors)
+
+        return [list(vectors[text_hash]) for text_hash in hashes]
+
+    def _lookup(self, hashes: List[str], kind: str) -> Dict[str, List[float]]:
+        """
+        Returns the cached vectors of the hashes and marks them as recently used.
+        """
+        vectors: Dict[str, List[float]] = {}
+        distinct_hashes = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(distinct_hashes), _LOOKUP_BATCH_SIZE):
+                batch = distinct_hashes[start : start + _LOOKUP_BATCH_SIZE]
+                rows = self._connection.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model_id = ? AND kind = ? "
+                    f"AND text_hash IN ({','.join('?' * len(batch))})",
+                    [self.model_id, kind, *batch],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    vectors[text_hash] = array("d", blob).tolist()
+            if vectors:
+                now = time.time()
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model_id = ? AND kind = ? AND text_hash = ?",
+                    [(now, self.model_id, kind, text_hash) for text_hash in vectors],
+                )
+                self._connection.commit()
+        return vectors
+
+    def _store(self, vectors: Dict[str, List[float]], kind: str) -> None:
+        """
+        Stores the computed vectors, evicting the least recently used ones beyond max_entries.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (model_id, kind, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (self.model_id, kind, text_hash, array("d", vector).tobytes(), now)
+                    for text_hash, vector in vectors.items()
+                ],
+            )
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                self._connection.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                logger.debug(f"Evicted {excess} vectors from the embedding cache.")
+            self._connection.commit()
+
+    def _count(self) -> int:
+        """Returns the number of cached vectors (of every model)."""
+        return self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the hits, misses and hit ratio of document and query embeddings since
+        the cache was opened, and the number of cached vectors.
+
+        Returns:
+            Dict[str, Any]: The cache statistics.
+        """
+        with self._lock:
+            stats: Dict[str, Any] = {"entries": self._count()}
+            for kind in (DOCUMENT, QUERY):
+                lookups = self._hits[kind] + self._misses[kind]
+                stats[kind] = {
+                    "hits": self._hits[kind],
+                    "misses": self._misses[kind],
+                    "hit_ratio": self._hits[kind] / lookups if lookups else 0.0,
+                }
+        return stats
+
+    def close(self) -> None:
+        """Closes the SQLite connection."""
+        with self._lock:
+            self._connection.close()
+
+
+def with_embedding_cache(
+    embedding_model: Any, cache_path: Optional[str] = None
+) -> Any:
+    """
+    Wraps an embeddings model in a CachedEmbeddings if the cache is enabled in
+    EMBEDDING_CACHE_CONFIG (models that are already cached are returned as they are).
+
+    Args:
+        embedding_model (Embeddings): The embeddings model.
+        cache_path (Optional[str]): Path of the SQLite file. Defaults to the configured path.
+
+    Returns:
+        Embeddings: The cached model, or the model itself if the cache is disabled.
+    """
+    if not EMBEDDING_CACHE_CONFIG["enabled"] or embedding_model is None:
+        return embedding_model
+    if isinstance(embedding_model, CachedEmbeddings):
+        return embedding_model
+    return CachedEmbeddings(
+        embedding_model, cache_path=cache_path or EMBEDDING_CACHE_CONFIG["path"]
+    )
@@ -4,20 +4,86 @@ File: embedding_manager.py
 
 This file defines the EmbeddingManager class, which is responsible for managing
 document embeddings and storing them in the Chroma database. The embeddings are
-organized into two collections: one for local documents and one for web documents.
-The class provides functionality to query these collections for relevant embeddings.
+organized into two collections: one for local documents and one for web documents,
+or, in unified mode, into a single collection where the "source_type" metadata of
+each chunk tells local and web chunks apart. The class provides functionality to
+query these collections for relevant embeddings: query_sources embeds the question
+once and, in unified mode, searches the index once, over-fetching candidates and
+applying a quota per source.
+
+Every chunk is stored with a deterministic ID derived from its source and a hash of
+its content (see chunk_id), so re-indexing is a diff against the stored IDs: only new
+or changed chunks are embedded, chunks that no longer exist are deleted and the rest
+are left untouched. Since the IDs don't depend on the embeddings model, each collection
+records the ID of the model that embedded it in its metadata, and a collection embedded
+by another model is indexed again from scratch. In streaming mode, the documents are
+split, embedded and written as they are loaded, by the IngestionPipeline, and the chunks
+that no longer exist are deleted once the stream is over. Either way, the chunks that are near-duplicates of
+another chunk, of the same collection or of the other one, are dropped before they are
+embedded (see chunk_deduplicator.py).
 """
 
+import hashlib
+import threading
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Optional, Any
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 
+from chromadb.api.client import SharedSystemClient
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 
-from src.config.config_init import CHROMA_DB_CONFIG
+from src.config.config_init import (
+    CHROMA_DB_CONFIG,
+    CHROMA_INDEX_BATCH_SIZE,
+    DEDUPLICATION_CONFIG,
+    UNIFIED_COLLECTION_CONFIG,
+)
+from src.utils.chunk_deduplicator import ChunkDeduplicator
+from src.utils.embedding_cache import get_model_id, with_embedding_cache
+from src.utils.ingestion_engine import BatchWriter, IngestionEngine
+from src.utils.ingestion_pipeline import IngestionPipeline
 from src.utils.logger_manager import logger
 
+# Metadata key of the source of the chunks in the unified collection, and its values
+SOURCE_TYPE = "source_type"
+LOCAL_SOURCE = "local"
+WEB_SOURCE = "web"
+# Collection metadata key of the ID of the embeddings model of its chunks (see get_model_id)
+EMBEDDING_MODEL_METADATA = "embedding_model"
+
+
+def chunk_source(document: Document) -> str:
+    """
+    Returns the source of a chunk: the URL of web documents or the file name of local ones.
+
+    Args:
+        document (Document): The chunk.
+
+    Returns:
+        str: The source, or an empty string if the metadata has none.
+    """
+    metadata = document.metadata or {}
+    return str(metadata.get("url") or metadata.get("file_name") or metadata.get("source") or "")
+
+
+def chunk_id(document: Document) -> str:
+    """
+    Returns the deterministic ID of a chunk, "<source>#<sha256 of source and content>".
+    The same chunk always gets the same ID, and any change to its content gives a new one.
+
+    Args:
+        document (Document): The chunk.
+
+    Returns:
+        str: The chunk ID.
+    """
+    source = chunk_source(document)
+    digest = hashlib.sha256(
+        f"{source}\0{document.page_content}".encode("utf-8")
+    ).hexdigest()
+    return f"{source}#{digest}"
+
 
 class EmbeddingManager:
     """
@@ -29,10 +95,19 @@ class EmbeddingManager:
     def __init__(
         self,
         embedding_model: Any,
-        local_documents: List[Document],
-        web_documents: List[Document],
+        local_documents: Iterable[Document],
+        web_documents: Iterable[Document],
         persist_directory: str = "./database",
         skip_reset: bool = False,
+        reset: bool = False,
+        embedding_cache_path: Optional[str] = None,
+        ingestion_options: Optional[Dict[str, Any]] = None,
+        streaming: bool = False,
+        plain_words_only: bool = True,
+        deduplication_threshold: Optional[float] = (
+            DEDUPLICATION_CONFIG["threshold"] if DEDUPLICATION_CONFIG["enabled"] else None
+        ),
+        unified: bool = UNIFIED_COLLECTION_CONFIG["enabled"],
     ) -> None:
         """
         Initializes the EmbeddingManager, which manages embeddings for local and web
@@ -40,37 +115,82 @@ class EmbeddingManager:
 
         Args:
             embedding_model (Embeddings): The model used to generate embeddings.
-            local_documents (List[Document]): Local documents to index.
-            web_documents (List[Document]): Web documents to index.
+            local_documents (Iterable[Document]): Local documents to index (sections, or
+                whole documents in streaming mode).
+            web_documents (Iterable[Document]): Web documents to index (sections, or
+                whole documents in streaming mode).
             persist_directory (str): Directory to store the Chroma database.
+            skip_reset (bool): If True, loads the existing collections without indexing the documents.
+            reset (bool): If True, deletes the database and embeds every document again
+                instead of indexing only the changes.
+            embedding_cache_path (Optional[str]): SQLite file of the embedding cache
+                (see embedding_cache.py). Defaults to the configured path.
+            ingestion_options (Optional[Dict[str, Any]]): Arguments of the IngestionEngine that
+                embeds the new chunks (batch_size, concurrency, requests_per_minute, max_retries,
+                checkpoint_path). Defaults to INGESTION_CONFIG, without checkpoint.
+            streaming (bool): If True, the documents are iterated, split, cleaned, embedded and
+                written as a stream by an IngestionPipeline per collection, instead of being
+                indexed as lists of sections.
+            plain_words_only (bool): In streaming mode and for the live updates of the local
+                documents, if True, the sections are converted to plain words only (see DocumentManager).
+            deduplication_threshold (Optional[float]): Estimated Jaccard similarity from which a
+                chunk is dropped as a near-duplicate of a previous one (local chunks come first:
+                in streaming mode, the collections are then indexed one after the other instead
+                of in parallel). None keeps every chunk.
+            unified (bool): If True, local and web chunks are stored in a single collection
+                (UNIFIED_COLLECTION_CONFIG["collection_name"]) with their source type as
+                metadata, instead of one collection each. The two layouts are independent:
+                switching needs the unified collection to be indexed.
         """
-        self.embedding_model = embedding_model
+        self.embedding_model = with_embedding_cache(embedding_model, embedding_cache_path)
+        self.model_id = getattr(self.embedding_model, "model_id", None) or get_model_id(embedding_model)
         self.local_documents = local_documents
         self.web_documents = web_documents
         self.persist_directory = persist_directory
         self.skip_reset = skip_reset
+        self.reset = reset
         self.database: Optional[Chroma] = None
         self.local_collection: Optional[Chroma] = None
         self.web_collection: Optional[Chroma] = None
+        self.index_stats: Dict[str, Dict[str, int]] = {}
+        self.streaming = streaming
+        self.plain_words_only = plain_words_only
+        self.pipeline_stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.deduplicator = (
+            ChunkDeduplicator(deduplication_threshold) if deduplication_threshold is not None else None
+        )
+        self._update_lock = threading.Lock()
+        self.ingestion_engine = IngestionEngine(
+            self.embedding_model, **(ingestion_options or {})
+        )
 
         self.local_collection_name = "local_documents"
         self.web_collection_name = "web_documents"
+        self.unified = unified
+        self.unified_collection_name = UNIFIED_COLLECTION_CONFIG["collection_name"]
+        self.overfetch_factor = UNIFIED_COLLECTION_CONFIG["overfetch_factor"]
+        self.collection: Optional[Chroma] = None  # The unified collection
+        self._source_types = {self.local_collection_name: LOCAL_SOURCE, self.web_collection_name: WEB_SOURCE}
 
         # Initialize the database and collections
         self._initialize_database()
 
     def _initialize_database(self) -> None:
         """
-        Initializes the Chroma database and its collections. If the `skip_reset`
-        flag is False, the database will be deleted and recreated.
-        If `skip_reset` is True, it will load existing collections without resetting.
+        Initializes the Chroma database and its collections. If `skip_reset` is True,
+        it will load existing collections without indexing. Otherwise, the collections
+        are synchronized with the documents (see _sync_collection), after deleting the
+        database first if the `reset` flag is True.
 
-        This method also initializes the collections for local and web documents in parallel.
+        This method also initializes the collections for local and web documents in parallel,
+        except in streaming mode with deduplication, where the local collection comes first.
         """
         logger.info("Initializing database...")
 
-        # Reset the database if required
-        if not self.skip_reset:
+        # Reset the database if required, unless an interrupted reset is being resumed
+        if self.reset and not self.skip_reset and self.ingestion_engine.has_checkpoint():
+            logger.info("Resuming an interrupted ingestion, the database is not reset again.")
+        elif self.reset and not self.skip_reset:
             self._reset_database()
         else:
             logger.info("Skipping database reset as per configuration.")
@@ -81,40 +201,60 @@ class EmbeddingManager:
             persist_directory=self.persist_directory,
             **CHROMA_DB_CONFIG,
         )
-        
+        for collection_name in (
+            [self.unified_collection_name] if self.unified else [self.local_collection_name, self.web_collection_name]
+        ):
+            self._check_embedding_model(collection_name)
+        if self.unified:
+            # Created before the collections are synchronized in parallel, which share it
+            self.collection = self._open_collection(self.unified_collection_name)
+
         if self.skip_reset:
             logger.info("Loading existing collections from disk without resetting.")
             # Load existing collections by name from the persisted database
             # Chroma will connect to existing collections if they exist on disk
-            self.local_collection = Chroma(
-                collection_name=self.local_collection_name,
-                embedding_function=self.embedding_model,
-                persist_directory=self.persist_directory,
-            )
-            self.web_collection = Chroma(
-                collection_name=self.web_collection_name,
-                embedding_function=self.embedding_model,
-                persist_directory=self.persist_directory,
-            )
+            if self.unified:
+                self.local_collection = self.web_collection = self.collection
+            else:
+                self.local_collection = self._open_collection(self.local_collection_name)
+                self.web_collection = self._open_collection(self.web_collection_name)
             logger.info("Existing collections loaded successfully.")
             return
             
+        local_documents, web_documents = self.local_documents, self.web_documents
+        if self.deduplicator and not self.streaming:
+            # Local chunks first: they are kept over their copies in the web documents
+            local_documents = self.deduplicator.deduplicate(list(local_documents))
+            web_documents = self.deduplicator.deduplicate(list(web_documents))
+
+        sync_collection = self._stream_collection if self.streaming else self._sync_collection
+        if self.deduplicator and self.streaming:
+            # The local stream is deduplicated fully before the web one, so local chunks are kept
+            # over their web copies, as when the collections aren't streamed
+            self.local_collection = sync_collection(self.local_collection_name, local_documents)
+            self.web_collection = sync_collection(self.web_collection_name, web_documents)
+            self.deduplicator.log_stats()
+            logger.info("Database and collections initialized successfully.")
+            return
+
         # Initialize collections in parallel using ThreadPoolExecutor
         with ThreadPoolExecutor() as executor:
             futures = [
                 executor.submit(
-                    self._get_chroma_collection,
+                    sync_collection,
                     self.local_collection_name,
-                    self.local_documents,
+                    local_documents,
                 ),
                 executor.submit(
-                    self._get_chroma_collection,
+                    sync_collection,
                     self.web_collection_name,
-                    self.web_documents,
+                    web_documents,
                 ),
             ]
             results = [future.result() for future in futures]
             self.local_collection, self.web_collection = results
+        if self.deduplicator:
+            self.deduplicator.log_stats()
 
         logger.info("Database and collections initialized successfully.")
 
@@ -144,13 +284,104 @@ class EmbeddingManager:
             logger.warning(
                 "Could not reset the database after 3 attempts. Continuing execution."
             )
+        # Chroma caches one client per path in the process, which would keep pointing to
+        # the deleted database files
+        SharedSystemClient.clear_system_cache()
         os.makedirs(self.persist_directory, exist_ok=True)
 
-    def _get_chroma_collection(
+    def _open_collection(self, collection_name: str) -> Chroma:
+        """
+        Loads a Chroma collection of the database, creating it if it doesn't exist (with the
+        ID of the embeddings model in its metadata).
+
+        Args:
+            collection_name (str): The name of the collection.
+
+        Returns:
+            Chroma: The Chroma collection object.
+        """
+        return Chroma(
+            collection_name=collection_name,
+            embedding_function=self.embedding_model,
+            persist_directory=self.persist_directory,
+            collection_metadata={EMBEDDING_MODEL_METADATA: self.model_id},
+        )
+
+    def _check_embedding_model(self, collection_name: str) -> None:
+        """
+        Checks that the chunks of a collection were embedded by the embeddings model. The
+        chunk IDs don't depend on the model, so the vectors of another model (or of an unknown
+        one, for collections created before the model was recorded) would be kept as unchanged:
+        the collection is deleted instead, to be indexed again.
+
+        Args:
+            collection_name (str): The name of the collection.
+
+        Raises:
+            ValueError: If the existing collections are loaded without indexing (skip_reset)
+                and the collection was embedded by another model.
+        """
+        collection = self._open_collection(collection_name)
+        metadata = collection._collection.metadata or {}
+        stored_model_id = metadata.get(EMBEDDING_MODEL_METADATA)
+        if stored_model_id == self.model_id:
+            return
+        if collection._collection.count() == 0:
+            collection._collection.modify(metadata={**metadata, EMBEDDING_MODEL_METADATA: self.model_id})
+            return
+        if self.skip_reset:
+            if stored_model_id is None:
+                logger.warning(f"The embeddings model of collection '{collection_name}' is unknown.")
+                return
+            raise ValueError(
+                f"Collection '{collection_name}' was embedded by '{stored_model_id}', not by '{self.model_id}'."
+            )
+        logger.warning(
+            f"Collection '{collection_name}' was embedded by '{stored_model_id or 'an unknown model'}', "
+            f"not by '{self.model_id}': it is indexed again."
+        )
+        collection.delete_collection()
+
+    def _collection_for(self, collection_name: str) -> Tuple[Chroma, Optional[Dict[str, str]]]:
+        """
+        Returns the Chroma collection that stores the chunks of a logical collection
+        (local_documents or web_documents), and the filter that selects them in it: the
+        collection itself and no filter, or the unified collection and their source type.
+
+        Args:
+            collection_name (str): The name of the logical collection.
+
+        Returns:
+            Tuple[Chroma, Optional[Dict[str, str]]]: The collection and the metadata filter.
+        """
+        if self.unified:
+            return self.collection, {SOURCE_TYPE: self._source_types[collection_name]}  # type: ignore
+        return self._open_collection(collection_name), None
+
+    def _writer(self, collection: Chroma, collection_name: str) -> BatchWriter:
+        """
+        Returns the writer of the embedded batches of a logical collection, which tags the
+        chunks with their source type in unified mode.
+
+        Args:
+            collection (Chroma): The Chroma collection to write to.
+            collection_name (str): The name of the logical collection.
+
+        Returns:
+            BatchWriter: The writer.
+        """
+        source_type = self._source_types[collection_name] if self.unified else None
+        return lambda ids, batch, embeddings: self._write_batch(collection, ids, batch, embeddings, source_type)
+
+    def _sync_collection(
         self, collection_name: str, documents: List[Document]
     ) -> Chroma:
         """
-        Loads an existing Chroma collection or creates a new one if it doesn't exist.
+        Loads a Chroma collection (creating it if it doesn't exist) and synchronizes it
+        with the documents: chunks whose ID is not stored yet are embedded and added
+        (in batches, by the IngestionEngine),
+        stored chunks that are no longer in the documents are deleted, and the rest
+        are kept without embedding them again.
 
         Args:
             collection_name (str): The name of the collection to load or create.
@@ -162,16 +393,173 @@ class EmbeddingManager:
         logger.info(f"Loading or creating Chroma collection '{collection_name}'...")
 
         # Chroma automatically creates the collection if it doesn't exist
-        collection = Chroma.from_documents(  # type: ignore
-            documents=documents,
-            embedding=self.embedding_model,
-            persist_directory=self.persist_directory,
-            collection_name=collection_name,
+        collection, where = self._collection_for(collection_name)
+
+        # Identical chunks of the same source share an ID, only the first one is kept
+        documents_by_id: Dict[str, Document] = {}
+        for document in documents:
+            documents_by_id.setdefault(chunk_id(document), document)
+
+        stored_ids = set(collection.get(where=where, include=[])["ids"])
+        new_ids = [id_ for id_ in documents_by_id if id_ not in stored_ids]
+        stale_ids = [id_ for id_ in stored_ids if id_ not in documents_by_id]
+
+        for start in range(0, len(stale_ids), CHROMA_INDEX_BATCH_SIZE):
+            collection.delete(ids=stale_ids[start : start + CHROMA_INDEX_BATCH_SIZE])
+        if new_ids:
+            self.ingestion_engine.ingest(
+                collection_name,
+                new_ids,
+                [documents_by_id[id_] for id_ in new_ids],
+                self._writer(collection, collection_name),
+            )
+
+        self.index_stats[collection_name] = {
+            "added": len(new_ids),
+            "deleted": len(stale_ids),
+            "unchanged": len(documents_by_id) - len(new_ids),
+        }
+        logger.info(
+            f"Chroma collection '{collection_name}' is ready: {len(new_ids)} chunks added, "
+            f"{len(stale_ids)} deleted, {len(documents_by_id) - len(new_ids)} unchanged."
         )
+        return collection
 
-        logger.info(f"Chroma collection '{collection_name}' is ready.")
+    def _stream_collection(
+        self, collection_name: str, documents: Iterable[Document]
+    ) -> Chroma:
+        """
+        Loads a Chroma collection (creating it if it doesn't exist) and synchronizes it
+        with a stream of documents, like _sync_collection: the IngestionPipeline splits and
+        cleans the documents as they are loaded and embeds and writes the sections not
+        stored yet, then the stored chunks that are no longer in the documents are deleted.
+        An interrupted run writes nothing wrong: running it again skips the written chunks.
+
+        Args:
+            collection_name (str): The name of the collection to load or create.
+            documents (Iterable[Document]): The documents to index in the collection, before splitting.
+
+        Returns:
+            Chroma: The Chroma collection object.
+        """
+        logger.info(f"Loading or creating Chroma collection '{collection_name}' (streaming)...")
+        collection, where = self._collection_for(collection_name)
+
+        stored_ids = set(collection.get(where=where, include=[])["ids"])
+        # One pipeline per collection, since the collections may be indexed in parallel
+        pipeline = IngestionPipeline(
+            self.ingestion_engine, chunk_id, self.plain_words_only, deduplicator=self.deduplicator
+        )
+        section_ids = pipeline.run(
+            collection_name,
+            documents,
+            stored_ids,
+            self._writer(collection, collection_name),
+        )
+        self.pipeline_stats[collection_name] = pipeline.stats[collection_name]
+
+        stale_ids = [id_ for id_ in stored_ids if id_ not in section_ids]
+        for start in range(0, len(stale_ids), CHROMA_INDEX_BATCH_SIZE):
+            collection.delete(ids=stale_ids[start : start + CHROMA_INDEX_BATCH_SIZE])
+
+        added = len(section_ids - stored_ids)
+        self.index_stats[collection_name] = {
+            "added": added,
+            "deleted": len(stale_ids),
+            "unchanged": len(section_ids) - added,
+        }
+        logger.info(
+            f"Chroma collection '{collection_name}' is ready: {added} chunks added, "
+            f"{len(stale_ids)} deleted, {len(section_ids) - added} unchanged."
+        )
         return collection
 
+    def update_local_sources(self, sections_by_source: Dict[str, List[Document]]) -> Dict[str, int]:
+        """
+        Replaces the chunks of some sources of the local collection (e.g. edited files) with
+        their new sections, while the collections keep being queried: only the new or
+        changed sections are embedded, and the chunks of the source that no longer exist
+        are deleted. A source without sections is removed from the collection. With a
+        deduplicator, the new sections of a source are deduplicated against the other
+        chunks, not against the previous version of the source.
+
+        Args:
+            sections_by_source (Dict[str, List[Document]]): The sections of each source (file name).
+
+        Returns:
+            Dict[str, int]: The number of chunks added, deleted and unchanged.
+        """
+        if self.local_collection is None:
+            raise ValueError("The local collection isn't initialized.")
+        collection, where = self._collection_for(self.local_collection_name)
+        stats = {"added": 0, "deleted": 0, "unchanged": 0}
+        # Updates of the same collection are applied one at a time
+        with self._update_lock:
+            for source, sections in sections_by_source.items():
+                if self.deduplicator:
+                    self.deduplicator.forget(source)
+                    sections = self.deduplicator.deduplicate(sections)
+                sections_by_id: Dict[str, Document] = {}
+                for section in sections:
+                    sections_by_id.setdefault(chunk_id(section), section)
+                source_filter = {"file_name": source}
+                if where:
+                    source_filter = {"$and": [source_filter, where]}  # type: ignore
+                stored_ids = set(collection.get(where=source_filter, include=[])["ids"])
+                new_ids = [id_ for id_ in sections_by_id if id_ not in stored_ids]
+                stale_ids = [id_ for id_ in stored_ids if id_ not in sections_by_id]
+
+                # New chunks are written before the stale ones are deleted, so that the
+                # source never disappears from the results while it's updated
+                if new_ids:
+                    self.ingestion_engine.ingest(
+                        f"{self.local_collection_name}:{source}",
+                        new_ids,
+                        [sections_by_id[id_] for id_ in new_ids],
+                        self._writer(collection, self.local_collection_name),
+                    )
+                for start in range(0, len(stale_ids), CHROMA_INDEX_BATCH_SIZE):
+                    collection.delete(ids=stale_ids[start : start + CHROMA_INDEX_BATCH_SIZE])
+
+                stats["added"] += len(new_ids)
+                stats["deleted"] += len(stale_ids)
+                stats["unchanged"] += len(sections_by_id) - len(new_ids)
+        logger.info(
+            f"Updated {len(sections_by_source)} local sources: {stats['added']} chunks added, "
+            f"{stats['deleted']} deleted, {stats['unchanged']} unchanged."
+        )
+        return stats
+
+    @staticmethod
+    def _write_batch(
+        collection: Chroma,
+        ids: List[str],
+        documents: List[Document],
+        embeddings: List[List[float]],
+        source_type: Optional[str] = None,
+    ) -> None:
+        """
+        Writes a batch of already embedded documents to a Chroma collection.
+
+        Args:
+            collection (Chroma): The collection.
+            ids (List[str]): The chunk ID of each document.
+            documents (List[Document]): The documents.
+            embeddings (List[List[float]]): The embedding of each document.
+            source_type (Optional[str]): If given, stored in the metadata of each document
+                (unified collection).
+        """
+        collection._collection.upsert(  # Chroma.add_documents would embed the documents again
+            ids=ids,
+            embeddings=embeddings,  # type: ignore
+            documents=[document.page_content for document in documents],
+            # Chroma rejects empty metadata dicts
+            metadatas=[  # type: ignore
+                {**document.metadata, SOURCE_TYPE: source_type} if source_type else document.metadata or None
+                for document in documents
+            ],
+        )
+
     def query_local_embeddings(self, query: str, k: int) -> List[Document]:
         """
         Queries the local collection for relevant embeddings.
@@ -186,7 +574,9 @@ class EmbeddingManager:
         logger.debug(f"Querying local embeddings for: {query} with k={k}")
 
         # Perform similarity search on the local collection
-        results = self.local_collection.similarity_search(query, k)  # type: ignore
+        results = self.local_collection.similarity_search(  # type: ignore
+            query, k, filter={SOURCE_TYPE: LOCAL_SOURCE} if self.unified else None
+        )
 
         for result in results:
             logger.debug(
@@ -209,7 +599,9 @@ class EmbeddingManager:
         logger.debug(f"Querying web embeddings for: {query} with k={k}")
 
         # Perform similarity search on the web collection
-        results = self.web_collection.similarity_search(query, k)  # type: ignore
+        results = self.web_collection.similarity_search(  # type: ignore
+            query, k, filter={SOURCE_TYPE: WEB_SOURCE} if self.unified else None
+        )
 
         for result in results:
             logger.debug(
@@ -218,6 +610,50 @@ class EmbeddingManager:
 
         return results
 
+    def query_sources(self, query: str, k_local: int, k_web: int) -> Tuple[List[Document], List[Document]]:
+        """
+        Queries the local and web documents for relevant embeddings, embedding the query once.
+        In unified mode, a single nearest-neighbor query fetches `overfetch_factor` times the
+        requested chunks, which are split by source type up to the quota of each source. If
+        the candidates don't fill a quota (the other source dominates the results), that
+        source is queried again with a source type filter, reusing the query embedding.
+
+        Args:
+            query (str): The query string to search for.
+            k_local (int): The number of most similar local documents to return.
+            k_web (int): The number of most similar web documents to return.
+
+        Returns:
+            Tuple[List[Document], List[Document]]: The most relevant local and web documents.
+        """
+        logger.debug(f"Querying local and web embeddings for: {query} with k={k_local}/{k_web}")
+        embedding = self.embedding_model.embed_query(query)
+
+        if not self.unified:
+            return (
+                self.local_collection.similarity_search_by_vector(embedding, k_local) if k_local else [],  # type: ignore
+                self.web_collection.similarity_search_by_vector(embedding, k_web) if k_web else [],  # type: ignore
+            )
+
+        quotas = {LOCAL_SOURCE: k_local, WEB_SOURCE: k_web}
+        fetch_k = (k_local + k_web) * self.overfetch_factor
+        candidates = self.collection.similarity_search_by_vector(embedding, fetch_k) if fetch_k else []  # type: ignore
+        results: Dict[str, List[Document]] = {LOCAL_SOURCE: [], WEB_SOURCE: []}
+        for candidate in candidates:
+            source_type = candidate.metadata.get(SOURCE_TYPE)
+            if source_type in results and len(results[source_type]) < quotas[source_type]:
+                results[source_type].append(candidate)
+
+        # Fewer candidates than fetched: the whole collection was seen, no need to query again
+        if len(candidates) == fetch_k:
+            for source_type, quota in quotas.items():
+                if len(results[source_type]) < quota:
+                    logger.debug(f"Quota of {source_type} documents not filled, querying them alone.")
+                    results[source_type] = self.collection.similarity_search_by_vector(  # type: ignore
+                        embedding, quota, filter={SOURCE_TYPE: source_type}
+                    )
+        return results[LOCAL_SOURCE], results[WEB_SOURCE]
+
     def query_embeddings(self, query: str, k: int) -> List[Document]:
         """
         Queries both the local and web collections for relevant embeddings.
@@ -230,16 +666,7 @@ class EmbeddingManager:
             List[Document]: A combined list of relevant documents from both collections.
         """
         logger.debug(f"Querying all collections for: {query} with k={k}")
-
-        # Use ThreadPoolExecutor to parallelize similarity search across collections
-        with ThreadPoolExecutor() as executor:
-            futures = [
-                executor.submit(self.query_local_embeddings, query, k),
-                executor.submit(self.query_web_embeddings, query, k),
-            ]
-            results = [future.result() for future in futures]
+        local_results, web_results = self.query_sources(query, k, k)
 
         # Combine results from both collections
-        all_results = results[0] + results[1]
-
-        return all_results
+        return local_results + web_results
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+File: html_extractor.py
+
+This file defines extract_article, a fast path for WebLoader to get the main article
+of a documentation page (`<article class="bd-article">`, without its
+`<section id="gallery-examples">`) and the page title. Instead of building a
+BeautifulSoup tree of the whole page, it tokenizes the page with the standard
+library HTMLParser, records where the article and the gallery start and end, and
+slices them from the source. Tokenizing stops once the article and the title
+are found.
+
+The lxml / selectolax parsers aren't dependencies of the project; the HTML is
+converted to Markdown by markdownify, which parses the article again with
+BeautifulSoup anyway, so only the article subtree is ever materialized.
+"""
+
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+ARTICLE_TAG = "article"
+ARTICLE_CLASS = "bd-article"
+GALLERY_TAG = "section"
+GALLERY_ID = "gallery-examples"
+
+
+class _StopParsing(Exception):
+    """Raised to stop tokenizing once everything needed has been found."""
+
+
+class _ArticleLocator(HTMLParser):
+    """
+    Tokenizes a page recording the source offsets of the article and of its gallery
+    section, and the text of the first title.
+    """
+
+    def __init__(self, html: str) -> None:
+        super().__init__(convert_charrefs=True)
+        self._html = html
+        # Offset of the start of each line, to turn getpos() into source offsets
+        self._line_offsets: List[int] = [0]
+        position = html.find("\n")
+        while position != -1:
+            self._line_offsets.append(position + 1)
+            position = html.find("\n", position + 1)
+
+        self.title: Optional[str] = None
+        self._title_parts: Optional[List[str]] = None
+        self.article: Optional[Tuple[int, int]] = None
+        self.gallery: Optional[Tuple[int, int]] = None
+        self._article_start: Optional[int] = None
+        self._article_depth = 0
+        self._gallery_start: Optional[int] = None
+        self._gallery_depth = 0
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self._line_offsets[line - 1] + column
+
+    def _end_tag_end(self, start: int) -> int:
+        return self._html.index(">", start) + 1
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "title" and self.title is None and self._title_parts is None:
+            self._title_parts = []
+        elif tag == ARTICLE_TAG:
+            if self._article_start is not None:
+                self._article_depth += 1
+            elif self.article is None and ARTICLE_CLASS in (dict(attrs).get("class") or "").split():
+                self._article_start = self._offset()
+                self._article_depth = 1
+        elif tag == GALLERY_TAG and self._article_start is not None:
+            if self._gallery_start is not None:
+                self._gallery_depth += 1
+            elif self.gallery is None and dict(attrs).get("id") == GALLERY_ID:
+                self._gallery_start = self._offset()
+                self._gallery_depth = 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title" and self._title_parts is not None:
+            self.title = "".join(self._title_parts)
+            self._title_parts = None
+        elif tag == GALLERY_TAG and self._gallery_start is not None:
+            self._gallery_depth -= 1
+            if self._gallery_depth == 0:
+                self.gallery = (self._gallery_start, self._end_tag_end(self._offset()))
+                self._gallery_start = None
+        elif tag == ARTICLE_TAG and self._article_start is not None:
+            self._article_depth -= 1
+            if self._article_depth == 0:
+                self.article = (self._article_start, self._end_tag_end(self._offset()))
+                self._article_start = None
+                if self.title is not None:
+                    raise _StopParsing()
+
+    def handle_data(self, data: str) -> None:
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+
+    def close_unfinished(self) -> None:
+        """Closes the article (and gallery) left open at the end of the page."""
+        if self._gallery_start is not None:
+            self.gallery = (self._gallery_start, len(self._html))
+        if self._article_start is not None:
+            self.article = (self._article_start, len(self._html))
+        if self._title_parts is not None:
+            self.title = "".join(self._title_parts)
+
+
+def extract_article(html: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Extracts the main article of a documentation page, without its gallery of examples,
+    and the title of the page.
+
+    Args:
+        html (str): The HTML content of the page.
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: The HTML of the article (None if the page has
+            no `article.bd-article`) and the text of the title (None if it has no title).
+    """
+    locator = _ArticleLocator(html)
+    try:
+        locator.feed(html)
+        locator.close()
+    except _StopParsing:
+        pass
+    else:
+        locator.close_unfinished()
+
+    if locator.article is None:
+        return None, locator.title
+    start, end = locator.article
+    if locator.gallery is None:
+        return html[start:end], locator.title
+    gallery_start, gallery_end = locator.gallery
+    return html[start:gallery_start] + html[gallery_end:end], locator.title
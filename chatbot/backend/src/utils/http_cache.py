@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+File: http_cache.py
+
+This file defines the HttpCache class, an on-disk cache of the web pages loaded by
+WebLoader. For each URL it stores the validators of the response (ETag and
+Last-Modified) with the Markdown converted from the page and its metadata, so the
+page can be requested conditionally and, if it hasn't changed (304 Not Modified),
+used without parsing and converting it again.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Mapping, Optional
+
+from src.utils.logger_manager import logger
+
+
+class HttpCache:
+    """
+    On-disk cache of converted web pages, one JSON file per URL.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Initializes the HttpCache, creating its directory if it doesn't exist.
+
+        Args:
+            directory (str): Directory where the cache entries are stored.
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        """Returns the path of the entry of a URL."""
+        return os.path.join(
+            self.directory, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+        )
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached entry of a URL.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            Optional[Dict[str, Any]]: The entry (url, etag, last_modified, markdown and
+                metadata), or None if the URL isn't cached.
+        """
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry: Dict[str, Any] = json.load(file)
+            return entry if entry.get("url") == url else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry for {url}: {e}")
+            return None
+
+    def put(
+        self,
+        url: str,
+        headers: Mapping[str, str],
+        markdown: str,
+        metadata: Dict[str, str],
+    ) -> None:
+        """
+        Stores the converted page of a URL with the validators of its response. Responses
+        without ETag nor Last-Modified can't be requested conditionally and aren't stored.
+
+        Args:
+            url (str): The URL.
+            headers (Mapping[str, str]): The headers of the response.
+            markdown (str): The Markdown converted from the page.
+            metadata (Dict[str, str]): The metadata of the document.
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "markdown": markdown,
+            "metadata": metadata,
+        }
+        path = self._path(url)
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump(entry, file)
+            os.replace(temporary_path, path)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Returns the headers of a conditional request for a cached entry.
+
+        Args:
+            entry (Optional[Dict[str, Any]]): The cached entry, if any.
+
+        Returns:
+            Dict[str, str]: If-None-Match and If-Modified-Since headers (empty without entry).
+        """
+        headers: Dict[str, str] = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
@@ -10,10 +10,11 @@ Suitable for prototyping, testing, or use cases where persistence is not require
 """
 
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Tuple
 
 from langchain_core.vectorstores import InMemoryVectorStore
 from langchain_core.documents import Document
+from src.utils.embedding_cache import with_embedding_cache
 from src.utils.logger_manager import logger
 
 class InMemoryEmbeddingManager:
@@ -27,6 +28,7 @@ class InMemoryEmbeddingManager:
         embedding_model: Any,
         local_documents: List[Document],
         web_documents: List[Document],
+        embedding_cache_path: Optional[str] = None,
     ) -> None:
         """
         Initializes the InMemoryEmbeddingManager, which manages embeddings for local and web
@@ -36,8 +38,10 @@ class InMemoryEmbeddingManager:
             embedding_model (Embeddings): The model used to generate embeddings.
             local_documents (List[Document]): Local documents to index.
             web_documents (List[Document]): Web documents to index.
+            embedding_cache_path (Optional[str]): SQLite file of the embedding cache
+                (see embedding_cache.py). Defaults to the configured path.
         """
-        self.embedding_model = embedding_model
+        self.embedding_model = with_embedding_cache(embedding_model, embedding_cache_path)
         self.local_documents = local_documents
         self.web_documents = web_documents
 
@@ -111,6 +115,28 @@ class InMemoryEmbeddingManager:
             )
         return results
 
+    def query_sources(self, query: str, k_local: int, k_web: int) -> Tuple[List[Document], List[Document]]:
+        """
+        Queries the local and web in-memory stores for relevant embeddings, embedding the query once.
+
+        Args:
+            query (str): The query string to search for.
+            k_local (int): The number of most similar local documents to return.
+            k_web (int): The number of most similar web documents to return.
+
+        Returns:
+            Tuple[List[Document], List[Document]]: The most relevant local and web documents.
+        """
+        logger.debug(f"Querying local and web in-memory embeddings for: {query} with k={k_local}/{k_web}")
+        embedding = self.embedding_model.embed_query(query)
+        local_results = (
+            self.local_store.similarity_search_by_vector(embedding, k=k_local) if self.local_store and k_local else []
+        )
+        web_results = (
+            self.web_store.similarity_search_by_vector(embedding, k=k_web) if self.web_store and k_web else []
+        )
+        return local_results, web_results
+
     def query_embeddings(self, query: str, k: int) -> List[Document]:
         """
         Queries both the local and web in-memory stores for relevant embeddings.
@@ -123,11 +149,5 @@ class InMemoryEmbeddingManager:
             List[Document]: A combined list of relevant documents from both stores.
         """
         logger.debug(f"Querying all in-memory stores for: {query} with k={k}")
-        with ThreadPoolExecutor() as executor:
-            futures = [
-                executor.submit(self.query_local_embeddings, query, k),
-                executor.submit(self.query_web_embeddings, query, k),
-            ]
-            results = [future.result() for future in futures]
-        all_results = results[0] + results[1]
-        return all_results
+        local_results, web_results = self.query_sources(query, k, k)
+        return local_results + web_results
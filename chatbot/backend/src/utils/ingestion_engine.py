@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+File: ingestion_engine.py
+
+This file defines the IngestionEngine class, which embeds chunks in batches and writes
+them to a vector store. Batches are embedded concurrently (bounded by `concurrency`
+and a rate limit on the embedding requests) and written in order, and each written
+batch is recorded in a JSON checkpoint file, so a restarted run resumes after the last
+written batch. At the end of each run it reports the throughput (chunks/sec, tokens/sec).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+from src.config.config_init import INGESTION_CONFIG
+from src.utils.logger_manager import logger
+
+# Writes a batch to the store: (ids, documents, embeddings)
+BatchWriter = Callable[[List[str], List[Document], List[List[float]]], None]
+
+
+def count_tokens(text: str) -> int:
+    """Approximates the number of tokens of a text by its whitespace-separated words."""
+    return len(text.split())
+
+
+class IngestionEngine:
+    """
+    Embeds and writes chunks in batches, concurrently, rate-limited and resumable.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Any,
+        batch_size: int = INGESTION_CONFIG["batch_size"],
+        concurrency: int = INGESTION_CONFIG["concurrency"],
+        requests_per_minute: Optional[float] = INGESTION_CONFIG["requests_per_minute"],
+        max_retries: int = INGESTION_CONFIG["max_retries"],
+        checkpoint_path: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes the IngestionEngine.
+
+        Args:
+            embedding_model (Embeddings): The model used to embed the chunks.
+            batch_size (int): Chunks per embedding request and per write.
+            concurrency (int): Maximum number of embedding requests in flight.
+            requests_per_minute (Optional[float]): Maximum embedding requests per minute (None for no limit).
+            max_retries (int): Attempts per batch before the ingestion fails.
+            checkpoint_path (Optional[str]): JSON file recording the written batches. Without it,
+                runs can't be resumed.
+        """
+        if batch_size < 1 or concurrency < 1:
+            raise ValueError("batch_size and concurrency must be positive.")
+        self.embedding_model = embedding_model
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.checkpoint_path = checkpoint_path
+        # Shared by every run of the engine, e.g. the local and web collections indexed in parallel
+        self.rate_limiter: Optional[InMemoryRateLimiter] = (
+            InMemoryRateLimiter(
+                requests_per_second=requests_per_minute / 60.0,
+                check_every_n_seconds=0.05,
+                max_bucket_size=concurrency,
+            )
+            if requests_per_minute
+            else None
+        )
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._checkpoint_lock = threading.Lock()
+        self._checkpoint: Dict[str, Dict[str, Any]] = self._load_checkpoint()
+
+    def has_checkpoint(self) -> bool:
+        """Returns whether a previous run was interrupted, leaving batches to resume."""
+        return bool(self._checkpoint)
+
+    def ingest(
+        self,
+        key: str,
+        ids: List[str],
+        documents: List[Document],
+        write: BatchWriter,
+    ) -> Dict[str, float]:
+        """
+        Embeds the documents in batches and writes them, in order, with the writer. If the
+        checkpoint has written batches of the same key and the same ids, they are skipped.
+
+        Args:
+            key (str): Name of the ingestion in the checkpoint (e.g. the collection name).
+            ids (List[str]): The ID of each document.
+            documents (List[Document]): The documents to embed and write.
+            write (BatchWriter): Writes a batch of ids, documents and embeddings to the store.
+
+        Returns:
+            Dict[str, float]: Throughput statistics of the run: chunks, tokens, batches,
+                resumed_batches, seconds, chunks_per_sec and tokens_per_sec.
+        """
+        batches: List[Tuple[List[str], List[Document]]] = [
+            (ids[start : start + self.batch_size], documents[start : start + self.batch_size])
+            for start in range(0, len(ids), self.batch_size)
+        ]
+        fingerprint = hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()
+        resumed = self._resumed_batches(key, fingerprint, len(batches))
+        if resumed:
+            logger.info(f"Resuming '{key}' ingestion after {resumed}/{len(batches)} written batches.")
+
+        start_time = time.perf_counter()
+        chunks = tokens = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # Embedding requests in flight, written in submission order as they complete
+            pending: Deque[Tuple[int, Future]] = deque()
+            next_batch = resumed
+            while next_batch < len(batches) or pending:
+                while next_batch < len(batches) and len(pending) < self.concurrency:
+                    pending.append(
+                        (next_batch, executor.submit(self.embed_batch, batches[next_batch][1]))
+                    )
+                    next_batch += 1
+                index, future = pending.popleft()
+                batch_ids, batch_documents = batches[index]
+                write(batch_ids, batch_documents, future.result())
+                self._save_progress(key, fingerprint, index + 1)
+
+                chunks += len(batch_ids)
+                tokens += sum(count_tokens(document.page_content) for document in batch_documents)
+                logger.debug(f"'{key}' ingestion: batch {index + 1}/{len(batches)} written.")
+
+        self._clear_progress(key)
+        seconds = time.perf_counter() - start_time
+        stats = {
+            "chunks": chunks,
+            "tokens": tokens,
+            "batches": len(batches) - resumed,
+            "resumed_batches": resumed,
+            "seconds": seconds,
+            "chunks_per_sec": chunks / seconds if seconds else 0.0,
+            "tokens_per_sec": tokens / seconds if seconds else 0.0,
+        }
+        self.stats[key] = stats
+        logger.info(
+            f"'{key}' ingestion: {chunks} chunks in {seconds:.2f}s "
+            f"({stats['chunks_per_sec']:.1f} chunks/sec, {stats['tokens_per_sec']:.1f} tokens/sec)."
+        )
+        return stats
+
+    def embed_batch(self, documents: List[Document]) -> List[List[float]]:
+        """
+        Embeds a batch, waiting for the rate limiter and retrying with exponential backoff.
+        """
+        texts = [document.page_content for document in documents]
+        for attempt in range(self.max_retries):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                return self.embedding_model.embed_documents(texts)
+            except Exception as e:
+                if attempt + 1 == self.max_retries:
+                    raise
+                logger.warning(
+                    f"Attempt {attempt + 1}/{self.max_retries} to embed a batch failed: {e}"
+                )
+                time.sleep(2**attempt)
+        return []
+
+    def _load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        """Loads the checkpoint file, if any."""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ingestion checkpoint {self.checkpoint_path}: {e}")
+            return {}
+
+    def _resumed_batches(self, key: str, fingerprint: str, total: int) -> int:
+        """Returns the batches of the key already written, if the checkpoint is for the same ids."""
+        with self._checkpoint_lock:
+            progress = self._checkpoint.get(key)
+        if not progress or progress.get("fingerprint") != fingerprint:
+            return 0
+        return min(int(progress.get("written_batches", 0)), total)
+
+    def _save_progress(self, key: str, fingerprint: str, written_batches: int) -> None:
+        """Records the written batches of the key in the checkpoint file."""
+        with self._checkpoint_lock:
+            self._checkpoint[key] = {"fingerprint": fingerprint, "written_batches": written_batches}
+            self._write_checkpoint()
+
+    def _clear_progress(self, key: str) -> None:
+        """Removes a completed ingestion from the checkpoint (and the file once it's empty)."""
+        with self._checkpoint_lock:
+            self._checkpoint.pop(key, None)
+            self._write_checkpoint()
+
+    def _write_checkpoint(self) -> None:
+        """Writes the checkpoint atomically (temporary file and rename), or deletes it if empty."""
+        if not self.checkpoint_path:
+            return
+        if not self._checkpoint:
+            if os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint_path)), exist_ok=True)
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(self._checkpoint, file)
+        os.replace(temporary_path, self.checkpoint_path)
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+File: ingestion_pipeline.py
+
+This file defines the IngestionPipeline class, which indexes documents as a stream
+instead of loading, splitting and embedding the whole corpus one step after the other.
+Four stages run in their own threads, connected by bounded queues:
+- load: iterates the documents (e.g. DirectoryLoader.iter_documents, WebLoader.iter_documents)
+- split: splits and cleans each document into sections (see section_splitter.py), drops
+  the near-duplicate sections (see chunk_deduplicator.py), and groups the sections not
+  stored yet into batches
+- embed: embeds the batches, with the rate limit and retries of the IngestionEngine
+  (`concurrency` threads)
+- write: writes the embedded batches to the store
+Embedding starts as soon as the first batch of sections exists, and since the queues
+are bounded, memory doesn't grow with the corpus: only the chunk IDs are kept. Each
+stage reports its throughput and the occupancy of the queue it reads from.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+from src.config.config_init import INGESTION_CONFIG
+from src.utils.chunk_deduplicator import ChunkDeduplicator
+from src.utils.ingestion_engine import BatchWriter, IngestionEngine
+from src.utils.logger_manager import logger
+from src.utils.section_splitter import split_texts
+
+# Marks the end of a queue
+_END = object()
+
+# Returns the ID of a chunk (see embedding_manager.chunk_id)
+ChunkId = Callable[[Document], str]
+
+
+class _PipelineFailed(Exception):
+    """Raised in a stage when another stage failed, to stop it."""
+
+
+class _StageStats:
+    """Counts the items of a stage, its busy time and the occupancy of its input queue."""
+
+    def __init__(self) -> None:
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.queue_samples = 0
+        self.queue_total = 0
+        self.queue_max = 0
+        self._lock = threading.Lock()
+
+    def record(self, items: int, seconds: float) -> None:
+        with self._lock:
+            self.items += items
+            self.busy_seconds += seconds
+
+    def sample_queue(self, size: int) -> None:
+        with self._lock:
+            self.queue_samples += 1
+            self.queue_total += size
+            self.queue_max = max(self.queue_max, size)
+
+    def as_dict(self, queue_size: Optional[int]) -> Dict[str, float]:
+        stats = {
+            "items": self.items,
+            "busy_seconds": self.busy_seconds,
+            "items_per_sec": self.items / self.busy_seconds if self.busy_seconds else 0.0,
+        }
+        if queue_size is not None:
+            stats["queue_size"] = queue_size
+            stats["queue_mean"] = self.queue_total / self.queue_samples if self.queue_samples else 0.0
+            stats["queue_max"] = self.queue_max
+        return stats
+
+
+class IngestionPipeline:
+    """
+    Loads, splits, cleans, embeds and writes documents as a stream of bounded stages.
+    """
+
+    def __init__(
+        self,
+        ingestion_engine: IngestionEngine,
+        chunk_id: ChunkId,
+        plain_words_only: bool = True,
+        queue_size: int = INGESTION_CONFIG["queue_size"],
+        deduplicator: Optional[ChunkDeduplicator] = None,
+    ) -> None:
+        """
+        Initializes the IngestionPipeline.
+
+        Args:
+            ingestion_engine (IngestionEngine): Gives the batch size, the embedding concurrency
+                and the rate-limited embedding of the batches.
+            chunk_id (ChunkId): Returns the deterministic ID of a section.
+            plain_words_only (bool): If True, the sections are cleaned with clean_markdown.
+            queue_size (int): Capacity of each queue between two stages.
+            deduplicator (Optional[ChunkDeduplicator]): If given, the sections that are
+                near-duplicates of a section it has seen (possibly in another run, e.g. of the
+                other collection) are dropped. Defaults to keeping every section.
+        """
+        if queue_size < 1:
+            raise ValueError("queue_size must be positive.")
+        self.ingestion_engine = ingestion_engine
+        self.chunk_id = chunk_id
+        self.plain_words_only = plain_words_only
+        self.queue_size = queue_size
+        self.deduplicator = deduplicator
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+        self._failed = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def run(
+        self,
+        key: str,
+        documents: Iterable[Document],
+        stored_ids: Set[str],
+        write: BatchWriter,
+    ) -> Set[str]:
+        """
+        Indexes a stream of documents: the sections whose ID is in `stored_ids` are kept
+        as they are, the others are embedded and written with the writer.
+
+        Args:
+            key (str): Name of the run in the logs and statistics (e.g. the collection name).
+            documents (Iterable[Document]): The documents, before splitting.
+            stored_ids (Set[str]): The IDs of the sections already in the store.
+            write (BatchWriter): Writes a batch of ids, sections and embeddings to the store.
+
+        Returns:
+            Set[str]: The IDs of every section of the documents, to delete the stored
+                sections that are no longer in them.
+
+        Raises:
+            Exception: The first error of a stage, once every stage has stopped.
+        """
+        self._failed.clear()
+        self._errors = []
+        documents_queue: "queue.Queue[Any]" = queue.Queue(self.queue_size)
+        batches_queue: "queue.Queue[Any]" = queue.Queue(self.queue_size)
+        embedded_queue: "queue.Queue[Any]" = queue.Queue(self.queue_size)
+        concurrency = self.ingestion_engine.concurrency
+        stages = {name: _StageStats() for name in ("load", "split", "embed", "write")}
+        section_ids: Set[str] = set()
+        counts = {"documents": 0, "sections": 0, "new": 0, "duplicates": 0}
+
+        threads = [
+            threading.Thread(
+                target=self._guard,
+                args=(self._load, documents, documents_queue, stages["load"], counts),
+                name=f"{key}-load",
+            ),
+            threading.Thread(
+                target=self._guard,
+                args=(self._split, documents_queue, batches_queue, stages["split"],
+                      stored_ids, section_ids, counts, concurrency),
+                name=f"{key}-split",
+            ),
+            *[
+                threading.Thread(
+                    target=self._guard,
+                    args=(self._embed, batches_queue, embedded_queue, stages["embed"]),
+                    name=f"{key}-embed-{index}",
+                )
+                for index in range(concurrency)
+            ],
+            threading.Thread(
+                target=self._guard,
+                args=(self._write, embedded_queue, write, stages["write"], concurrency),
+                name=f"{key}-write",
+            ),
+        ]
+        start_time = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start_time
+
+        if self._errors:
+            raise self._errors[0]
+
+        queue_sizes = {"load": None, "split": self.queue_size, "embed": self.queue_size, "write": self.queue_size}
+        self.stats[key] = {
+            **{name: stage.as_dict(queue_sizes[name]) for name, stage in stages.items()},
+            "total": {
+                "documents": counts["documents"],
+                "sections": counts["sections"],
+                "new_sections": counts["new"],
+                "duplicate_sections": counts["duplicates"],
+                "seconds": seconds,
+                "sections_per_sec": counts["sections"] / seconds if seconds else 0.0,
+            },
+        }
+        logger.info(
+            f"'{key}' pipeline: {counts['documents']} documents, {counts['sections']} sections "
+            f"({counts['new']} new, {counts['duplicates']} near-duplicates dropped) in {seconds:.2f}s. "
+            + ", ".join(
+                f"{name}: {stats['items']} items at {stats['items_per_sec']:.1f}/s"
+                + (f", queue {stats['queue_mean']:.1f}/{self.queue_size} (max {stats['queue_max']})"
+                   if "queue_mean" in stats else "")
+                for name, stats in self.stats[key].items()
+                if name != "total"
+            )
+        )
+        return section_ids
+
+    def _guard(self, stage: Callable[..., None], *args: Any) -> None:
+        """Runs a stage, recording its error and stopping the other stages if it fails."""
+        try:
+            stage(*args)
+        except _PipelineFailed:
+            pass
+        except BaseException as e:  # noqa: B902 - reraised by run
+            logger.error(f"Ingestion pipeline stage {threading.current_thread().name} failed: {e}")
+            self._errors.append(e)
+            self._failed.set()
+
+    def _put(self, target: "queue.Queue[Any]", item: Any) -> None:
+        """Puts an item, waiting for room unless the pipeline failed."""
+        while True:
+            if self._failed.is_set():
+                raise _PipelineFailed()
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source: "queue.Queue[Any]", stats: _StageStats) -> Any:
+        """Gets an item, sampling the occupancy of the queue, unless the pipeline failed."""
+        stats.sample_queue(source.qsize())
+        while True:
+            if self._failed.is_set():
+                raise _PipelineFailed()
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _load(
+        self,
+        documents: Iterable[Document],
+        output: "queue.Queue[Any]",
+        stats: _StageStats,
+        counts: Dict[str, int],
+    ) -> None:
+        """Load stage: iterates the documents into the queue."""
+        iterator = iter(documents)
+        while True:
+            start = time.perf_counter()
+            document = next(iterator, _END)
+            stats.record(0 if document is _END else 1, time.perf_counter() - start)
+            if document is _END:
+                break
+            counts["documents"] += 1
+            self._put(output, document)
+        self._put(output, _END)
+
+    def _split(
+        self,
+        source: "queue.Queue[Any]",
+        output: "queue.Queue[Any]",
+        stats: _StageStats,
+        stored_ids: Set[str],
+        section_ids: Set[str],
+        counts: Dict[str, int],
+        embed_workers: int,
+    ) -> None:
+        """Split stage: splits and cleans the documents, batching the new sections that aren't near-duplicates."""
+        batch_size = self.ingestion_engine.batch_size
+        batch: Tuple[List[str], List[Document]] = ([], [])
+        while True:
+            document = self._get(source, stats)
+            if document is _END:
+                break
+            start = time.perf_counter()
+            sections = split_texts([document.page_content], self.plain_words_only)[0]
+            full_batches = []
+            for text in sections:
+                section = Document(page_content=text, metadata=document.metadata)
+                section_id = self.chunk_id(section)
+                # Identical sections of the same source share an ID, only the first one is kept
+                if section_id in section_ids:
+                    continue
+                if self.deduplicator and self.deduplicator.is_duplicate(section):
+                    counts["duplicates"] += 1
+                    continue
+                section_ids.add(section_id)
+                counts["sections"] += 1
+                if section_id in stored_ids:
+                    continue
+                counts["new"] += 1
+                batch[0].append(section_id)
+                batch[1].append(section)
+                if len(batch[0]) == batch_size:
+                    full_batches.append(batch)
+                    batch = ([], [])
+            stats.record(1, time.perf_counter() - start)
+            for full_batch in full_batches:
+                self._put(output, full_batch)
+        if batch[0]:
+            self._put(output, batch)
+        for _ in range(embed_workers):
+            self._put(output, _END)
+
+    def _embed(
+        self,
+        source: "queue.Queue[Any]",
+        output: "queue.Queue[Any]",
+        stats: _StageStats,
+    ) -> None:
+        """Embed stage (one of the `concurrency` threads): embeds the batches."""
+        while True:
+            batch = self._get(source, stats)
+            if batch is _END:
+                break
+            ids, sections = batch
+            start = time.perf_counter()
+            embeddings = self.ingestion_engine.embed_batch(sections)
+            stats.record(len(ids), time.perf_counter() - start)
+            self._put(output, (ids, sections, embeddings))
+        self._put(output, _END)
+
+    def _write(
+        self,
+        source: "queue.Queue[Any]",
+        write: BatchWriter,
+        stats: _StageStats,
+        embed_workers: int,
+    ) -> None:
+        """Write stage: writes the embedded batches, until every embed thread is done."""
+        remaining_workers = embed_workers
+        while remaining_workers:
+            item = self._get(source, stats)
+            if item is _END:
+                remaining_workers -= 1
+                continue
+            ids, sections, embeddings = item
+            start = time.perf_counter()
+            write(ids, sections, embeddings)
+            stats.record(len(ids), time.perf_counter() - start)
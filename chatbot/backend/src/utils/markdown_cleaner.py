@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+File: markdown_cleaner.py
+
+This file defines clean_markdown, which converts a Markdown section into plain words
+(used by DocumentManager when plain_words_only is set).
+
+The cleaning is a sequence of ordered passes: a pass can remove text that a later pass
+would match, or join text into something a later pass matches (e.g. removing the image of
+"[![badge](img)](link)" leaves a link), so the passes are kept in their original order.
+To make them cheap:
+- Patterns are compiled once, when the module is imported.
+- Each pass only runs if the section contains its trigger characters (most sections have
+  no code blocks, tables or HTML), checked with a substring search instead of a regex scan.
+- Passes that commute are merged: the emphasis and backtick removals are a single
+  str.translate, and the newline and tab collapses a single regex.
+"""
+
+import re
+from typing import Callable, List, Pattern, Tuple
+
+# An ordered pass: (gate, pattern, replacement). The pass only runs when the gate finds its
+# trigger characters in the text, since the pattern can't match otherwise.
+Pass = Tuple[Callable[[str], bool], Pattern[str], str]
+
+_PASSES: List[Pass] = [
+    # Code blocks (```...``` including content)
+    (lambda text: "```" in text, re.compile(r"```[\s\S]*?```"), ""),
+    # Images ![alt](url)
+    (lambda text: "![" in text and "](" in text, re.compile(r"!\[[^\]]*\]\([^\)]*\)"), ""),
+    # Links [text](url)
+    (lambda text: "](" in text, re.compile(r"\[[^\]]*\]\([^\)]*\)"), ""),
+    # Double-bracket links [[text]](url)
+    (lambda text: "]](" in text, re.compile(r"\[\[[^\]]*\]\]\([^\)]*\)"), ""),
+    # Reference-style links [text][id]
+    (lambda text: "][" in text, re.compile(r"\[[^\]]*\]\[[^\]]*\]"), ""),
+    # Footnote references [^1]
+    (lambda text: "[^" in text, re.compile(r"\[\^\d+\]"), ""),
+    # Tables (lines starting/containing |)
+    (lambda text: "|" in text, re.compile(r"^\s*\|.*\|\s*$", flags=re.MULTILINE), ""),
+    # Table header separators (| --- |)
+    (lambda text: "|" in text and "-" in text, re.compile(r"^\s*\|?\s*:?-+:?\s*\|.*$", flags=re.MULTILINE), ""),
+    # HTML tags
+    (lambda text: "<" in text and ">" in text, re.compile(r"<[^>]+>"), ""),
+    # Headers (#, ##, ###, etc.)
+    (lambda text: "#" in text, re.compile(r"^#+\s*", flags=re.MULTILINE), ""),
+]
+
+# Emphasis (*, _, **, __) and inline code/backticks, removed character by character
+_EMPHASIS_TABLE = str.maketrans("", "", "*_`")
+
+# Passes run after the emphasis removal
+_LATE_PASSES: List[Pass] = [
+    # Blockquotes
+    (lambda text: ">" in text, re.compile(r"^>\s*", flags=re.MULTILINE), ""),
+    # Unordered list markers (-, + at line start, * is already removed)
+    (lambda text: "-" in text or "+" in text, re.compile(r"^(\s*[-*+])\s+", flags=re.MULTILINE), ""),
+    # Horizontal rules
+    (lambda text: "---" in text, re.compile(r"^---+$", flags=re.MULTILINE), ""),
+]
+
+# Runs of newlines or tabs, collapsed into one
+_REPEATED_WHITESPACE = re.compile(r"([\n\t])\1+")
+
+
+def _run_passes(text: str, passes: List[Pass]) -> str:
+    """Runs, in order, the passes whose trigger characters are in the text."""
+    for gate, pattern, replacement in passes:
+        if gate(text):
+            text = pattern.sub(replacement, text)
+    return text
+
+
+def clean_markdown(text: str) -> str:
+    """
+    Converts a Markdown section into plain words, removing code blocks, images, links,
+    footnotes, tables, HTML tags, headers, emphasis, blockquotes, list markers and
+    horizontal rules, and collapsing repeated newlines and tabs.
+
+    Args:
+        text (str): The Markdown section.
+
+    Returns:
+        str: The cleaned section.
+    """
+    text = _run_passes(text, _PASSES)
+    text = text.translate(_EMPHASIS_TABLE)
+    text = _run_passes(text, _LATE_PASSES)
+    if "\n\n" in text or "\t\t" in text:
+        text = _REPEATED_WHITESPACE.sub(r"\1", text)
+    return text.strip()
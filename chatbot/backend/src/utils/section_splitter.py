@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+File: section_splitter.py
+
+This file defines split_documents, which splits documents into sections with
+MarkdownTextSplitter and cleans them (see markdown_cleaner.py). Splitting and cleaning
+are pure-Python regex work that threads can't run in parallel (GIL), so large corpora
+are sent in chunks of documents to a process pool, while small corpora, for which
+starting the processes costs more than it saves, are split in-process. The sections
+are in the same order either way: those of each document, in the order of the documents.
+"""
+
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional
+
+from langchain.text_splitter import MarkdownTextSplitter
+from langchain_core.documents import Document
+
+from src.config.config_init import MARKDOWN_SPLITTER_CONFIG, SECTION_SPLITTER_CONFIG
+from src.utils.markdown_cleaner import clean_markdown
+
+# Splitter of the current process, created on first use
+_splitter: Optional[MarkdownTextSplitter] = None
+
+
+def split_texts(texts: List[str], plain_words_only: bool) -> List[List[str]]:
+    """
+    Splits texts into sections, cleaned as plain words only if requested.
+
+    Args:
+        texts (List[str]): The texts to split.
+        plain_words_only (bool): If True, the sections are cleaned with clean_markdown.
+
+    Returns:
+        List[List[str]]: The sections of each text.
+    """
+    global _splitter
+    if _splitter is None:
+        _splitter = MarkdownTextSplitter(**MARKDOWN_SPLITTER_CONFIG)
+    splitter = _splitter
+    if plain_words_only:
+        return [[clean_markdown(section) for section in splitter.split_text(text)] for text in texts]
+    return [splitter.split_text(text) for text in texts]
+
+
+def create_split_executor(workers: int = SECTION_SPLITTER_CONFIG["workers"]) -> ProcessPoolExecutor:
+    """
+    Creates the process pool that split_documents uses for large corpora.
+
+    Args:
+        workers (int): Number of processes.
+
+    Returns:
+        ProcessPoolExecutor: The process pool, to shut down by the caller.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        # Forking a process with running threads (gunicorn, loaders) isn't safe
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def split_documents(
+    documents: List[Document],
+    plain_words_only: bool = True,
+    executor: Optional[Executor] = None,
+    parallel_min_characters: int = SECTION_SPLITTER_CONFIG["parallel_min_characters"],
+) -> List[Document]:
+    """
+    Splits documents into sections that keep the metadata of their document.
+
+    Args:
+        documents (List[Document]): The documents to split.
+        plain_words_only (bool): If True, the sections are cleaned with clean_markdown.
+        executor (Optional[Executor]): Process pool splitting the documents if they have at
+            least `parallel_min_characters` characters. Without it, a pool of the configured
+            number of workers is created for them (none if it's less than 2).
+        parallel_min_characters (int): Smallest corpus, in characters, split in the process pool.
+
+    Returns:
+        List[Document]: The sections, in document order.
+    """
+    texts = [doc.page_content for doc in documents]
+    workers = SECTION_SPLITTER_CONFIG["workers"]
+    if (executor is None and workers < 2) or sum(len(text) for text in texts) < parallel_min_characters:
+        sections_per_text = split_texts(texts, plain_words_only)
+    else:
+        # Chunks of documents, so that each task is worth its inter-process round trip
+        per_task = SECTION_SPLITTER_CONFIG["documents_per_task"]
+        chunks = [texts[start:start + per_task] for start in range(0, len(texts), per_task)]
+        own_executor = executor is None
+        pool = create_split_executor(min(workers, len(chunks))) if own_executor else executor
+        try:
+            # map returns the results in the order of the chunks
+            results = pool.map(split_texts, chunks, [plain_words_only] * len(chunks))  # type: ignore
+            sections_per_text = [sections for chunk in results for sections in chunk]
+        finally:
+            if own_executor:
+                pool.shutdown()  # type: ignore
+
+    return [
+        Document(page_content=section, metadata=doc.metadata)
+        for doc, sections in zip(documents, sections_per_text)
+        for section in sections
+    ]
+
@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+File: web_crawler.py
+
+This file contains the WebCrawler class, the crawler mode of WebLoader: instead of a
+hand-picked list of URLs, it loads the documentation pages listed in sitemaps.
+- Sitemaps (and sitemap indexes, gzipped or not) seed the crawl with their URLs.
+- Only URLs allowed by the domain and prefix allowlists are visited.
+- URLs are canonicalized (scheme and host case, default ports, dot segments,
+  fragments, query order, tracking parameters) and deduplicated.
+- URLs wait in a bounded frontier queue: when it's full, new URLs are dropped.
+  With `follow_links`, the links of the visited pages are added to it.
+- Requests (sitemaps and pages) are rate-limited.
+- The crawl state (sitemap lastmod and links of each URL) is persisted, so a
+  recrawl doesn't request the pages whose lastmod hasn't changed and serves them
+  from the page cache. Other pages are requested conditionally (see http_cache.py).
+"""
+
+import gzip
+import json
+import os
+import posixpath
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import requests
+from langchain_core.documents import Document
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+from src.config.config_init import WEB_CRAWLER_CONFIG, WEB_LOADER_CONFIG
+from src.utils.logger_manager import logger
+from src.utils.web_loader import WebLoader
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMETERS = ("utm_", "fbclid", "gclid")
+
+
+def canonicalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Returns the canonical form of a URL, so that equivalent URLs are deduplicated:
+    lowercase scheme and host, no default port, no dot segments, no fragment, and
+    sorted query parameters without tracking parameters.
+
+    Args:
+        url (str): The URL, absolute or relative to `base`.
+        base (Optional[str]): The URL of the page the URL was found in.
+
+    Returns:
+        Optional[str]: The canonical URL, or None if it isn't an http(s) URL.
+    """
+    parts = urlsplit(urljoin(base, url.strip()) if base else url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    netloc = parts.hostname.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+
+    path = parts.path or "/"
+    if "." in path or "//" in path:
+        normalized = posixpath.normpath(path)
+        path = normalized + ("/" if path.endswith("/") and normalized != "/" else "")
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.startswith(TRACKING_PARAMETERS)
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class _LinkExtractor(HTMLParser):
+    """Collects the href of the <a> tags of a page."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+
+
+class WebCrawler(WebLoader):
+    def __init__(
+        self,
+        sitemap_urls: List[str],
+        allowed_prefixes: Optional[List[str]] = None,
+        allowed_domains: Optional[List[str]] = None,
+        seed_urls: Optional[List[str]] = None,
+        follow_links: bool = WEB_CRAWLER_CONFIG["follow_links"],
+        max_pages: int = WEB_CRAWLER_CONFIG["max_pages"],
+        max_frontier: int = WEB_CRAWLER_CONFIG["max_frontier"],
+        requests_per_second: float = WEB_CRAWLER_CONFIG["requests_per_second"],
+        state_path: Optional[str] = WEB_CRAWLER_CONFIG["state_path"],
+        cache_directory: Optional[str] = None,
+        use_cache: bool = WEB_LOADER_CONFIG["cache_enabled"],
+    ) -> None:
+        """
+        Initializes the WebCrawler instance.
+
+        Args:
+            sitemap_urls (List[str]): URLs of the sitemaps (or sitemap indexes) seeding the crawl.
+            allowed_prefixes (Optional[List[str]]): Only URLs starting with one of these prefixes are crawled.
+            allowed_domains (Optional[List[str]]): Only URLs of these domains (or their subdomains) are crawled.
+                Without prefixes nor domains, the domains of the sitemaps are allowed.
+            seed_urls (Optional[List[str]]): Pages crawled in addition to those of the sitemaps,
+                even if the allowlists don't allow them.
+            follow_links (bool): If True, the links of the visited pages are crawled too.
+            max_pages (int): Maximum number of pages visited.
+            max_frontier (int): Maximum number of URLs waiting to be visited.
+            requests_per_second (float): Maximum requests per second (sitemaps and pages).
+            state_path (Optional[str]): JSON file of the crawl state (None to not persist it).
+            cache_directory (Optional[str]): Directory of the page cache. Defaults to the configured one.
+            use_cache (bool): If False, every page is fetched and converted again.
+        """
+        super().__init__(urls=[], cache_directory=cache_directory, use_cache=use_cache)
+        self.sitemap_urls = sitemap_urls
+        self.seed_urls = seed_urls or []
+        self.allowed_prefixes = [
+            canonicalize_url(prefix) or prefix for prefix in (allowed_prefixes or [])
+        ]
+        self.allowed_domains = [domain.lower() for domain in (allowed_domains or [])]
+        if not self.allowed_prefixes and not self.allowed_domains:
+            self.allowed_domains = [
+                urlsplit(url).hostname or "" for url in sitemap_urls + self.seed_urls
+            ]
+        self.follow_links = follow_links
+        self.max_pages = max_pages
+        self.max_frontier = max_frontier
+        self.state_path = state_path
+        self.rate_limiter = InMemoryRateLimiter(
+            requests_per_second=requests_per_second,
+            check_every_n_seconds=min(0.1, 1 / requests_per_second),
+            max_bucket_size=1,
+        )
+
+        self._frontier: Deque[str] = deque()
+        self._seen: Set[str] = set()
+        self._lastmods: Dict[str, Optional[str]] = {}
+        self._state: Dict[str, Dict[str, Any]] = self._load_state()
+        self.stats: Dict[str, int] = {}
+
+    def is_allowed(self, url: str) -> bool:
+        """
+        Returns whether a canonical URL is allowed by the prefix and domain allowlists.
+        """
+        if self.allowed_prefixes and not any(url.startswith(prefix) for prefix in self.allowed_prefixes):
+            return False
+        if self.allowed_domains:
+            host = urlsplit(url).hostname or ""
+            return any(host == domain or host.endswith(f".{domain}") for domain in self.allowed_domains)
+        return True
+
+    def get_documents(self) -> List[Document]:
+        """
+        Crawls the pages of the sitemaps (and their links, with `follow_links`) and returns
+        their documents, in the order they were visited.
+
+        Returns:
+            List[Document]: A list of Document objects containing the content of the crawled pages.
+        """
+        return list(self.iter_documents())
+
+    def iter_documents(self) -> Iterator[Document]:
+        """
+        Crawls the pages of the sitemaps (and their links, with `follow_links`), yielding
+        their documents wave by wave, in the order they were visited. The crawl state is
+        saved after each wave and replaced once the crawl is complete.
+
+        Yields:
+            Document: The content of each crawled page.
+        """
+        self._frontier.clear()
+        self._seen.clear()
+        self._lastmods.clear()
+        self.not_modified = 0
+        self.stats = {"visited": 0, "unchanged": 0, "not_modified": 0, "failed": 0, "dropped": 0}
+
+        for sitemap_url in self.sitemap_urls:
+            self._read_sitemap(sitemap_url, depth=0)
+        for url in self.seed_urls:
+            self._enqueue(url, check_allowed=False)
+
+        documents = 0
+        new_state: Dict[str, Dict[str, Any]] = {}
+        with ThreadPoolExecutor(max_workers=WEB_CRAWLER_CONFIG["concurrency"]) as executor:
+            while self._frontier and self.stats["visited"] + self.stats["unchanged"] < self.max_pages:
+                budget = self.max_pages - self.stats["visited"] - self.stats["unchanged"]
+                wave_size = min(len(self._frontier), budget, WEB_CRAWLER_CONFIG["wave_size"])
+                wave = [self._frontier.popleft() for _ in range(wave_size)]
+                wave_documents: List[Document] = []
+                for url, (document, links, visited) in zip(wave, executor.map(self._crawl_url, wave)):
+                    self.stats["visited" if visited else "unchanged"] += 1
+                    if document is None:
+                        self.stats["failed"] += 1
+                        continue
+                    wave_documents.append(document)
+                    new_state[url] = {"lastmod": self._lastmods.get(url), "links": links}
+                    for link in links:
+                        self._enqueue(link, base=url)
+                self._save_state({**self._state, **new_state})
+                documents += len(wave_documents)
+                yield from wave_documents
+
+        self.stats["not_modified"] = self.not_modified
+        self._state = new_state
+        self._save_state(new_state)
+        logger.info(
+            f"Crawl finished: {documents} documents, {self.stats['visited']} pages visited, "
+            f"{self.stats['unchanged']} unchanged since the last crawl, {self.stats['not_modified']} not modified, "
+            f"{self.stats['failed']} failed, {self.stats['dropped']} URLs dropped (frontier full)."
+        )
+
+    def _enqueue(
+        self,
+        url: str,
+        base: Optional[str] = None,
+        lastmod: Optional[str] = None,
+        check_allowed: bool = True,
+    ) -> None:
+        """
+        Adds a URL to the frontier if it's allowed (seed URLs always are), not seen yet
+        and the frontier isn't full.
+        """
+        canonical = canonicalize_url(url, base)
+        if canonical is None or canonical in self._seen:
+            return
+        if check_allowed and not self.is_allowed(canonical):
+            return
+        if len(self._frontier) >= self.max_frontier:
+            self.stats["dropped"] += 1
+            return
+        self._seen.add(canonical)
+        self._lastmods[canonical] = lastmod
+        self._frontier.append(canonical)
+
+    def _request(self, url: str) -> Optional[requests.Response]:
+        """Requests a URL with the pooled session, waiting for the rate limiter."""
+        self.rate_limiter.acquire()
+        try:
+            response = self._session.get(url, timeout=WEB_LOADER_CONFIG["timeout"])
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching URL {url}: {e}")
+            return None
+
+    def _read_sitemap(self, sitemap_url: str, depth: int) -> None:
+        """
+        Reads a sitemap, adding its URLs to the frontier, or a sitemap index, reading
+        its sitemaps (up to `max_sitemap_depth` levels).
+        """
+        response = self._request(sitemap_url)
+        if response is None:
+            return
+        content = response.content
+        if content[:2] == b"\x1f\x8b":
+            content = gzip.decompress(content)
+        try:
+            root = ElementTree.fromstring(content)
+        except ElementTree.ParseError as e:
+            logger.error(f"Invalid sitemap {sitemap_url}: {e}")
+            return
+
+        # Tags are namespaced ({http://www.sitemaps.org/schemas/sitemap/0.9}loc)
+        def child_text(element: ElementTree.Element, name: str) -> Optional[str]:
+            for child in element:
+                if child.tag.rsplit("}", 1)[-1] == name and child.text:
+                    return child.text.strip()
+            return None
+
+        if root.tag.rsplit("}", 1)[-1] == "sitemapindex":
+            if depth >= WEB_CRAWLER_CONFIG["max_sitemap_depth"]:
+                logger.warning(f"Sitemap index too deep, not read: {sitemap_url}")
+                return
+            for sitemap in root:
+                location = child_text(sitemap, "loc")
+                if location:
+                    self._read_sitemap(urljoin(sitemap_url, location), depth + 1)
+            return
+
+        for entry in root:
+            location = child_text(entry, "loc")
+            if location:
+                self._enqueue(location, base=sitemap_url, lastmod=child_text(entry, "lastmod"))
+        logger.info(f"Sitemap read: {sitemap_url} ({len(self._frontier)} URLs in the frontier)")
+
+    def _crawl_url(self, url: str) -> Tuple[Optional[Document], List[str], bool]:
+        """
+        Loads a page: from the cache if its sitemap lastmod hasn't changed since the last
+        crawl, otherwise with a (conditional, if cached) request.
+
+        Returns:
+            Tuple[Optional[Document], List[str], bool]: The document (None if it failed), the
+                links of the page and whether the page was requested.
+        """
+        previous = self._state.get(url)
+        lastmod = self._lastmods.get(url)
+        cached = self._cache.get(url) if self._cache else None
+        if previous and cached and lastmod and previous.get("lastmod") == lastmod:
+            return self._create_document(cached["markdown"], cached["metadata"]), previous.get("links", []), False
+
+        self.rate_limiter.acquire()
+        response = self._fetch_html(url, cached)
+        if response is None:
+            return None, [], True
+        if response.status_code == 304 and cached:
+            with self._not_modified_lock:
+                self.not_modified += 1
+            links = previous.get("links", []) if previous else []
+            return self._create_document(cached["markdown"], cached["metadata"]), links, True
+
+        parsed = self._parse_page(url, response.text)
+        if parsed is None:
+            return None, [], True
+        markdown_content, metadata = parsed
+        if self._cache and markdown_content:
+            self._cache.put(url, response.headers, markdown_content, metadata)
+        links: List[str] = []
+        if self.follow_links:
+            extractor = _LinkExtractor()
+            extractor.feed(response.text)
+            links = [link for link in (canonicalize_url(href, url) for href in extractor.links) if link]
+        return self._create_document(markdown_content, metadata), links, True
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        """Loads the crawl state file, if any."""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as file:
+                return json.load(file).get("urls", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable crawl state {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self, urls: Dict[str, Dict[str, Any]]) -> None:
+        """Writes the crawl state file atomically (temporary file and rename)."""
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        temporary_path = f"{self.state_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({"crawled_at": time.time(), "urls": urls}, file)
+        os.replace(temporary_path, self.state_path)
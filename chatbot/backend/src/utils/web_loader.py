@@ -5,30 +5,80 @@ File: web_loader.py
 This file contains the WebLoader class, responsible for fetching, parsing,
 and converting web pages into markdown documents. It uses concurrent futures
 to handle multiple URLs simultaneously and BeautifulSoup for HTML parsing.
+Requests share a pooled session, and converted pages are kept in an on-disk
+HttpCache: cached pages are requested conditionally and, if they haven't changed
+(304 Not Modified), the cached Markdown is used without parsing them again.
 """
 
-from concurrent.futures import ThreadPoolExecutor, as_completed, Future
-from typing import List, Optional, Dict, Sequence
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, Future, wait
+from typing import Any, Iterator, List, Optional, Dict, Tuple
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 from langchain_core.documents import Document
-from langchain_community.document_transformers.markdownify import MarkdownifyTransformer
+from markdownify import MarkdownConverter
 
-from src.config.config_init import MARKDOWNIFY_CONFIG
+from src.config.config_init import MARKDOWNIFY_CONFIG, WEB_LOADER_CONFIG
+from src.utils.html_extractor import extract_article
+from src.utils.http_cache import HttpCache
 from src.utils.logger_manager import logger
 
+# Markdown converter shared by every page, with the options of the Markdownify transformer
+_MARKDOWN_CONVERTER = MarkdownConverter(
+    **{"strip": None, "convert": None, "autolinks": True, "heading_style": "ATX", **MARKDOWNIFY_CONFIG}
+)
+_BLANK_LINES = re.compile(r"\n\s*\n")
+
 
 class WebLoader:
-    def __init__(self, urls: List[str]) -> None:
+    def __init__(
+        self,
+        urls: List[str],
+        cache_directory: Optional[str] = None,
+        use_cache: bool = WEB_LOADER_CONFIG["cache_enabled"],
+        fast_extraction: bool = WEB_LOADER_CONFIG["fast_extraction"],
+    ) -> None:
         """
         Initializes the WebLoader instance with a list of URLs to process.
 
         Args:
             urls (List[str]): List of URLs to be fetched and converted to Markdown.
+            cache_directory (Optional[str]): Directory of the page cache. Defaults to the configured one.
+            use_cache (bool): If False, every page is fetched and converted again.
+            fast_extraction (bool): If True, the article is extracted without parsing the whole
+                page into a BeautifulSoup tree (see html_extractor.py).
         """
         self.urls: List[str] = urls
+        self._fast_extraction: bool = fast_extraction
+        self._max_workers: int = WEB_LOADER_CONFIG["max_workers"]
+        self._session: requests.Session = self._create_session()
+        self._cache: Optional[HttpCache] = (
+            HttpCache(cache_directory or WEB_LOADER_CONFIG["cache_directory"])
+            if use_cache
+            else None
+        )
+        self.not_modified: int = 0  # Pages served from the cache in the last get_documents
+        self._not_modified_lock = threading.Lock()
+
+    def _create_session(self) -> requests.Session:
+        """
+        Creates the session shared by the requests, keeping up to one connection per
+        worker open per host.
+
+        Returns:
+            requests.Session: The pooled session.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self._max_workers, pool_maxsize=self._max_workers
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
     def get_documents(self) -> List[Document]:
         """
@@ -38,64 +88,75 @@ class WebLoader:
         Returns:
             List[Document]: A list of Document objects containing the content of the parsed web pages.
         """
-        documents: List[Document] = []
+        documents: List[Document] = list(self.iter_documents())
+        logger.info(
+            f"All documents loaded: {len(documents)} ({self.not_modified} not modified, from the cache)"
+        )
+        return documents
+
+    def iter_documents(self) -> Iterator[Document]:
+        """
+        Fetches and parses the list of URLs, yielding each Document as soon as it's loaded,
+        so that the pages can be processed while the others are fetched. At most twice
+        as many pages as workers are loaded ahead of the consumer.
+        Retries up to 3 times for each URL that fails.
+
+        Yields:
+            Document: The content of each parsed web page, in completion order.
+        """
         max_retries: int = 3
         url_attempts: Dict[str, int] = {url: 0 for url in self.urls}
         remaining_urls: set[str] = set(self.urls)
+        self.not_modified = 0
 
-        while remaining_urls:
-            remaining_urls = self._process_url_batch(
-                remaining_urls, url_attempts, max_retries, documents
-            )
-        logger.info(f"All documents loaded: {len(documents)}")
-        return documents
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            while remaining_urls:
+                failed_urls: set[str] = set()
+                yield from self._iter_url_batch(
+                    remaining_urls, executor, url_attempts, max_retries, failed_urls
+                )
+                remaining_urls = failed_urls
 
-    def _process_url_batch(
+    def _iter_url_batch(
         self,
         urls: set[str],
+        executor: ThreadPoolExecutor,
         url_attempts: Dict[str, int],
         max_retries: int,
-        documents: List[Document],
-    ) -> set[str]:
+        failed_urls: set[str],
+    ) -> Iterator[Document]:
         """
-        Processes a batch of URLs concurrently using a thread pool.
-        Submits each URL to be fetched and parsed, then collects results as they complete.
-        Updates the documents list with successful loads and tracks failed URLs for retry.
+        Processes a batch of URLs concurrently using the thread pool.
+        Submits each URL to be fetched and parsed, keeping a bounded number of pages in
+        flight, and yields the documents as they complete. Failed URLs that should be
+        retried are added to failed_urls.
 
         Args:
             urls (set[str]): Set of URLs to process in this batch.
+            executor (ThreadPoolExecutor): The thread pool executor instance.
             url_attempts (Dict[str, int]): Tracks the number of attempts for each URL.
             max_retries (int): Maximum number of retries per URL.
-            documents (List[Document]): List to append successfully loaded documents to.
+            failed_urls (set[str]): Set to add failed URLs to for retrying.
 
-        Returns:
-            set[str]: Set of URLs that failed in this batch and should be retried.
+        Yields:
+            Document: The successfully loaded documents.
         """
-        failed_urls: set[str] = set()
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            future_to_url = self._submit_url_futures(urls, executor)
-            for future in as_completed(future_to_url):
-                url = future_to_url[future]
+        future_to_url: Dict[Future[Optional[Document]], str] = {}
+        url_iterator = iter(urls)
+        while True:
+            for url in url_iterator:
+                future_to_url[executor.submit(self._fetch_and_parse, url)] = url
+                if len(future_to_url) >= 2 * self._max_workers:
+                    break
+            if not future_to_url:
+                return
+            done, _ = wait(future_to_url, return_when=FIRST_COMPLETED)
+            for future in done:
+                documents: List[Document] = []
                 self._handle_future_result(
-                    future, url, documents, url_attempts, max_retries, failed_urls
+                    future, future_to_url.pop(future), documents, url_attempts, max_retries, failed_urls
                 )
-        return failed_urls
-
-    def _submit_url_futures(
-        self, urls: set[str], executor: ThreadPoolExecutor
-    ) -> Dict[Future[Optional[Document]], str]:
-        """
-        Submits fetch_and_parse tasks for each URL to the thread pool executor.
-        Returns a mapping from Future objects to their corresponding URLs for tracking.
-
-        Args:
-            urls (set[str]): Set of URLs to submit as tasks.
-            executor (ThreadPoolExecutor): The thread pool executor instance.
-
-        Returns:
-            Dict[Future[Optional[Document]], str]: Mapping from Future to URL.
-        """
-        return {executor.submit(self._fetch_and_parse, url): url for url in urls}
+                yield from documents
 
     def _handle_future_result(
         self,
@@ -146,6 +207,7 @@ class WebLoader:
     def _fetch_and_parse(self, url: str) -> Optional[Document]:
         """
         Fetches, parses, and converts the HTML content of a URL into a Markdown document.
+        If the page is cached and hasn't changed, the cached document is returned instead.
 
         Args:
             url (str): The URL to fetch and process.
@@ -155,47 +217,135 @@ class WebLoader:
         """
         try:
             logger.debug(f"Start fetch_and_parse for: {url}")
-            html_content: Optional[str] = self._fetch_html(url)
-            if not html_content:
+            cached: Optional[Dict[str, Any]] = self._cache.get(url) if self._cache else None
+            response: Optional[requests.Response] = self._fetch_html(url, cached)
+            if response is None:
                 logger.error(f"No HTML content for: {url}")
                 return None
 
-            soup: Optional[BeautifulSoup] = self._parse_html(html_content)
-            if not soup:
-                logger.error(f"No soup for: {url}")
-                return None
+            if response.status_code == 304 and cached:
+                logger.info(f"Not modified, using cached document: {url[-30:]}")
+                with self._not_modified_lock:
+                    self.not_modified += 1
+                return self._create_document(cached["markdown"], cached["metadata"])
 
-            article_html: Optional[str] = self._extract_article(soup)
-            if not article_html:
-                logger.error(f"No article found for: {url}")
+            parsed: Optional[Tuple[str, Dict[str, str]]] = self._parse_page(
+                url, response.text
+            )
+            if parsed is None:
                 return None
+            markdown_content, metadata = parsed
 
-            markdown_content: str = self._convert_to_markdown(article_html)
-            metadata: Dict[str, str] = self._extract_metadata(soup, url)
-            metadata["html_content_length"] = str(len(markdown_content))
-
-            logger.debug(f"Document created for: {url}")
+            if self._cache and markdown_content:
+                self._cache.put(url, response.headers, markdown_content, metadata)
             return self._create_document(markdown_content, metadata)
         except Exception as e:
             logger.error(f"Error fetching and parsing URL {url}: {e}")
             return None
 
-    def _fetch_html(self, url: str) -> Optional[str]:
+    def _parse_page(
+        self, url: str, html_content: str
+    ) -> Optional[Tuple[str, Dict[str, str]]]:
         """
-        Fetches the HTML content of a given URL.
+        Parses the HTML content of a page, extracts its article and converts it to Markdown.
+
+        Args:
+            url (str): The URL of the page.
+            html_content (str): The HTML content of the page.
+
+        Returns:
+            Optional[Tuple[str, Dict[str, str]]]: The Markdown content and the metadata of
+                the document if successful, None otherwise.
+        """
+        if not html_content:
+            logger.error(f"No HTML content for: {url}")
+            return None
+
+        extracted: Optional[Tuple[Optional[str], Dict[str, str]]] = (
+            self._fast_extract(url, html_content) if self._fast_extraction else None
+        )
+        if extracted is None:
+            extracted = self._soup_extract(url, html_content)
+            if extracted is None:
+                return None
+        article_html, metadata = extracted
+        if not article_html:
+            logger.error(f"No article found for: {url}")
+            return None
+
+        markdown_content: str = self._convert_to_markdown(article_html)
+        metadata["html_content_length"] = str(len(markdown_content))
+
+        logger.debug(f"Document created for: {url}")
+        return markdown_content, metadata
+
+    def _fast_extract(
+        self, url: str, html_content: str
+    ) -> Optional[Tuple[Optional[str], Dict[str, str]]]:
+        """
+        Extracts the article and the title of a page without building a tree of the
+        whole page (see html_extractor.py).
+
+        Args:
+            url (str): The URL of the page.
+            html_content (str): The HTML content of the page.
+
+        Returns:
+            Optional[Tuple[Optional[str], Dict[str, str]]]: The HTML of the article (None if
+                not found) and the metadata, or None if the extraction failed.
+        """
+        try:
+            article_html, title = extract_article(html_content)
+            return article_html, {"url": url, "title": title if title is not None else "No title"}
+        except Exception as e:
+            logger.warning(f"Fast extraction failed for {url}, parsing the whole page: {e}")
+            return None
+
+    def _soup_extract(
+        self, url: str, html_content: str
+    ) -> Optional[Tuple[Optional[str], Dict[str, str]]]:
+        """
+        Extracts the article and the title of a page from a BeautifulSoup tree of the page.
+
+        Args:
+            url (str): The URL of the page.
+            html_content (str): The HTML content of the page.
+
+        Returns:
+            Optional[Tuple[Optional[str], Dict[str, str]]]: The HTML of the article (None if
+                not found) and the metadata, or None if the page couldn't be parsed.
+        """
+        soup: Optional[BeautifulSoup] = self._parse_html(html_content)
+        if not soup:
+            logger.error(f"No soup for: {url}")
+            return None
+        return self._extract_article(soup), self._extract_metadata(soup, url)
+
+    def _fetch_html(
+        self, url: str, cached: Optional[Dict[str, Any]] = None
+    ) -> Optional[requests.Response]:
+        """
+        Fetches the HTML content of a given URL with the pooled session. If the page is
+        cached, the request is conditional (If-None-Match / If-Modified-Since).
 
         Args:
             url (str): The URL to fetch.
+            cached (Optional[Dict[str, Any]]): The cache entry of the URL, if any.
 
         Returns:
-            Optional[str]: The HTML content of the page if successful, None otherwise.
+            Optional[requests.Response]: The response (200, or 304 if the cached page hasn't
+                changed) if successful, None otherwise.
         """
         try:
             logger.debug(f"Fetching URL: {url}")
-            response: requests.Response = requests.get(url, timeout=10)
+            response: requests.Response = self._session.get(
+                url,
+                headers=HttpCache.conditional_headers(cached),
+                timeout=WEB_LOADER_CONFIG["timeout"],
+            )
             response.raise_for_status()
             logger.info(f"Fetched URL successfully: {url[-30:]}")
-            return response.text
+            return response
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching URL {url}: {e}")
             return None
@@ -260,7 +410,8 @@ class WebLoader:
 
     def _convert_to_markdown(self, html_content: str) -> str:
         """
-        Converts the HTML content to Markdown using the Markdownify transformer.
+        Converts the HTML content to Markdown with the shared markdownify converter,
+        cleaning it like the Markdownify transformer.
 
         Args:
             html_content (str): The HTML content to be converted to Markdown.
@@ -269,14 +420,13 @@ class WebLoader:
             str: The content converted to Markdown.
         """
         try:
-            html_document: Document = Document(page_content=html_content)
-            transformer: MarkdownifyTransformer = MarkdownifyTransformer(
-                **MARKDOWNIFY_CONFIG
-            )
-            markdown_content: Sequence[Document] = transformer.transform_documents(
-                [html_document]
+            markdown_content: str = (
+                _MARKDOWN_CONVERTER.convert(html_content).replace("\xa0", " ").strip()
             )
-            return str(markdown_content[0])
+            cleaned_markdown: str = _BLANK_LINES.sub("\n\n", markdown_content)
+            # Documents have always been indexed with the string form of the converted
+            # Document (page_content='...'), kept so that the chunk IDs don't change
+            return str(Document(page_content=cleaned_markdown))
         except Exception as e:
             logger.error(f"Error converting to Markdown: {e}")
             return ""
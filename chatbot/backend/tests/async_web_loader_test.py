@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+async_web_loader_test.py
+
+Unit test for AsyncWebLoader functionality.
+- Serves documentation pages from a local HTTP server that tracks concurrent requests
+- Checks that the documents match the ones of WebLoader, with the per-host limit respected
+- Checks the retries with backoff of rate-limited pages, the deadline and the 4xx errors
+- Checks the conditional requests of cached pages
+"""
+
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from src.utils.async_web_loader import AsyncWebLoader
+from src.utils.web_loader import WebLoader
+
+PAGE = (
+    "<html><head><title>Page {i}</title></head><body><article class='bd-article'>"
+    "<h1>Estimator {i}</h1><p>Parameters of estimator {i}.</p></article></body></html>"
+)
+
+
+class DocsHandler(BaseHTTPRequestHandler):
+    """Serves /page<i>.html, /flaky.html (429 twice), /slow.html (3s) and 404 for other paths."""
+
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    requests: Dict[str, int] = {}
+
+    def do_GET(self) -> None:
+        with DocsHandler.lock:
+            DocsHandler.in_flight += 1
+            DocsHandler.max_in_flight = max(DocsHandler.max_in_flight, DocsHandler.in_flight)
+            DocsHandler.requests[self.path] = DocsHandler.requests.get(self.path, 0) + 1
+            attempt = DocsHandler.requests[self.path]
+        try:
+            time.sleep(3 if self.path == "/slow.html" else 0.05)
+            if self.path == "/flaky.html" and attempt <= 2:
+                self._send(429, b"", {"Retry-After": "0"})
+            elif self.path == "/flaky.html" or self.path.startswith("/page"):
+                name = self.path.strip("/").split(".")[0]
+                etag = f'"{name}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", {"ETag": etag})
+                else:
+                    self._send(200, PAGE.format(i=name).encode("utf-8"), {"ETag": etag})
+            else:
+                self._send(404, b"", {})
+        finally:
+            with DocsHandler.lock:
+                DocsHandler.in_flight -= 1
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DocsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def url(server: ThreadingHTTPServer, path: str) -> str:
+    return f"http://127.0.0.1:{server.server_port}{path}"
+
+
+def test_matches_web_loader():
+    server = start_server()
+    try:
+        urls = [url(server, f"/page{i}.html") for i in range(12)]
+        DocsHandler.max_in_flight = 0
+        documents = AsyncWebLoader(urls, use_cache=False, per_host_limit=3, parse_workers=2).get_documents()
+
+        assert DocsHandler.max_in_flight <= 3
+        expected = {doc.metadata["url"]: doc for doc in WebLoader(urls, use_cache=False).get_documents()}
+        assert [doc.metadata["url"] for doc in documents] == urls
+        assert documents == [expected[page_url] for page_url in urls]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_retries_deadline_and_errors():
+    server = start_server()
+    try:
+        urls = [url(server, "/flaky.html"), url(server, "/missing.html"), url(server, "/page0.html")]
+        loader = AsyncWebLoader(urls, use_cache=False, max_retries=3, backoff_base=0.01, parse_workers=0)
+        documents = loader.get_documents()
+        assert [doc.metadata["url"] for doc in documents] == [urls[0], urls[2]]
+        assert DocsHandler.requests["/flaky.html"] == 3
+        assert DocsHandler.requests["/missing.html"] == 1  # 404s are not retried
+
+        start = time.perf_counter()
+        urls = [url(server, "/slow.html"), url(server, "/page1.html")]
+        documents = AsyncWebLoader(urls, use_cache=False, deadline=1, parse_workers=0).get_documents()
+        assert time.perf_counter() - start < 2.5
+        assert [doc.metadata["url"] for doc in documents] == [urls[1]]
+
+        assert AsyncWebLoader([], use_cache=False, parse_workers=2).get_documents() == []
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_conditional_requests():
+    server = start_server()
+    try:
+        urls = [url(server, f"/page{i}.html") for i in range(3)]
+        with tempfile.TemporaryDirectory() as cache_directory:
+            documents = AsyncWebLoader(urls, cache_directory=cache_directory, parse_workers=0).get_documents()
+            loader = AsyncWebLoader(urls, cache_directory=cache_directory, parse_workers=0)
+            assert loader.get_documents() == documents
+            assert loader.not_modified == 3
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    test_matches_web_loader()
+    print("AsyncWebLoader returns the documents of WebLoader, within the per-host limit.")
+    test_retries_deadline_and_errors()
+    print("Rate-limited pages are retried, 4xx errors are not, the deadline drops slow pages and no URLs load nothing.")
+    test_conditional_requests()
+    print("Cached pages are requested conditionally.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+chunk_deduplicator_test.py
+
+Unit test for ChunkDeduplicator functionality.
+- Chooses LSH bands that compare the chunks above the similarity threshold, and few below it
+- Drops chunks that are near-duplicates (a few words changed) and keeps different ones
+- Keeps the local copy of a chunk also found in the web documents, in the step-by-step
+  and the streaming EmbeddingManager, and reports the chunks and tokens saved
+"""
+
+import os
+import random
+import tempfile
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.chunk_deduplicator import ChunkDeduplicator, lsh_bands
+from src.utils.embedding_manager import EmbeddingManager
+
+WORDS = (
+    "estimator fit predict transform pipeline parameter sample feature gradient tree forest "
+    "boosting regression classifier cluster kernel matrix vector score metric split fold"
+).split()
+
+
+def random_text(seed: int, length: int = 120) -> str:
+    generator = random.Random(seed)
+    return " ".join(generator.choice(WORDS) for _ in range(length))
+
+
+def edit_words(text: str, positions: List[int]) -> str:
+    words = text.split()
+    for position in positions:
+        words[position] = "edited"
+    return " ".join(words)
+
+
+def test_lsh_bands():
+    def compared(similarity: float, bands: int, rows: int) -> float:
+        return 1 - (1 - similarity**rows) ** bands
+
+    for threshold in (0.5, 0.7, 0.85, 0.95):
+        bands, rows = lsh_bands(threshold, 128)
+        assert bands * rows <= 128
+        assert compared(min(threshold + 0.05, 1), bands, rows) > 0.95
+        assert compared(threshold - 0.2, bands, rows) < 0.3
+
+
+def test_near_duplicates():
+    text = random_text(1)
+    chunks = [
+        Document(page_content=text),
+        Document(page_content=edit_words(text, [60])),  # One word changed: similarity ~0.92
+        Document(page_content=text.upper()),  # Same words
+        Document(page_content=random_text(2)),
+        Document(page_content=edit_words(text, list(range(0, 120, 8)))),  # Every 8th word: ~0.2
+    ]
+    deduplicator = ChunkDeduplicator(threshold=0.85)
+    kept = deduplicator.deduplicate(chunks)
+    assert kept == [chunks[0], chunks[3], chunks[4]]
+    assert deduplicator.stats["chunks"] == 5 and deduplicator.stats["duplicates"] == 2
+    assert 0 < deduplicator.stats["tokens_saved"] < deduplicator.stats["tokens"]
+
+    # A threshold of 1 only drops chunks with the same shingles
+    assert ChunkDeduplicator(threshold=1.0).deduplicate(chunks) == [chunks[0], chunks[1], chunks[3], chunks[4]]
+
+
+def test_cross_corpus():
+    shared = random_text(3)
+    local_sections = [
+        Document(page_content=shared, metadata={"file_name": "guide.md"}),
+        Document(page_content=random_text(4), metadata={"file_name": "guide.md"}),
+    ]
+    web_sections = [
+        Document(page_content=edit_words(shared, [5]), metadata={"url": "https://example.com/guide"}),
+        Document(page_content=random_text(5), metadata={"url": "https://example.com/api"}),
+    ]
+
+    def stored(collection) -> List[str]:
+        return sorted(collection.get(include=["documents"])["documents"])
+
+    for streaming in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            embedding_manager = EmbeddingManager(
+                embedding_model=DeterministicFakeEmbedding(size=8),
+                local_documents=iter(local_sections) if streaming else local_sections,
+                web_documents=iter(web_sections) if streaming else web_sections,
+                persist_directory=os.path.join(directory, "database"),
+                embedding_cache_path=os.path.join(directory, "embeddings.sqlite"),
+                streaming=streaming,
+                deduplication_threshold=0.85,
+            )
+            local = stored(embedding_manager.local_collection)
+            web = stored(embedding_manager.web_collection)
+            assert len(local) + len(web) == 3
+            assert random_text(5) in web
+            assert embedding_manager.deduplicator.stats["duplicates"] == 1  # type: ignore
+            assert local == sorted([shared, random_text(4)])
+            embedding_manager.embedding_model.close()
+
+
+def main():
+    test_lsh_bands()
+    print("LSH bands match the similarity threshold.")
+    test_near_duplicates()
+    print("Near-duplicate chunks are dropped, different ones kept.")
+    test_cross_corpus()
+    print("Chunks of the web documents that duplicate local ones are not embedded.")
+
+
+if __name__ == "__main__":
+    main()
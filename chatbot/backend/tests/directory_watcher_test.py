@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+directory_watcher_test.py
+
+Unit test for the live updates of the local documents.
+- Scans a directory tree recording the modification time and size of the Markdown files
+- Watches it with inotify and with polling, checking that bursts of changes are
+  debounced into one report of the added, modified and deleted files
+- Updates only the chunks of the changed sources in the local collection, deduplicating
+  them against the other sources but not against their previous version
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import List, Set, Tuple
+
+from langchain_core.documents import Document
+
+from src.utils.directory_loader import DirectoryLoader
+from src.utils.directory_watcher import DirectoryWatcher
+from src.utils.embedding_manager import EmbeddingManager
+from tests.chunk_deduplicator_test import edit_words, random_text
+from tests.incremental_indexing_test import CountingEmbeddings
+
+
+def write_file(directory: str, name: str, content: str) -> None:
+    path = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def test_scan_files():
+    with tempfile.TemporaryDirectory() as directory:
+        write_file(directory, "guide.md", "# Guide")
+        write_file(directory, "api/models/trees.md", "# Trees")
+        write_file(directory, "api/notes.txt", "Not Markdown")
+        write_file(directory, ".git/readme.md", "Hidden")
+
+        loader = DirectoryLoader(directory)
+        file_stats = loader.scan_files()
+        assert set(file_stats) == {"guide.md", "api/models/trees.md"}
+        stat = os.stat(os.path.join(directory, "api/models/trees.md"))
+        assert file_stats["api/models/trees.md"] == (stat.st_mtime_ns, stat.st_size)
+
+        documents = loader.get_documents()
+        assert sorted(doc.metadata["file_name"] for doc in documents) == ["api/models/trees.md", "guide.md"]
+        assert loader.file_stats == file_stats
+
+
+def watch_changes(use_inotify: bool) -> Tuple[str, List[Tuple[Set[str], Set[str]]]]:
+    reports: List[Tuple[Set[str], Set[str]]] = []
+    reported = threading.Event()
+
+    def on_change(changed: Set[str], deleted: Set[str]) -> None:
+        reports.append((changed, deleted))
+        reported.set()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_file(directory, "guide.md", "# Guide")
+        write_file(directory, "old.md", "# Old")
+        watcher = DirectoryWatcher(
+            directory, on_change, debounce_seconds=0.5, poll_interval=0.1, use_inotify=use_inotify
+        )
+        watcher.start()
+        try:
+            # A burst of changes, including a new subdirectory and several writes of a file
+            write_file(directory, "api/trees.md", "# Trees")
+            for i in range(3):
+                write_file(directory, "guide.md", "# Guide" + " edited" * (i + 1))
+                time.sleep(0.05)
+            os.remove(os.path.join(directory, "old.md"))
+            assert reported.wait(timeout=10)
+            time.sleep(1)  # No other report for the same burst
+        finally:
+            watcher.stop()
+        return watcher.backend, reports  # type: ignore
+
+
+def test_watcher():
+    for use_inotify in (True, False):
+        backend, reports = watch_changes(use_inotify)
+        assert backend == ("inotify" if use_inotify and sys.platform.startswith("linux") else "polling")
+        assert reports == [({"api/trees.md", "guide.md"}, {"old.md"})], (backend, reports)
+
+
+def test_update_local_sources():
+    def sections(source: str, contents: List[str]) -> List[Document]:
+        return [Document(page_content=content, metadata={"file_name": source}) for content in contents]
+
+    with tempfile.TemporaryDirectory() as directory:
+        embedding_model = CountingEmbeddings(size=8, embedded=[])
+        embedding_manager = EmbeddingManager(
+            embedding_model=embedding_model,
+            local_documents=sections("guide.md", ["Intro", "Usage"]) + sections("faq.md", ["Question"]),
+            web_documents=[],
+            persist_directory=os.path.join(directory, "database"),
+            embedding_cache_path=os.path.join(directory, "embeddings.sqlite"),
+        )
+        embedding_model.embedded.clear()
+
+        stats = embedding_manager.update_local_sources(
+            {"guide.md": sections("guide.md", ["Intro", "Usage (edited)"]), "faq.md": [], "new.md": sections("new.md", ["New"])}
+        )
+        assert stats == {"added": 2, "deleted": 2, "unchanged": 1}
+        assert sorted(embedding_model.embedded) == ["New", "Usage (edited)"]
+        stored = embedding_manager.local_collection.get(include=["documents"])  # type: ignore
+        assert sorted(stored["documents"]) == ["Intro", "New", "Usage (edited)"]
+        embedding_manager.embedding_model.close()
+
+
+def test_update_deduplicated_sources():
+    def section(source: str, content: str) -> Document:
+        return Document(page_content=content, metadata={"file_name": source})
+
+    with tempfile.TemporaryDirectory() as directory:
+        embedding_manager = EmbeddingManager(
+            embedding_model=CountingEmbeddings(size=8, embedded=[]),
+            local_documents=[section("guide.md", random_text(1)), section("faq.md", random_text(2))],
+            web_documents=[],
+            persist_directory=os.path.join(directory, "database"),
+            embedding_cache_path=os.path.join(directory, "embeddings.sqlite"),
+            deduplication_threshold=0.85,
+        )
+
+        # A small edit of a file is kept, a copy of another file is dropped
+        edited = edit_words(random_text(1), [60])
+        stats = embedding_manager.update_local_sources(
+            {"guide.md": [section("guide.md", edited)], "copy.md": [section("copy.md", random_text(2))]}
+        )
+        assert stats == {"added": 1, "deleted": 1, "unchanged": 0}
+        stored = embedding_manager.local_collection.get(include=["documents"])  # type: ignore
+        assert sorted(stored["documents"]) == sorted([edited, random_text(2)])
+        assert embedding_manager.deduplicator.stats["duplicates"] == 1  # type: ignore
+        embedding_manager.embedding_model.close()
+
+
+def main():
+    test_scan_files()
+    print("The directory tree is scanned with the modification time and size of each file.")
+    test_watcher()
+    print("Bursts of changes are reported once, with inotify and with polling.")
+    test_update_local_sources()
+    print("Only the chunks of the changed sources are embedded, deleted or kept.")
+    test_update_deduplicated_sources()
+    print("The updated sources are deduplicated against the others, not their previous version.")
+
+
+if __name__ == "__main__":
+    main()
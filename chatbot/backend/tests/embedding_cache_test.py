@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+embedding_cache_test.py
+
+Unit test for CachedEmbeddings functionality.
+- Embeds documents and queries through a cache over a fake embeddings model
+- Checks that cached texts are not embedded again, across cache instances
+- Checks the hit ratios, the per-model keys and the eviction of the least recently used vectors
+- Rebuilds an EmbeddingManager database from scratch without embedding calls
+"""
+
+import os
+import tempfile
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.embedding_cache import CachedEmbeddings
+from src.utils.embedding_manager import EmbeddingManager
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings model that records the texts it embeds."""
+
+    embedded: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self.embedded.append(text)
+        return super().embed_query(text)
+
+
+def test_cache_hits():
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, "embeddings.sqlite")
+        model = CountingEmbeddings(size=8, embedded=[])
+        cache = CachedEmbeddings(model, cache_path=cache_path)
+
+        vectors = cache.embed_documents(["a", "b", "a"])
+        assert model.embedded == ["a", "b"]
+        assert vectors == model.embed_documents(["a", "b", "a"])
+        model.embedded.clear()
+
+        assert cache.embed_documents(["b", "c"])[0] == vectors[1]
+        assert model.embedded == ["c"]
+        cache.embed_query("a")
+        cache.embed_query("a")
+        assert model.embedded == ["c", "a"]
+
+        stats = cache.stats()
+        assert stats["document"] == {"hits": 1, "misses": 3, "hit_ratio": 0.25}
+        assert stats["query"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+        cache.close()
+
+        # The vectors persist across instances, but are keyed by model
+        model.embedded.clear()
+        cache = CachedEmbeddings(model, cache_path=cache_path)
+        cache.embed_documents(["a", "b", "c"])
+        assert model.embedded == []
+        other_model = CachedEmbeddings(model, cache_path=cache_path, model_id="other-model")
+        other_model.embed_documents(["a"])
+        assert model.embedded == ["a"]
+        cache.close()
+        other_model.close()
+
+
+def test_eviction():
+    with tempfile.TemporaryDirectory() as directory:
+        model = CountingEmbeddings(size=8, embedded=[])
+        cache = CachedEmbeddings(model, cache_path=os.path.join(directory, "embeddings.sqlite"), max_entries=2)
+
+        cache.embed_documents(["a"])
+        cache.embed_documents(["b"])
+        cache.embed_documents(["a"])  # "b" is now the least recently used
+        cache.embed_documents(["c"])
+        assert len(cache) == 2
+
+        model.embedded.clear()
+        cache.embed_documents(["a", "c"])
+        assert model.embedded == []
+        cache.embed_documents(["b"])
+        assert model.embedded == ["b"]
+        cache.close()
+
+
+def test_rebuild_without_embedding_calls():
+    with tempfile.TemporaryDirectory() as directory:
+        documents = [Document(page_content=f"Section {i}", metadata={"file_name": "guide.md"}) for i in range(5)]
+        model = CountingEmbeddings(size=8, embedded=[])
+        for reset in (False, True):
+            embedding_manager = EmbeddingManager(
+                embedding_model=model,
+                local_documents=documents,
+                web_documents=[],
+                persist_directory=os.path.join(directory, "database"),
+                reset=reset,
+                embedding_cache_path=os.path.join(directory, "embeddings.sqlite"),
+            )
+            embedding_manager.embedding_model.close()
+        assert sorted(model.embedded) == [f"Section {i}" for i in range(5)]
+
+
+def main():
+    test_cache_hits()
+    print("Cached texts are not embedded again, and hit ratios are reported.")
+    test_eviction()
+    print("The least recently used vectors are evicted beyond max_entries.")
+    test_rebuild_without_embedding_calls()
+    print("Rebuilding the database of an unchanged corpus costs no embedding calls.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+html_extraction_test.py
+
+Output-equivalence test for the fast extraction path of WebLoader.
+- Parses sample documentation pages with a copy of the original WebLoader parsing
+  (BeautifulSoup tree of the whole page and a Markdownify transformer per page)
+- Parses them with WebLoader (fast extraction and shared markdown converter)
+- Checks that the Markdown content and the metadata are the same
+"""
+
+from typing import Dict, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from langchain_community.document_transformers.markdownify import MarkdownifyTransformer
+from langchain_core.documents import Document
+
+from src.config.config_init import MARKDOWNIFY_CONFIG
+from src.utils.html_extractor import extract_article
+from src.utils.web_loader import WebLoader
+
+SPHINX_PAGE = """<!DOCTYPE html>
+<html lang="en" data-content_root="../../">
+<head>
+  <meta charset="utf-8" />
+  <title>RandomForestClassifier &#8212; scikit-learn 1.6.1 documentation</title>
+  <link rel="stylesheet" href="../../_static/styles/theme.css?digest=abc" />
+  <script>var x = "<article class='bd-article'>not this one</article>";</script>
+</head>
+<body>
+  <nav class="bd-header"><a href="/">Home</a><img src="logo.png" alt="logo"></nav>
+  <div class="bd-main"><article class="bd-article content" role="main">
+    <section id="randomforestclassifier">
+      <h1>RandomForestClassifier<a class="headerlink" href="#randomforestclassifier">#</a></h1>
+      <dl class="py class"><dt class="sig sig-object py" id="sklearn.ensemble.RandomForestClassifier">
+        <em class="property">class </em><span class="sig-name">RandomForestClassifier</span>
+        (<em>n_estimators=100</em>, <em>*</em>, <em>criterion='gini'</em>)</dt>
+      <dd><p>A random forest classifier.<br>
+        Uses &lt;averaging&gt; &amp; bootstrap&nbsp;samples.
+        <p>Unclosed paragraph with <code>max_depth</code>
+        <table class="table"><thead><tr><th>Param</th><th>Default</th></tr></thead>
+        <tbody><tr><td>n_estimators</td><td>100</td></tr></tbody></table>
+        <div class="highlight"><pre><span></span>&gt;&gt;&gt; from sklearn.ensemble import RandomForestClassifier
+&gt;&gt;&gt; clf = RandomForestClassifier(max_depth=2)</pre></div>
+      </dd></dl>
+      <section id="nested"><h2>Nested section</h2><ul><li>One<li>Two</ul></section>
+      <section id="gallery-examples">
+        <h2>Gallery examples</h2>
+        <section id="inner"><p>Inside the gallery</p></section>
+        <div class="sphx-glr-thumbcontainer"><img src="thumb.png" alt=""></div>
+      </section>
+      <section id="after-gallery"><p>After the gallery</p></section>
+    </section>
+  </article></div>
+  <footer><p>&copy; 2007 - 2024, scikit-learn developers</p></footer>
+</body>
+</html>
+"""
+
+SAMPLE_PAGES: Dict[str, str] = {
+    "sphinx": SPHINX_PAGE,
+    "crlf": SPHINX_PAGE.replace("\n", "\r\n"),
+    "no_gallery": SPHINX_PAGE.replace('id="gallery-examples"', 'id="examples"'),
+    "nested_article": SPHINX_PAGE.replace(
+        '<section id="nested">', '<article class="note"><p>Nested article</p></article><section id="nested">'
+    ),
+    "multiline_attributes": SPHINX_PAGE.replace(
+        '<article class="bd-article content" role="main">', '<article\n  class="bd-article"\n  role="main"\n>'
+    ),
+    "unclosed_article": "<html><head><title>Unclosed</title></head><body><article class='bd-article'>"
+    "<h1>Title</h1><p>Text without end</p>",
+    "no_article": "<html><head><title>No article</title></head><body><div>Content</div></body></html>",
+    "no_title": "<html><body><article class='bd-article'><p>Untitled</p></article></body></html>",
+    "empty_title": "<html><head><title></title></head><body><article class='bd-article'><p>x</p></article></body></html>",
+}
+
+
+def legacy_parse_page(url: str, html: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """Copy of the original WebLoader parsing, kept as the reference."""
+    soup = BeautifulSoup(html, "html.parser")
+    article_section = soup.find("article", class_="bd-article")
+    if not article_section:
+        return None
+    gallery_examples_section = article_section.find("section", id="gallery-examples")  # type: ignore
+    if gallery_examples_section:
+        gallery_examples_section.decompose()
+    article_html = str(article_section)
+
+    transformer = MarkdownifyTransformer(**MARKDOWNIFY_CONFIG)
+    markdown_content = str(transformer.transform_documents([Document(page_content=article_html)])[0])
+    title = soup.find("title").text if soup.find("title") else "No title"  # type: ignore
+    metadata = {"url": url, "title": title, "html_content_length": str(len(markdown_content))}
+    return markdown_content, metadata
+
+
+def test_extract_article():
+    article_html, title = extract_article(SPHINX_PAGE)
+
+    assert title == "RandomForestClassifier — scikit-learn 1.6.1 documentation"
+    assert article_html.startswith('<article class="bd-article content"') and article_html.endswith("</article>")
+    assert "Inside the gallery" not in article_html and "After the gallery" in article_html
+    assert extract_article(SAMPLE_PAGES["no_article"]) == (None, "No article")
+
+
+def test_equivalence():
+    loader = WebLoader(urls=[], use_cache=False)
+    for name, html in SAMPLE_PAGES.items():
+        url = f"https://example.com/{name}.html"
+        assert loader._parse_page(url, html) == legacy_parse_page(url, html), name
+
+
+def main():
+    test_extract_article()
+    print("The article is extracted without its gallery, with the page title.")
+    test_equivalence()
+    print(f"{len(SAMPLE_PAGES)} sample pages give the same documents as the original parsing.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+incremental_indexing_test.py
+
+Unit test for the incremental re-indexing of EmbeddingManager.
+- Indexes example local and web documents into a temporary Chroma database
+- Re-indexes them unchanged, with an edited, a new and a removed chunk, and with reset
+- Checks which chunks are embedded, deleted and kept each time
+- Indexes everything again when the embeddings model changes
+"""
+
+import os
+import tempfile
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.embedding_manager import EmbeddingManager, chunk_id
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings model that records the texts it embeds."""
+
+    embedded: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+class OtherEmbeddings(CountingEmbeddings):
+    """Another fake embeddings model, with another ID and dimension."""
+
+
+def make_documents(contents: List[str], source: str) -> List[Document]:
+    return [Document(page_content=content, metadata={"file_name": source}) for content in contents]
+
+
+def index(persist_directory: str, local_documents: List[Document], reset: bool = False, embedding_model=None):
+    embedding_model = embedding_model or CountingEmbeddings(size=8, embedded=[])
+    # A new embedding cache each time, so that only the indexing diff avoids embedding calls
+    with tempfile.TemporaryDirectory() as cache_directory:
+        embedding_manager = EmbeddingManager(
+            embedding_model=embedding_model,
+            local_documents=local_documents,
+            web_documents=[Document(page_content="Web article", metadata={"url": "https://example.com"})],
+            persist_directory=persist_directory,
+            reset=reset,
+            embedding_cache_path=os.path.join(cache_directory, "embeddings.sqlite"),
+        )
+        embedding_manager.embedding_model.close()
+    return embedding_manager, embedding_model.embedded
+
+
+def stored_ids(embedding_manager: EmbeddingManager) -> set:
+    return set(embedding_manager.local_collection.get(include=[])["ids"])  # type: ignore
+
+
+def test_chunk_id():
+    document = Document(page_content="Content", metadata={"file_name": "guide.md"})
+
+    assert chunk_id(document) == chunk_id(Document(page_content="Content", metadata={"file_name": "guide.md"}))
+    assert chunk_id(document).startswith("guide.md#")
+    assert chunk_id(document) != chunk_id(Document(page_content="Content 2", metadata={"file_name": "guide.md"}))
+    assert chunk_id(document) != chunk_id(Document(page_content="Content", metadata={"file_name": "faq.md"}))
+
+
+def test_incremental_indexing():
+    with tempfile.TemporaryDirectory() as persist_directory:
+        documents = make_documents(["Section 1", "Section 2", "Section 3", "Section 3"], "guide.md")
+        embedding_manager, embedded = index(persist_directory, documents)
+        assert sorted(embedded) == ["Section 1", "Section 2", "Section 3", "Web article"]
+        assert embedding_manager.index_stats["local_documents"] == {"added": 3, "deleted": 0, "unchanged": 0}
+
+        # Unchanged documents: nothing is embedded
+        embedding_manager, embedded = index(persist_directory, documents)
+        assert embedded == []
+        assert embedding_manager.index_stats["local_documents"] == {"added": 0, "deleted": 0, "unchanged": 3}
+
+        # Edited, new and removed chunks: only the edited and new ones are embedded
+        documents = make_documents(["Section 1", "Section 2 (edited)", "Section 4"], "guide.md")
+        embedding_manager, embedded = index(persist_directory, documents)
+        assert sorted(embedded) == ["Section 2 (edited)", "Section 4"]
+        assert embedding_manager.index_stats["local_documents"] == {"added": 2, "deleted": 2, "unchanged": 1}
+        assert stored_ids(embedding_manager) == {chunk_id(document) for document in documents}
+
+        # Reset: every chunk is embedded again
+        embedding_manager, embedded = index(persist_directory, documents, reset=True)
+        assert sorted(embedded) == ["Section 1", "Section 2 (edited)", "Section 4", "Web article"]
+        assert stored_ids(embedding_manager) == {chunk_id(document) for document in documents}
+
+        # Another embeddings model: every chunk is embedded again, with its dimension
+        embedding_model = OtherEmbeddings(size=16, embedded=[])
+        embedding_manager, embedded = index(persist_directory, documents, embedding_model=embedding_model)
+        assert sorted(embedded) == ["Section 1", "Section 2 (edited)", "Section 4", "Web article"]
+        assert embedding_manager.index_stats["local_documents"] == {"added": 3, "deleted": 0, "unchanged": 0}
+        results = embedding_manager.local_collection._collection.query(query_embeddings=[[1.0] * 16], n_results=1)  # type: ignore
+        assert len(results["ids"][0]) == 1
+
+        # The model is recorded: indexing again with it embeds nothing
+        embedding_manager, embedded = index(persist_directory, documents, embedding_model=OtherEmbeddings(size=16, embedded=[]))
+        assert embedded == []
+
+
+def main():
+    test_chunk_id()
+    print("Chunk IDs are deterministic and change with the content and the source.")
+    test_incremental_indexing()
+    print("Re-indexing only embeds new or changed chunks and deletes the removed ones, or every chunk for another model.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+ingestion_engine_test.py
+
+Unit test for IngestionEngine functionality.
+- Ingests example chunks with a fake embeddings model into an in-memory writer
+- Checks that batches are written in order, with concurrent embedding requests
+- Interrupts an ingestion and checks that a new run resumes after the last written batch
+- Checks the retries and the throughput statistics
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.ingestion_engine import IngestionEngine
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings model that takes some time per request and can fail on given texts."""
+
+    delay: float = 0.0
+    failing_texts: List[str] = []
+    calls: List[List[str]] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(texts)
+        time.sleep(self.delay)
+        if any(text in self.failing_texts for text in texts):
+            raise ConnectionError("Embedding service unavailable")
+        return super().embed_documents(texts)
+
+
+class FlakyEmbeddings(SlowEmbeddings):
+    """Fake embeddings model whose first requests fail."""
+
+    failures: int = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.failures:
+            self.failures -= 1
+            self.calls.append(texts)
+            raise ConnectionError("Timeout")
+        return super().embed_documents(texts)
+
+
+class ListWriter:
+    """Writer that records the written batches."""
+
+    def __init__(self) -> None:
+        self.ids: List[str] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, ids, documents, embeddings) -> None:
+        assert len(ids) == len(documents) == len(embeddings)
+        with self.lock:
+            self.ids.extend(ids)
+
+
+def make_chunks(n: int):
+    documents = [Document(page_content=f"chunk number {i}") for i in range(n)]
+    return [f"id-{i}" for i in range(n)], documents
+
+
+def test_ordered_concurrent_ingestion():
+    ids, documents = make_chunks(20)
+    model = SlowEmbeddings(size=4, delay=0.05, calls=[])
+    engine = IngestionEngine(model, batch_size=2, concurrency=5, requests_per_minute=None)
+    writer = ListWriter()
+
+    start = time.perf_counter()
+    stats = engine.ingest("local_documents", ids, documents, writer)
+    elapsed = time.perf_counter() - start
+
+    assert writer.ids == ids
+    assert len(model.calls) == 10
+    assert elapsed < 10 * 0.05  # The requests overlap
+    assert stats["chunks"] == 20 and stats["batches"] == 10 and stats["tokens"] == 60
+    assert stats["chunks_per_sec"] > 0 and stats["tokens_per_sec"] > 0
+    assert engine.stats["local_documents"] == stats
+
+
+def test_resume_after_failure():
+    ids, documents = make_chunks(10)
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoint_path = os.path.join(directory, "checkpoint.json")
+        model = SlowEmbeddings(size=4, failing_texts=["chunk number 6"], calls=[])
+        engine = IngestionEngine(
+            model, batch_size=2, concurrency=1, requests_per_minute=None, max_retries=1,
+            checkpoint_path=checkpoint_path,
+        )
+        writer = ListWriter()
+        try:
+            engine.ingest("local_documents", ids, documents, writer)
+            assert False, "The ingestion should fail"
+        except ConnectionError:
+            pass
+        assert writer.ids == ids[:6]
+        with open(checkpoint_path, encoding="utf-8") as file:
+            assert json.load(file)["local_documents"]["written_batches"] == 3
+
+        # A new run resumes after the written batches and removes the checkpoint at the end
+        model = SlowEmbeddings(size=4, calls=[])
+        engine = IngestionEngine(model, batch_size=2, requests_per_minute=None, checkpoint_path=checkpoint_path)
+        assert engine.has_checkpoint()
+        stats = engine.ingest("local_documents", ids, documents, writer)
+        assert writer.ids == ids
+        assert model.calls == [["chunk number 6", "chunk number 7"], ["chunk number 8", "chunk number 9"]]
+        assert stats["resumed_batches"] == 3 and stats["chunks"] == 4
+        assert not os.path.exists(checkpoint_path)
+
+        # A checkpoint of other ids is not resumed
+        engine._save_progress("local_documents", "other-fingerprint", 3)
+        writer = ListWriter()
+        IngestionEngine(model, batch_size=2, requests_per_minute=None, checkpoint_path=checkpoint_path).ingest(
+            "local_documents", ids, documents, writer
+        )
+        assert writer.ids == ids
+
+
+def test_retries():
+    ids, documents = make_chunks(4)
+    model = FlakyEmbeddings(size=4, failures=1, calls=[])
+    engine = IngestionEngine(model, batch_size=2, requests_per_minute=None, max_retries=2)
+    writer = ListWriter()
+
+    engine.ingest("web_documents", ids, documents, writer)
+    assert writer.ids == ids
+    assert len(model.calls) == 3
+
+
+def main():
+    test_ordered_concurrent_ingestion()
+    print("Batches are embedded concurrently and written in order.")
+    test_resume_after_failure()
+    print("An interrupted ingestion resumes after the last written batch.")
+    test_retries()
+    print("Failed embedding requests are retried.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+ingestion_pipeline_test.py
+
+Unit test for IngestionPipeline functionality.
+- Streams documents through the load, split, embed and write stages with a fake
+  embeddings model and writer
+- Checks that embedding starts before loading ends and that the stages stay bounded
+- Checks that a failing stage stops the pipeline with its error
+- Checks that streaming EmbeddingManager indexes the same chunks as the step-by-step one
+"""
+
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.embedding_manager import EmbeddingManager, chunk_id
+from src.utils.ingestion_engine import IngestionEngine
+from src.utils.ingestion_pipeline import IngestionPipeline
+from src.utils.section_splitter import split_documents
+
+
+def make_documents(count: int, source: str = "guide.md") -> List[Document]:
+    return [
+        Document(page_content=f"# Title {i}\n\nParagraph **{i}** of the guide.", metadata={"file_name": f"{source}-{i}"})
+        for i in range(count)
+    ]
+
+
+def slow_documents(documents: List[Document], delay: float, progress: Dict[str, float]) -> Iterator[Document]:
+    for document in documents:
+        time.sleep(delay)
+        progress["loaded"] += 1
+        yield document
+    progress["load_end"] = time.perf_counter()
+
+
+def create_pipeline(batch_size: int = 2, concurrency: int = 2, queue_size: int = 2) -> IngestionPipeline:
+    engine = IngestionEngine(
+        DeterministicFakeEmbedding(size=4), batch_size=batch_size, concurrency=concurrency, requests_per_minute=None
+    )
+    return IngestionPipeline(engine, chunk_id, plain_words_only=True, queue_size=queue_size)
+
+
+def test_streaming():
+    documents = make_documents(20)
+    progress: Dict[str, float] = {"loaded": 0}
+    written: Dict[str, Document] = {}
+    first_write: List[float] = []
+
+    def write(ids: List[str], sections: List[Document], embeddings: List[List[float]]) -> None:
+        first_write.append(time.perf_counter())
+        assert len(ids) == len(sections) == len(embeddings)
+        written.update(zip(ids, sections))
+
+    pipeline = create_pipeline()
+    expected = split_documents(documents, plain_words_only=True)
+    stored = {chunk_id(expected[0])}
+    section_ids = pipeline.run("guide", slow_documents(documents, 0.01, progress), stored, write)
+
+    assert section_ids == {chunk_id(section) for section in expected}
+    assert set(written) == section_ids - stored
+    assert min(first_write) < progress["load_end"]  # Embedding overlaps loading
+
+    stats = pipeline.stats["guide"]
+    assert stats["total"]["documents"] == 20 and stats["total"]["new_sections"] == len(section_ids) - 1
+    assert stats["embed"]["items"] == stats["write"]["items"] == len(section_ids) - 1
+    for stage in ("split", "embed", "write"):
+        assert stats[stage]["queue_max"] <= 2
+
+
+def test_bounded_memory():
+    batch_size, concurrency, queue_size = 2, 2, 2
+    documents = make_documents(100)
+    progress: Dict[str, float] = {"loaded": 0}
+    ahead: List[float] = []
+    written = {"sections": 0}
+
+    def write(ids: List[str], sections: List[Document], embeddings: List[List[float]]) -> None:
+        time.sleep(0.01)  # Slow store: the upstream stages must wait for it
+        written["sections"] += len(ids)
+        ahead.append(progress["loaded"] - written["sections"])
+
+    pipeline = create_pipeline(batch_size, concurrency, queue_size)
+    pipeline.run("guide", slow_documents(documents, 0, progress), set(), write)
+
+    # Documents in the queues and in the hands of the stages (one section per document)
+    bound = 2 + queue_size + (2 * queue_size + concurrency + 2) * batch_size
+    assert written["sections"] == 100
+    assert max(ahead) <= bound < 100
+
+
+def test_failure():
+    def write(ids: List[str], sections: List[Document], embeddings: List[List[float]]) -> None:
+        raise RuntimeError("Store unavailable")
+
+    start = time.perf_counter()
+    try:
+        create_pipeline().run("guide", iter(make_documents(50)), set(), write)
+        assert False, "The error of the write stage should be raised"
+    except RuntimeError as e:
+        assert str(e) == "Store unavailable"
+    assert time.perf_counter() - start < 5
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("guide-")]
+
+
+def test_streaming_embedding_manager():
+    def index(persist_directory: str, documents: List[Document], streaming: bool) -> EmbeddingManager:
+        with tempfile.TemporaryDirectory() as cache_directory:
+            embedding_manager = EmbeddingManager(
+                embedding_model=DeterministicFakeEmbedding(size=8),
+                local_documents=iter(documents) if streaming else split_documents(documents),
+                web_documents=iter([]) if streaming else [],
+                persist_directory=persist_directory,
+                embedding_cache_path=os.path.join(cache_directory, "embeddings.sqlite"),
+                streaming=streaming,
+            )
+            embedding_manager.embedding_model.close()
+        return embedding_manager
+
+    def stored(embedding_manager: EmbeddingManager) -> set:
+        return set(embedding_manager.local_collection.get(include=[])["ids"])  # type: ignore
+
+    documents = make_documents(10)
+    with tempfile.TemporaryDirectory() as streamed_directory, tempfile.TemporaryDirectory() as listed_directory:
+        streamed = index(streamed_directory, documents, streaming=True)
+        assert stored(streamed) == stored(index(listed_directory, documents, streaming=False))
+        assert streamed.index_stats["local_documents"] == {"added": 10, "deleted": 0, "unchanged": 0}
+        assert "embed" in streamed.pipeline_stats["local_documents"]
+
+        # Removed documents are deleted at the end of the stream, the others kept
+        streamed = index(streamed_directory, documents[:7], streaming=True)
+        assert streamed.index_stats["local_documents"] == {"added": 0, "deleted": 3, "unchanged": 7}
+        assert len(stored(streamed)) == 7
+
+
+def main():
+    test_streaming()
+    print("Sections are embedded and written while the documents are loaded.")
+    test_bounded_memory()
+    print("The stages stay bounded by their queues.")
+    test_failure()
+    print("A failing stage stops the pipeline with its error.")
+    test_streaming_embedding_manager()
+    print("Streaming EmbeddingManager indexes the same chunks as the step-by-step one.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+markdown_cleaner_test.py
+
+Golden-output test for clean_markdown.
+- Compares clean_markdown with a copy of the original DocumentManager cleaning
+  (17 sequential re.sub calls) on every section of the docs directory
+- Compares both on crafted strings with nested and overlapping Markdown constructs
+- Compares both on random strings built from Markdown syntax characters
+"""
+
+import os
+import random
+import re
+
+from langchain.text_splitter import MarkdownTextSplitter
+
+from src.config.config_init import MARKDOWN_SPLITTER_CONFIG
+from src.utils.markdown_cleaner import clean_markdown
+
+DOCS_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "docs")
+
+CRAFTED_SECTIONS = [
+    "",
+    "plain text",
+    "[![badge](https://img.shields.io/badge.svg)](https://example.com)",
+    "![image](a.png) and [link](b.html) and [[wiki]](c.html) and [ref][1] and note[^2]",
+    "# Title\n\n## Subtitle\n###No space\ntext # not a header",
+    "**bold** __bold__ *italic* _italic_ `code` ``double`` snake_case_name",
+    "```python\nprint('code')\n```\nafter ``` unclosed",
+    "| a | b |\n| --- | :---: |\n|---|---|\ncell | without | leading pipe\n- | -",
+    "> quote\n>> nested\n>\n\n> after blank",
+    "- item\n* star item\n+ plus item\n  - nested item\n-no space\n1. ordered",
+    "---\n----\n- ---\n***\n___",
+    "<div class='x'>html</div> a < b and c > d <br/>",
+    "line\n\n\n\nline\t\t\ttab\n\t\n\t\n",
+    "*- starred list\n_# emphasized header\n`> coded quote",
+    "   \n\n  indented\n\n\n   ",
+    "[text](url with (parens)) [unclosed](url\n[a]\n(b)",
+    "[^note] [^1] [^12a] text[^3]",
+    "<[link](url)> [<b>bold</b>](url)",
+]
+
+SYNTAX_ALPHABET = list("#*_`>|-+![]()^<>:\n\t ") + ["```", "---", "a", "b", "1", "word"]
+
+
+def legacy_process_section(section: str) -> str:
+    """Copy of DocumentManager._process_section before clean_markdown, kept as the reference."""
+    text = section
+    text = re.sub(r"```[\s\S]*?```", "", text)
+    text = re.sub(r"!\[[^\]]*\]\([^\)]*\)", "", text)
+    text = re.sub(r"\[[^\]]*\]\([^\)]*\)", "", text)
+    text = re.sub(r"\[\[[^\]]*\]\]\([^\)]*\)", "", text)
+    text = re.sub(r"\[[^\]]*\]\[[^\]]*\]", "", text)
+    text = re.sub(r"\[\^\d+\]", "", text)
+    text = re.sub(r"^\s*\|.*\|\s*$", "", text, flags=re.MULTILINE)
+    text = re.sub(r"^\s*\|?\s*:?-+:?\s*\|.*$", "", text, flags=re.MULTILINE)
+    text = re.sub(r"<[^>]+>", "", text)
+    text = re.sub(r"^#+\s*", "", text, flags=re.MULTILINE)
+    text = re.sub(r"(\*\*|__|\*|_)", "", text)
+    text = re.sub(r"`+", "", text)
+    text = re.sub(r"^>\s*", "", text, flags=re.MULTILINE)
+    text = re.sub(r"^(\s*[-*+])\s+", "", text, flags=re.MULTILINE)
+    text = re.sub(r"^---+$", "", text, flags=re.MULTILINE)
+    text = re.sub(r"\n+", "\n", text)
+    text = re.sub(r"\t+", "\t", text)
+    text = text.strip()
+    return text
+
+
+def load_docs_sections():
+    """Splits the Markdown files of the docs directory as DocumentManager does."""
+    splitter = MarkdownTextSplitter(**MARKDOWN_SPLITTER_CONFIG)
+    sections = []
+    for file_name in sorted(os.listdir(DOCS_DIRECTORY)):
+        if file_name.endswith(".md"):
+            with open(os.path.join(DOCS_DIRECTORY, file_name), encoding="utf-8") as file:
+                sections.extend(splitter.split_text(file.read()))
+    return sections
+
+
+def test_docs_sections():
+    sections = load_docs_sections()
+    assert sections
+    for section in sections:
+        assert clean_markdown(section) == legacy_process_section(section), section[:200]
+
+
+def test_crafted_sections():
+    for section in CRAFTED_SECTIONS:
+        assert clean_markdown(section) == legacy_process_section(section), repr(section)
+
+
+def test_random_sections():
+    rng = random.Random(0)
+    for _ in range(5000):
+        section = "".join(rng.choice(SYNTAX_ALPHABET) for _ in range(rng.randint(0, 60)))
+        assert clean_markdown(section) == legacy_process_section(section), repr(section)
+
+
+def main():
+    test_docs_sections()
+    print(f"Docs sections: {len(load_docs_sections())} sections match the original cleaning.")
+    test_crafted_sections()
+    print(f"Crafted sections: {len(CRAFTED_SECTIONS)} sections match the original cleaning.")
+    test_random_sections()
+    print("Random sections: 5000 sections match the original cleaning.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+section_splitter_test.py
+
+Unit test for split_documents functionality.
+- Splits the documents of the docs directory with a copy of the original sequential
+  splitting of DocumentManager, kept as the reference
+- Checks that split_documents gives the same sections, in the same order, both
+  in-process and in a process pool
+"""
+
+import glob
+from typing import List
+
+from langchain.text_splitter import MarkdownTextSplitter
+from langchain_core.documents import Document
+
+from src.config.config_init import MARKDOWN_SPLITTER_CONFIG
+from src.utils.markdown_cleaner import clean_markdown
+from src.utils.section_splitter import create_split_executor, split_documents
+
+
+def load_documents() -> List[Document]:
+    documents = [
+        Document(page_content=open(path, encoding="utf-8").read(), metadata={"file_name": path})
+        for path in sorted(glob.glob("./docs/**/*.md", recursive=True))
+    ]
+    documents.append(Document(page_content="", metadata={"file_name": "empty.md"}))
+    return documents
+
+
+def legacy_split(documents: List[Document], plain_words_only: bool) -> List[Document]:
+    """Copy of the original DocumentManager splitting, kept as the reference."""
+    splitter = MarkdownTextSplitter(**MARKDOWN_SPLITTER_CONFIG)
+    sections = []
+    for doc in documents:
+        for section in splitter.split_text(doc.page_content):
+            processed = clean_markdown(section) if plain_words_only else section
+            sections.append(Document(page_content=processed, metadata=doc.metadata))
+    return sections
+
+
+def test_in_process():
+    documents = load_documents()
+    for plain_words_only in (True, False):
+        assert split_documents(documents, plain_words_only) == legacy_split(documents, plain_words_only)
+
+
+def test_process_pool():
+    # Many small tasks, so that the chunks come back from different processes
+    documents = load_documents() * 5
+    expected = legacy_split(documents, True)
+    with create_split_executor(workers=2) as executor:
+        sections = split_documents(documents, True, executor=executor, parallel_min_characters=0)
+    assert sections == expected
+    assert [section.metadata["file_name"] for section in sections] == [
+        section.metadata["file_name"] for section in expected
+    ]
+
+
+def main():
+    test_in_process()
+    print("Splitting in-process gives the sections of the original splitting.")
+    test_process_pool()
+    print("Splitting in a process pool gives the same sections, in the same order.")
+
+
+if __name__ == "__main__":
+    main()
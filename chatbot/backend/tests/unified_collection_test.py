@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+unified_collection_test.py
+
+Unit test for the unified collection of EmbeddingManager.
+- Indexes local and web documents into a single collection tagged with their source type,
+  and re-indexes and updates each source type without touching the other
+- Checks that query_sources embeds the query once and fills the quota of each source,
+  querying a source on its own when the over-fetched candidates don't fill its quota
+- Checks that query_sources matches the separate queries of the two collections
+"""
+
+import os
+import tempfile
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.embedding_manager import EmbeddingManager
+
+
+class QueryCountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings model that records the queries it embeds."""
+
+    queries: List[str] = []
+
+    def embed_query(self, text: str) -> List[float]:
+        self.queries.append(text)
+        return super().embed_query(text)
+
+
+def local_documents(count: int, edited: bool = False) -> List[Document]:
+    return [
+        Document(
+            page_content=f"Local section {i}{' (edited)' if edited and i == 0 else ''}",
+            metadata={"file_name": f"guide-{i % 3}.md"},
+        )
+        for i in range(count)
+    ]
+
+
+def web_documents(count: int) -> List[Document]:
+    return [
+        Document(page_content=f"Web page {i}", metadata={"url": f"https://example.com/{i}"}) for i in range(count)
+    ]
+
+
+def create_manager(directory: str, local: List[Document], web: List[Document], unified: bool) -> EmbeddingManager:
+    return EmbeddingManager(
+        embedding_model=QueryCountingEmbeddings(size=8, queries=[]),
+        local_documents=local,
+        web_documents=web,
+        persist_directory=os.path.join(directory, "database"),
+        embedding_cache_path=os.path.join(directory, "embeddings.sqlite"),
+        deduplication_threshold=None,
+        unified=unified,
+    )
+
+
+def test_unified_indexing():
+    with tempfile.TemporaryDirectory() as directory:
+        embedding_manager = create_manager(directory, local_documents(6), web_documents(2), unified=True)
+        assert embedding_manager.local_collection is embedding_manager.web_collection is embedding_manager.collection
+        stored = embedding_manager.collection.get(include=["metadatas"])  # type: ignore
+        source_types = sorted(metadata["source_type"] for metadata in stored["metadatas"])
+        assert source_types == ["local"] * 6 + ["web"] * 2
+        assert embedding_manager.index_stats["web_documents"] == {"added": 2, "deleted": 0, "unchanged": 0}
+        embedding_manager.embedding_model.close()
+
+        # Removing local chunks deletes them, not the web chunks of the same collection
+        embedding_manager = create_manager(directory, local_documents(4, edited=True), web_documents(2), unified=True)
+        assert embedding_manager.index_stats["local_documents"] == {"added": 1, "deleted": 3, "unchanged": 3}
+        assert embedding_manager.index_stats["web_documents"] == {"added": 0, "deleted": 0, "unchanged": 2}
+
+        stats = embedding_manager.update_local_sources({"guide-0.md": [], "guide-1.md": local_documents(2)[1:]})
+        assert stats == {"added": 0, "deleted": 2, "unchanged": 1}
+        remaining = embedding_manager.collection.get(include=["documents"])["documents"]  # type: ignore
+        assert sorted(remaining) == ["Local section 1", "Local section 2", "Web page 0", "Web page 1"]
+        embedding_manager.embedding_model.close()
+
+
+def test_query_sources():
+    with tempfile.TemporaryDirectory() as directory:
+        # Far more local than web chunks: the candidates may miss the web chunk, found by a filtered query
+        embedding_manager = create_manager(directory, local_documents(40), web_documents(1), unified=True)
+        embedding_model = embedding_manager.embedding_model.embedding_model  # type: ignore
+        for query in ("How do I fit an estimator?", "What is a pipeline?", "Cross-validation"):
+            embedding_model.queries.clear()
+            local_results, web_results = embedding_manager.query_sources(query, k_local=3, k_web=1)
+            assert embedding_model.queries == [query]  # Embedded once for both sources
+            assert len(local_results) == 3
+            assert all(result.metadata["source_type"] == "local" for result in local_results)
+            assert [result.page_content for result in web_results] == ["Web page 0"]
+            assert local_results == embedding_manager.query_local_embeddings(query, 3)
+        embedding_manager.embedding_model.close()
+
+
+def test_separate_collections():
+    with tempfile.TemporaryDirectory() as directory:
+        embedding_manager = create_manager(directory, local_documents(10), web_documents(5), unified=False)
+        assert embedding_manager.collection is None
+        local_results, web_results = embedding_manager.query_sources("What is a pipeline?", k_local=3, k_web=2)
+        assert local_results == embedding_manager.query_local_embeddings("What is a pipeline?", 3)
+        assert web_results == embedding_manager.query_web_embeddings("What is a pipeline?", 2)
+        assert embedding_manager.query_embeddings("What is a pipeline?", 2) == local_results[:2] + web_results
+        embedding_manager.embedding_model.close()
+
+
+def main():
+    test_unified_indexing()
+    print("Local and web chunks are indexed in one collection, tagged with their source type.")
+    test_query_sources()
+    print("One query embedding per question, with the quota of each source filled.")
+    test_separate_collections()
+    print("query_sources matches the separate queries of the two collections.")
+
+
+if __name__ == "__main__":
+    main()
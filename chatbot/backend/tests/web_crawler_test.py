@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+web_crawler_test.py
+
+Unit test for WebCrawler functionality.
+- Canonicalizes equivalent URLs to the same URL
+- Crawls a local site from a (gzipped) sitemap index, within the allowlist, deduplicating URLs
+- Bounds the frontier and follows the links of the pages
+- Persists the crawl state: a recrawl only requests the pages whose lastmod changed
+"""
+
+import gzip
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+from src.utils.web_crawler import WebCrawler, canonicalize_url
+
+PAGE = (
+    "<html><head><title>{name}</title></head><body><a href='{link}#top'>next</a>"
+    "<article class='bd-article'><h1>{name}</h1><p>Reference of {name}.</p></article></body></html>"
+)
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Serves a sitemap index, its sitemaps and the /docs/ and /blog/ pages, counting requests."""
+
+    lastmods: Dict[str, str] = {}
+    requests: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def do_GET(self) -> None:
+        with SiteHandler.lock:
+            SiteHandler.requests[self.path] = SiteHandler.requests.get(self.path, 0) + 1
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        if self.path == "/sitemap.xml":
+            body = (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f"<sitemap><loc>{base}/sitemap-docs.xml.gz</loc></sitemap>"
+                "<sitemap><loc>/sitemap-blog.xml</loc></sitemap>"
+                "</sitemapindex>"
+            ).encode("utf-8")
+        elif self.path == "/sitemap-docs.xml.gz":
+            entries = "".join(
+                f"<url><loc>{base}{path}</loc><lastmod>{lastmod}</lastmod></url>"
+                for path, lastmod in SiteHandler.lastmods.items()
+            )
+            # Duplicates of /docs/a.html once canonicalized
+            entries += (
+                f"<url><loc>HTTP://127.0.0.1:{self.server.server_port}/docs/./a.html#intro</loc></url>"
+                f"<url><loc>{base}/docs/sub/../a.html?utm_source=x</loc></url>"
+            )
+            body = gzip.compress(
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'.encode("utf-8")
+            )
+        elif self.path == "/sitemap-blog.xml":
+            body = f"<urlset><url><loc>{base}/blog/post.html</loc></url></urlset>".encode("utf-8")
+        elif self.path.startswith(("/docs/", "/blog/")) and self.path.endswith(".html"):
+            name = self.path.rsplit("/", 1)[-1][:-5]
+            link = "/docs/linked.html" if name == "a" else "/blog/post.html"
+            body = PAGE.format(name=name, link=link).encode("utf-8")
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", f'"{len(body)}"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def create_crawler(server: ThreadingHTTPServer, directory: str, **kwargs) -> WebCrawler:
+    base = f"http://127.0.0.1:{server.server_port}"
+    return WebCrawler(
+        sitemap_urls=[f"{base}/sitemap.xml"],
+        allowed_prefixes=[f"{base}/docs/"],
+        requests_per_second=1000,
+        state_path=os.path.join(directory, "crawl_state.json"),
+        cache_directory=os.path.join(directory, "web_cache"),
+        **kwargs,
+    )
+
+
+def test_canonicalize_url():
+    canonical = "https://example.com/docs/a.html?a=1&b=2"
+    for url in [
+        "HTTPS://Example.COM:443/docs/a.html?b=2&a=1#section",
+        "https://example.com/docs/./sub/../a.html?a=1&utm_source=x&b=2",
+    ]:
+        assert canonicalize_url(url) == canonical
+    assert canonicalize_url("../b.html", base="http://example.com:8080/docs/a/") == "http://example.com:8080/docs/b.html"
+    assert canonicalize_url("https://example.com") == "https://example.com/"
+    assert canonicalize_url("mailto:someone@example.com") is None
+
+
+def test_crawl_and_recrawl():
+    server = start_server()
+    SiteHandler.lastmods = {"/docs/a.html": "2025-01-01", "/docs/b.html": "2025-01-01", "/docs/c.html": "2025-01-01"}
+    SiteHandler.requests = {}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            crawler = create_crawler(server, directory)
+            documents = crawler.get_documents()
+            assert sorted(doc.metadata["title"] for doc in documents) == ["a", "b", "c"]
+            assert SiteHandler.requests["/docs/a.html"] == 1  # Deduplicated
+            assert "/blog/post.html" not in SiteHandler.requests  # Not allowed
+            assert crawler.stats["visited"] == 3
+
+            # Only the page whose lastmod changed is requested again
+            SiteHandler.lastmods["/docs/b.html"] = "2025-02-01"
+            recrawler = create_crawler(server, directory)
+            assert sorted(doc.page_content for doc in recrawler.get_documents()) == sorted(
+                doc.page_content for doc in documents
+            )
+            assert SiteHandler.requests["/docs/a.html"] == 1
+            assert SiteHandler.requests["/docs/b.html"] == 2
+            assert recrawler.stats["unchanged"] == 2 and recrawler.stats["visited"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_frontier_and_links():
+    server = start_server()
+    SiteHandler.lastmods = {"/docs/a.html": "2025-01-01", "/docs/b.html": "2025-01-01", "/docs/c.html": "2025-01-01"}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            crawler = create_crawler(server, directory, max_frontier=2)
+            assert len(crawler.get_documents()) == 2
+            assert crawler.stats["dropped"] >= 1
+
+        with tempfile.TemporaryDirectory() as directory:
+            crawler = create_crawler(server, directory, follow_links=True)
+            titles = [doc.metadata["title"] for doc in crawler.get_documents()]
+            assert sorted(titles) == ["a", "b", "c", "linked"]  # /blog/ links are not followed
+            assert crawler.stats["visited"] == 4
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    test_canonicalize_url()
+    print("Equivalent URLs have the same canonical URL.")
+    test_crawl_and_recrawl()
+    print("The sitemap pages are crawled once, and a recrawl only requests the changed pages.")
+    test_frontier_and_links()
+    print("The frontier is bounded and the allowed links of the pages are followed.")
+
+
+if __name__ == "__main__":
+    main()
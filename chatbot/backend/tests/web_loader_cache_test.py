@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+web_loader_cache_test.py
+
+Unit test for the HTTP cache of WebLoader.
+- Serves documentation pages with ETag / Last-Modified from a local HTTP server
+- Loads them twice and checks that unchanged pages come back as 304 without being
+  parsed or converted again
+- Changes a page and checks that it is fetched and converted again
+"""
+
+import tempfile
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from src.utils.web_loader import WebLoader
+
+PAGES: Dict[str, str] = {
+    "/etag.html": "<html><head><title>ETag page</title></head><body>"
+    "<article class='bd-article'><h1>Random forest</h1><p>An ensemble of trees.</p></article></body></html>",
+    "/last-modified.html": "<html><head><title>Last-Modified page</title></head><body>"
+    "<article class='bd-article'><h1>Scaling</h1><p>StandardScaler.</p></article></body></html>",
+}
+LAST_MODIFIED = formatdate(0, usegmt=True)
+
+
+class DocsHandler(BaseHTTPRequestHandler):
+    """Serves PAGES, answering conditional requests with 304 if the page hasn't changed."""
+
+    statuses: List[int] = []
+
+    def do_GET(self) -> None:
+        html = PAGES[self.path]
+        etag = f'"{hash(html)}"'
+        if self.path == "/etag.html":
+            not_modified = self.headers.get("If-None-Match") == etag
+            validators = {"ETag": etag}
+        else:
+            not_modified = self.headers.get("If-Modified-Since") == LAST_MODIFIED
+            validators = {"Last-Modified": LAST_MODIFIED}
+
+        status = 304 if not_modified else 200
+        DocsHandler.statuses.append(status)
+        self.send_response(status)
+        for name, value in validators.items():
+            self.send_header(name, value)
+        body = b"" if not_modified else html.encode("utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class CountingWebLoader(WebLoader):
+    """WebLoader that counts the pages it converts to Markdown."""
+
+    conversions = 0
+
+    def _convert_to_markdown(self, html_content: str) -> str:
+        CountingWebLoader.conversions += 1
+        return super()._convert_to_markdown(html_content)
+
+
+def test_conditional_requests():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DocsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_port}{path}" for path in PAGES]
+    try:
+        with tempfile.TemporaryDirectory() as cache_directory:
+            documents = CountingWebLoader(urls, cache_directory=cache_directory).get_documents()
+            assert sorted(DocsHandler.statuses) == [200, 200]
+            assert CountingWebLoader.conversions == 2
+
+            # Unchanged pages: 304s, the cached documents are returned without converting them
+            loader = CountingWebLoader(urls, cache_directory=cache_directory)
+            cached_documents = loader.get_documents()
+            assert DocsHandler.statuses[2:] == [304, 304]
+            assert CountingWebLoader.conversions == 2
+            assert loader.not_modified == 2
+            by_url = lambda docs: {doc.metadata["url"]: doc for doc in docs}
+            assert by_url(cached_documents) == by_url(documents)
+
+            # A changed page is fetched and converted again
+            PAGES["/etag.html"] = PAGES["/etag.html"].replace("An ensemble of trees.", "A forest.")
+            documents = CountingWebLoader(urls, cache_directory=cache_directory).get_documents()
+            assert sorted(DocsHandler.statuses[4:]) == [200, 304]
+            assert CountingWebLoader.conversions == 3
+            assert "A forest." in by_url(documents)[urls[0]].page_content
+
+            # Without cache, every page is converted
+            CountingWebLoader(urls, use_cache=False).get_documents()
+            assert DocsHandler.statuses[6:] == [200, 200]
+            assert CountingWebLoader.conversions == 5
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    test_conditional_requests()
+    print("Unchanged pages are served from the cache after a 304, changed pages are converted again.")
+
+
+if __name__ == "__main__":
+    main()